@@ -3,6 +3,28 @@ import pygame
 from os import listdir
 from os.path import isfile, join, dirname, abspath
 import sys
+import time
+import zlib
+import random
+import struct
+import hashlib
+import weakref
+import mmap
+import json
+import math
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import numpy as np
+except ImportError:
+    np = None # NumPy is optional, without it moving platforms and traps are updated one object at a time
+try:
+    from pygame._sdl2.video import Window, Renderer, Texture
+except ImportError:
+    Window = None # pygame built without SDL2's render API, so only the surface renderer is available
 
 
 pygame.init()
@@ -34,12 +56,186 @@ WIDTH, HEIGHT = 1000, 800 # This is a good size for 2k, if coding in smaller mon
 FPS = 60
 PLAYER_VEL = 4.5 # how fast the player will move across the screen
 
-window = pygame.display.set_mode((WIDTH, HEIGHT), pygame.DOUBLEBUF) # create the pygame window with double buffering to help flickering
+# Input bits for one frame. Every frame of a session is recorded as these bits so the run can be replayed exactly
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_DOWN = 4
+INPUT_JUMP = 8 # set on the frame the jump key was pressed, not while it is held
+
+# What step() reports when a frame ends the current run
+OUTCOME_DEAD = "dead"
+OUTCOME_EXIT = "exit"
+OUTCOME_NEXT_LEVEL = "next_level" # reached the exit of a level with another one after it (see Campaign)
+
+NON_SOLID = ("fruit", "exit_door") # picked up or entered on touch, so the player never lands on or bumps their head on them
+
+replays_dir = join(script_dir, "replays") # where each finished session's inputs are saved
+cache_dir = join(script_dir, "cache") # compiled levels, rebuilt automatically when the level or its assets change
+
+USE_ENTITY_STORE = True # advance moving platforms and animated traps together in NumPy arrays (see EntityStore)
+MASK_NARROW_PHASE = True # confirm swept rect hits with pixel masks; False treats every object as its full rect
+USE_CONTACT_CACHE = True # reuse last frame's collision probes while nothing near the player has moved (see ContactCache)
+EFFECT_CAPACITY = 256 # most particles/effects alive at once (see EffectPool); when full the oldest are replaced
+
+RENDERER = os.environ.get("SENS_ADVENTURE_RENDERER", "surface") # "surface" blits on the CPU, "texture" draws with SDL2 textures (see TextureWindow)
+NATIVE_RENDER = os.environ.get("SENS_ADVENTURE_NATIVE_RENDER", "0") == "1" # draw the world at asset resolution into a half-size frame (see NativeFrame)
+UPSCALE = os.environ.get("SENS_ADVENTURE_UPSCALE", "integer") # how NativeFrame is stretched to the window: "integer" (pixel doubling) or "smooth"
+# SDL reads this hint whenever it creates a texture, so set it once before any are; only NativeFrame's texture is ever scaled
+os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "linear" if UPSCALE == "smooth" else "nearest")
+SPRITE_SCALE = 2 if NATIVE_RENDER else 1 # in-game size of a stored sprite relative to the surface holding it
+LEVEL_CACHE = os.environ.get("SENS_ADVENTURE_LEVEL_CACHE", "1") == "1" # load the built level from cache_dir (see CompiledLevel)
+LOW_LATENCY = os.environ.get("SENS_ADVENTURE_LOW_LATENCY", "0") == "1" # experimental, unproven loop order that samples input just before presenting (see FramePacer)
+LATENCY_PROBE = os.environ.get("SENS_ADVENTURE_LATENCY", "0") == "1" # time key events to the screen and print the latencies on exit
+VSYNC = os.environ.get("SENS_ADVENTURE_VSYNC", "0") == "1" # the texture renderer presents in step with the display's refresh
+QUALITY = os.environ.get("SENS_ADVENTURE_QUALITY", "auto") # "auto" lets FrameGovernor drop detail to hold FPS, or a fixed level from 0 (full) to 4
+
+class TextureWindow:
+    """
+    A window drawn with SDL2's Renderer/Texture API, offering the blit()/fill() calls the draw code uses. Each
+    surface is uploaded once and its texture reused while it lives, so sprites must not change after being drawn.
+    """
+    def __init__(self, size, title="Sen's Adventure"):
+        self.size = size
+        self.window = Window(title, size)
+        try:
+            self.renderer = Renderer(self.window, accelerated=1, vsync=VSYNC)
+            self.accelerated = True
+        except Exception: # pygame._sdl2 raises its own error type when no accelerated driver is available
+            self.renderer = Renderer(self.window, accelerated=0, vsync=VSYNC)
+            self.accelerated = False
+        self._textures = weakref.WeakKeyDictionary() # surface -> its texture, dropped when the surface is
+        self._frame = None # streaming texture for blit_scaled()
+        self.uploads = 0
+
+    def texture(self, surface):
+        texture = self._textures.get(surface)
+        if texture is None:
+            texture = self._textures[surface] = Texture.from_surface(self.renderer, surface)
+            self.uploads += 1
+        return texture
+
+    def get_size(self):
+        return self.size
+
+    def fill(self, color):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.clear()
+
+    def blit(self, source, dest, area=None):
+        texture = self.texture(source)
+        if area is None:
+            width, height = texture.width, texture.height
+        else:
+            area = pygame.Rect(area)
+            width, height = area.size
+        texture.draw(srcrect=area, dstrect=(int(dest[0]), int(dest[1]), width, height))
+
+    def blit_scaled(self, surface):
+        """Stretch surface (redrawn every frame) over the window through one reused streaming texture."""
+        if self._frame is None or (self._frame.width, self._frame.height) != surface.get_size():
+            self._frame = Texture(self.renderer, surface.get_size(), streaming=True)
+        self._frame.update(surface)
+        self._frame.draw(dstrect=(0, 0, *self.size))
+
+    def present(self):
+        self.renderer.present()
+
+def create_window(renderer=RENDERER):
+    """Open the game window: a display surface, or a TextureWindow for the "texture" renderer."""
+    if renderer == "texture":
+        if Window is not None:
+            pygame.display.set_mode((1, 1), pygame.HIDDEN) # convert()/convert_alpha() still need a display mode for the pixel format
+            return TextureWindow((WIDTH, HEIGHT))
+        print("This pygame has no SDL2 render API, using the surface renderer")
+    return pygame.display.set_mode((WIDTH, HEIGHT), pygame.DOUBLEBUF) # create the pygame window with double buffering to help flickering
+
+def update_display(window):
+    """Show what has been drawn to the window this frame."""
+    if isinstance(window, TextureWindow):
+        window.present()
+    else:
+        pygame.display.update()
+
+class NativeFrame:
+    """The half-size surface the world is drawn into with NATIVE_RENDER, stretched to the window once a frame."""
+    def __init__(self, size):
+        self.size = size
+        self.surface = pygame.Surface((size[0] // SPRITE_SCALE, size[1] // SPRITE_SCALE)).convert()
+
+    def fill(self, color):
+        self.surface.fill(color)
+
+    def blit(self, source, dest, area=None):
+        self.surface.blit(source, (int(dest[0]) // SPRITE_SCALE, int(dest[1]) // SPRITE_SCALE), area)
+
+    def upscale(self, window):
+        """Stretch the frame over the whole window."""
+        if isinstance(window, TextureWindow):
+            window.blit_scaled(self.surface)
+        elif UPSCALE == "smooth":
+            pygame.transform.smoothscale(self.surface, window.get_size(), window)
+        else:
+            pygame.transform.scale(self.surface, window.get_size(), window)
+
+window = create_window()
+native_frame = NativeFrame((WIDTH, HEIGHT)) if NATIVE_RENDER else None
 
 def flip(sprites):
     return[pygame.transform.flip(sprite, True, False) for sprite in sprites]
 
+_decoded_images = {} # path -> image decoded by a LevelLoader thread; main thread only (see decoded_images())
+
+@contextmanager
+def decoded_images(images):
+    """Let load_image() use images a LevelLoader decoded while the with block runs. Main thread only."""
+    _decoded_images.update(images)
+    try:
+        yield
+    finally:
+        _decoded_images.clear()
+
+def load_image(path):
+    """
+    Load an image and convert it to the display's format with per-pixel alpha. If a LevelLoader has already
+    decoded the file on its worker thread, only the conversion is left to do here.
+    """
+    image = _decoded_images.get(path)
+    if image is None:
+        image = pygame.image.load(path)
+    return image.convert_alpha()
+
+_sprites = {} # cached_sprites() key -> the sprites loaded for it, shared by every object that uses them
+_recorders = threading.local() # .sets: the sets collecting the keys looked up inside recording_sprites() on each thread
+
+def _sprite_recorders():
+    if not hasattr(_recorders, "sets"):
+        _recorders.sets = []
+    return _recorders.sets
+
+def cached_sprites(key, make):
+    """Return the sprites for key (a Surface, or a list or dict of them), calling make() the first time the key is seen."""
+    for used in _sprite_recorders():
+        used.add(key)
+    sprites = _sprites.get(key)
+    if sprites is None:
+        sprites = _sprites[key] = make()
+    return sprites
+
+@contextmanager
+def recording_sprites():
+    """Collect the keys of every cached_sprites() lookup this thread makes inside the with block."""
+    used = set()
+    _sprite_recorders().append(used)
+    try:
+        yield used
+    finally:
+        _sprite_recorders().pop()
+
 def load_sprite_sheets(dir1, dir2, width, height, direction=False):
+    return cached_sprites(("sheets", dir1, dir2, width, height, direction),
+                          lambda: load_sprite_sheets_uncached(dir1, dir2, width, height, direction))
+
+def load_sprite_sheets_uncached(dir1, dir2, width, height, direction=False):
     # Combine the directory paths to form the full path to the sprite sheets
     script_dir = dirname(abspath(__file__))
     path = join(script_dir, "assets", dir1, dir2)
@@ -53,12 +249,13 @@ def load_sprite_sheets(dir1, dir2, width, height, direction=False):
     for image in images:
         try:
             # Load the sprite sheet image
-            sprite_sheet = pygame.image.load(join(path, image)).convert_alpha() 
+            sprite_sheet = load_image(join(path, image))
         except pygame.error as e:
             continue
 
-        # List to store individual sprites
-        sprites = []
+        # Lists to store individual sprites, as in the sheet and scaled up to their in-game size
+        frames = []
+        scaled = []
         
         # Extract individual sprites from the sprite sheet
         for i in range(sprite_sheet.get_width() // width):
@@ -72,40 +269,114 @@ def load_sprite_sheets(dir1, dir2, width, height, direction=False):
             surface.blit(sprite_sheet, (0, 0), rect)
             
             # Scale the sprite and add it to the list
-            sprites.append(pygame.transform.scale2x(surface))
+            frames.append(surface)
+            scaled.append(pygame.transform.scale2x(surface))
 
         base_name = image.replace(".png", "")
 
         if direction:
-            all_sprites[base_name + "_right"] = sprites
-            all_sprites[base_name + "_left"] = flip(sprites)
+            all_sprites[base_name + "_right"] = share_frames(scaled, frames)
+            all_sprites[base_name + "_left"] = share_frames(flip(scaled), flip(frames))
         else:
-            all_sprites[base_name] = sprites
+            all_sprites[base_name] = share_frames(scaled, frames)
 
     return all_sprites
 
-def get_block(size):
+_frames = {} # (size, digest of the pixels) -> the sprite frame shared by every sheet frame with those pixels
+
+def share_frames(scaled, native):
+    """keep_sprite() each frame; one repeated in an animation or another sheet is the copy already kept."""
+    kept = []
+    for scaled_sprite, native_sprite in zip(scaled, native):
+        key = (native_sprite.get_size(), hashlib.sha1(pygame.image.tobytes(native_sprite, "RGBA")).digest())
+        sprite = _frames.get(key)
+        if sprite is None:
+            sprite = _frames[key] = keep_sprite(scaled_sprite, native_sprite)
+        kept.append(sprite)
+    return kept
+
+def get_block(size, scale=True):
     """
     Load a block image from the "assets/Terrain/Terrain.png" file, extract a specific block from the image,
     and scale it to the desired size.
 
     Args:
         size (int): The desired size (width and height) of the block.
+        scale (bool): False returns the block as it is in the terrain image, without scaling it up.
 
     Returns:
         pygame.Surface: A scaled pygame.Surface object representing the block.
     """
+    return cached_sprites(("block", size, scale), lambda: get_block_uncached(size, scale))
+
+def get_block_uncached(size, scale=True):
     script_dir = dirname(abspath(__file__)) # Get the directory of the current script
     path = join(script_dir, "assets", "Terrain", "Terrain.png") # Construct the path to the terrain image
-    image = pygame.image.load(path).convert_alpha() # Load the image and convert it to have per-pixel alpha transparency
+    image = load_image(path) # Load the image and convert it to have per-pixel alpha transparency
 
     surface = pygame.Surface((size, size), pygame.SRCALPHA, 32) # Create a new surface with the specified size and alpha transparency
     rect = pygame.Rect(96, 0, size, size) # Define the rectangle area to extract from the terrain image (the block)
 
     surface.blit(image, (0, 0), rect) # Blit (copy) the extracted block from the terrain image to the new surface
 
+    if not scale:
+        return surface
     return pygame.transform.scale2x(surface) # Scale the surface by 2x and return it
 
+_mask_cache = {}
+
+_run_cache = {}
+
+def shortest_run(mask, axis):
+    """The shortest run of set bits along an axis (0 for x, 1 for y) anywhere in a collision mask, at least 1."""
+    if isinstance(mask, TileMask):
+        return mask.shortest_run(axis)
+    run = _run_cache.get((mask, axis))
+    if run is None:
+        width, height = mask.get_size()
+        lines, length = (height, width) if axis == 0 else (width, height)
+        run = length
+        for line in range(lines):
+            current = 0
+            for i in range(length + 1):
+                if i < length and mask.get_at((i, line) if axis == 0 else (line, i)):
+                    current += 1
+                elif current:
+                    run = min(run, current)
+                    current = 0
+        run = _run_cache[(mask, axis)] = max(1, run)
+    return run
+
+def get_mask(surface):
+    """Return the collision mask for a sprite frame, computing it only the first time that frame is seen."""
+    mask = _mask_cache.get(surface)
+    if mask is None:
+        scaled = surface
+        if SPRITE_SCALE != 1: # a native-resolution sprite that keep_sprite() didn't register, so scale it up first
+            scaled = pygame.transform.scale(surface, sprite_rect(surface, (0, 0)).size)
+        mask = _mask_cache[surface] = pygame.mask.from_surface(scaled)
+    return mask
+
+def keep_sprite(scaled, native):
+    """
+    Return the surface to keep for a sprite: scaled, at its in-game size, or with NATIVE_RENDER the half-size native
+    one. Collisions always use the mask of the in-game sized image, so they come out the same in both modes.
+    """
+    if SPRITE_SCALE == 1:
+        return scaled
+    _mask_cache[native] = pygame.mask.from_surface(scaled)
+    return native
+
+def halve(surface):
+    """The native-resolution copy of a sprite that was scaled to its in-game size (only used with NATIVE_RENDER)."""
+    width, height = surface.get_size()
+    return pygame.transform.scale(surface, (width // SPRITE_SCALE, height // SPRITE_SCALE))
+
+def sprite_rect(surface, topleft):
+    """The in-game rect of a kept sprite placed at topleft."""
+    width, height = surface.get_size()
+    return pygame.Rect(topleft, (width * SPRITE_SCALE, height * SPRITE_SCALE))
+
 class Player(pygame.sprite.Sprite): 
     GRAVITY = 1
     SPRITES = load_sprite_sheets("MainCharacters", "Sen", 32, 32, True)
@@ -126,6 +397,7 @@ class Player(pygame.sprite.Sprite):
         self.y_vel = 0 
         self.mask = None
         self.direction = "left" 
+        self.sprite = self.SPRITES["idle_left"][0] # what to draw until the first loop() picks the sprite (e.g. entering a level)
         self.animation_count = 0 
         self.fall_count = 0 
         self.jump_count = 0
@@ -133,6 +405,8 @@ class Player(pygame.sprite.Sprite):
         self.hit_count = 0
         self.score = 0 # initialise the score
         self.fast_descent_triggered = False
+        self.previous_y = y # where the top of the player was before this frame's move, for swept collisions
+        self.contacts = ContactCache() # what the collision probes touched last frame
 
     def jump(self):
         self.y_vel = -self.GRAVITY * 8 # jump velocity, its negative so we go up, but within loop() we have gravity constantly applied to bring us down
@@ -195,6 +469,7 @@ class Player(pygame.sprite.Sprite):
         Call the "move" method to update the object's position based on its current velocity.
         """
         self.y_vel += min(1, (self.fall_count / fps) * self.GRAVITY) 
+        self.previous_y = self.rect.y
         self.move(self.x_vel, self.y_vel)
 
         if self.hit:
@@ -256,8 +531,8 @@ class Player(pygame.sprite.Sprite):
         Bound of our character is always adjusted based upon the sprite we are using
         Mask is mapping of all of the pixels that exist in the sprite, then allowing us to perform pixel perfect collision
         """
-        self.rect = self.sprite.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.sprite)
+        self.rect = sprite_rect(self.sprite, (self.rect.x, self.rect.y))
+        self.mask = get_mask(self.sprite)
 
     def draw(self, win, offset_x):
         win.blit(self.sprite, (self.rect.x - offset_x, self.rect.y))
@@ -268,6 +543,8 @@ class Object(pygame.sprite.Sprite):
         The __init__ method initializes the object's position, dimensions, and name.
         The draw method renders the object's sprite onto the game window.
         """
+        entity_store = None # the EntityStore advancing this object each frame, if any
+
         def __init__(self, x, y, width, height, name=None):
             super().__init__()
             self.rect = pygame.Rect(x, y, width, height)
@@ -280,16 +557,84 @@ class Object(pygame.sprite.Sprite):
             # Renders the player's sprite onto the game window
             win.blit(self.image, (self.rect.x - offset_x, self.rect.y))
 
-class Block(Object):
+class StaticKind:
+    """The flyweight shared by every static entity of one type: name, sprite, mask and (for fruit) collected sprite."""
+    __slots__ = ("name", "image", "mask", "collected_image", "fruit_name")
+
+    def __init__(self, name, image, mask, collected_image=None, fruit_name=None):
+        self.name = name
+        self.image = image
+        self.mask = mask
+        self.collected_image = collected_image
+        self.fruit_name = fruit_name
+
+_static_kinds = {} # (class name, its arguments) -> the StaticKind shared by every entity built with them
+_static_kind_sprites = {} # the same keys -> the cached_sprites() keys the kind was made from
+
+def static_kind(key, make):
+    """Return the StaticKind for key, calling make() to build it the first time the key is seen."""
+    kind = _static_kinds.get(key)
+    if kind is None:
+        with recording_sprites() as used:
+            kind = _static_kinds[key] = make()
+        _static_kind_sprites[key] = used
+    else:
+        for used in _sprite_recorders(): # the kind's sprites are part of any level recorded using it
+            used.update(_static_kind_sprites[key])
+    return kind
+
+class StaticEntity:
+    """Base class for blocks, spikes and fruit, which hold only their rect and StaticKind (no __dict__)."""
+    __slots__ = ("rect", "kind")
+    STATE = () # slots that change during play, saved and restored by GameSnapshot
+
+    def __init__(self, rect, kind):
+        self.rect = rect
+        self.kind = kind
+
+    @property
+    def image(self):
+        return self.kind.image
+
+    @property
+    def mask(self):
+        return self.kind.mask
+
+    @property
+    def name(self):
+        return self.kind.name
+
+    def draw(self, win, offset_x):
+        win.blit(self.image, (self.rect.x - offset_x, self.rect.y))
+
+def block_kind(size):
+    """The StaticKind of blocks of a given size, shared with moving platforms of that size."""
+    def load():
+        image = pygame.Surface((size, size), pygame.SRCALPHA)
+        image.blit(get_block(size), (0, 0))
+        if SPRITE_SCALE != 1:
+            native = pygame.Surface((size // SPRITE_SCALE, size // SPRITE_SCALE), pygame.SRCALPHA)
+            native.blit(get_block(size, scale=False), (0, 0))
+            image = keep_sprite(image, native)
+        return image
+
+    def make():
+        image = cached_sprites(("block_kind", size), load) # so a CompiledLevel saves its mask too
+        return StaticKind(None, image, get_mask(image))
+    return static_kind(("Block", size), make)
+
+class Block(StaticEntity):
+    __slots__ = ()
+
     def __init__(self, x, y, size):
-        super().__init__(x, y, size, size)
-        block = get_block(size)
-        self.image.blit(block, (0, 0))
-        self.mask = pygame.mask.from_surface(self.image)
+        super().__init__(pygame.Rect(x, y, size, size), block_kind(size))
 
-class MovingPlatform(Block):
+class MovingPlatform(Object):
     def __init__(self, x, y, size, move_range, speed, direction="horizontal"):
-        super().__init__(x, y, size)
+        super().__init__(x, y, size, size)
+        block = block_kind(size)
+        self.image = block.image
+        self.mask = block.mask
         self.start_x = x
         self.start_y = y
         self.move_range = move_range
@@ -322,29 +667,38 @@ class MovingPlatform(Block):
 
 class Fire(Object):
     ANIMATION_DELAY = 3
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, lit=False):
         super().__init__(x, y, width, height, "fire")
         self.fire = load_sprite_sheets("Traps", "Fire", width, height)
         self.image = self.fire["off"][0]
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = get_mask(self.image)
         self.animation_count = 0 
         self.animation_name = "off"
+        if lit:
+            self.on()
 
     def on(self):
         self.animation_name = "on"
+        if self.entity_store is not None:
+            self.entity_store.set_animation(self, restart=False)
     
     def off(self):
         self.animation_name = "off"
+        if self.entity_store is not None:
+            self.entity_store.set_animation(self, restart=False)
+
+    def animation_sprites(self):
+        return self.fire[self.animation_name]
 
     def loop(self):
-        sprites = self.fire[self.animation_name]
+        sprites = self.animation_sprites()
         sprite_index = (self.animation_count // 
                         self.ANIMATION_DELAY) % len(sprites)
         self.image = sprites[sprite_index]
         self.animation_count += 1
 
-        self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.image)
+        self.rect = sprite_rect(self.image, (self.rect.x, self.rect.y))
+        self.mask = get_mask(self.image)
 
         if self.animation_count // self.ANIMATION_DELAY > len(sprites):
             self.animation_count = 0
@@ -356,27 +710,34 @@ class SpikeHead(Object):
         super().__init__(x, y, width, height, "spike_head")
         self.spike_head = load_sprite_sheets("Traps", "Spike Head", width, height)
         self.image = self.spike_head["idle"][0]
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = get_mask(self.image)
         self.animation_count = 0
         self.animation_name = "idle"
     
     def hit(self):
         self.animation_name = "hit"
         self.animation_count = 0
+        if self.entity_store is not None:
+            self.entity_store.set_animation(self, restart=True)
+
+    def animation_sprites(self):
+        return self.spike_head[self.animation_name]
 
     def loop(self):
-        sprites = self.spike_head[self.animation_name]
+        sprites = self.animation_sprites()
         sprite_index = (self.animation_count // self.ANIMATION_DELAY) % len(sprites)
         self.image = sprites[sprite_index]
         self.animation_count += 1
 
-        self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.image)
+        self.rect = sprite_rect(self.image, (self.rect.x, self.rect.y))
+        self.mask = get_mask(self.image)
 
         if self.animation_count // self.ANIMATION_DELAY > len(sprites):
             self.animation_count = 0
 
-class Spikes(Object):
+class Spikes(StaticEntity):
+    __slots__ = ()
+
     def __init__(self, x, y, width=16, height=16):
         """
         Initialize the Spikes object.
@@ -387,20 +748,25 @@ class Spikes(Object):
             width (int): The width of the spike.
             height (int): The height of the spike.
         """
-        super().__init__(x, y, width, height, "spikes")
-        try:
-            script_dir = dirname(abspath(__file__))  # Get the directory of the current script
-            image_path = join(script_dir, "assets", "Traps", "Spikes", "Idle.png")  # Construct the path to the spike image
-            self.image = pygame.image.load(image_path).convert_alpha()  # Load the image and convert it to have per-pixel alpha transparency
-            self.image = pygame.transform.scale2x(self.image)  # Scale the image by 2
-            self.mask = pygame.mask.from_surface(self.image)
-        except pygame.error as e:
-            print(f"Error loading spike image {e}")
-
-    def loop(self):
-        pass
+        def make():
+            try:
+                script_dir = dirname(abspath(__file__))  # Get the directory of the current script
+                image_path = join(script_dir, "assets", "Traps", "Spikes", "Idle.png")  # Construct the path to the spike image
+
+                def load():
+                    image = load_image(image_path)  # Load the image and convert it to have per-pixel alpha transparency
+                    return keep_sprite(pygame.transform.scale2x(image), image)  # Scale the image by 2
+                image = cached_sprites(("spikes",), load)
+                return StaticKind("spikes", image, get_mask(image))
+            except pygame.error as e:
+                print(f"Error loading spike image {e}")
+                return StaticKind("spikes", pygame.Surface((width, height), pygame.SRCALPHA), None)
+        super().__init__(pygame.Rect(x, y, width, height), static_kind(("Spikes", width, height), make))
+
+class Fruit(StaticEntity):
+    __slots__ = ("collected",)
+    STATE = ("collected",)
 
-class Fruit(Object):
     def __init__(self, x, y, width, height, fruit_name, scale_factor=2):
         """
         Initialize the Fruit object.
@@ -413,26 +779,41 @@ class Fruit(Object):
             fruit_name (str): The name of the fruit (e.g., "Melon").
             scale_factor (int): The factor by which to scale the fruit image.
         """
-        super().__init__(x, y, width, height, "fruit")
-        self.fruit_name = fruit_name
-        try:
-            script_dir = dirname(abspath(__file__))  # Get the directory of the current script
-            image_path = join(script_dir, "assets", "Items", "Fruits", f"{fruit_name}.png")  # Construct the path to the fruit image
-            self.image = pygame.image.load(image_path).convert_alpha()  # Load the image and convert it to have per-pixel alpha transparency
-            self.image = pygame.transform.scale(self.image, (int(width * scale_factor), int(height * scale_factor)))  # Scale the image
+        def make():
+            size = (int(width * scale_factor), int(height * scale_factor))
+            try:
+                script_dir = dirname(abspath(__file__))  # Get the directory of the current script
+                image_path = join(script_dir, "assets", "Items", "Fruits", f"{fruit_name}.png")  # Construct the path to the fruit image
+
+                def load():
+                    image = load_image(image_path)  # Load the image and convert it to have per-pixel alpha transparency
+                    image = pygame.transform.scale(image, size)  # Scale the image
+                    return keep_sprite(image, halve(image) if SPRITE_SCALE != 1 else None)
+
+                def load_collected(): # the same for every fruit, so it is cached by size alone
+                    collected_image_path = join(script_dir, "assets", "Items", "Fruits", "Collected.png")
+                    collected_image = load_image(collected_image_path)
+                    collected_image = pygame.transform.scale(collected_image, size)  # Scale the collected image
+                    return keep_sprite(collected_image, halve(collected_image) if SPRITE_SCALE != 1 else None)
+                image = cached_sprites(("fruit", fruit_name, *size), load)
+                collected_image = cached_sprites(("fruit_collected", *size), load_collected)
+                return StaticKind("fruit", image, get_mask(image), collected_image, fruit_name)
+            except pygame.error as e:
+                print(f"Error loading fruit image {e}")
+                blank = pygame.Surface((width, height), pygame.SRCALPHA)
+                return StaticKind("fruit", blank, None, blank, fruit_name)
+        super().__init__(pygame.Rect(x, y, width, height), static_kind(("Fruit", fruit_name, width, height, scale_factor), make))
+        self.collected = False
 
-            # Load the collected image
-            collected_image_path = join(script_dir, "assets", "Items", "Fruits", "Collected.png")
-            self.collected_image = pygame.image.load(collected_image_path).convert_alpha()
-            self.collected_image = pygame.transform.scale(self.collected_image, (int(width * scale_factor), int(height * scale_factor)))  # Scale the collected image
+    @property
+    def image(self):
+        return self.kind.collected_image if self.collected else self.kind.image
 
-            self.mask = pygame.mask.from_surface(self.image)
-        except pygame.error as e:
-            print(f"Error loading fruit image {e}")
-        self.collected = False
+    @property
+    def fruit_name(self):
+        return self.kind.fruit_name
 
     def collect(self):
-        self.image = self.collected_image
         self.collected = True
 
 class Trampoline(Object):
@@ -441,8 +822,14 @@ class Trampoline(Object):
     def __init__(self, x, y, width=28, height=28):
         super().__init__(x, y, width * 2, height * 2, "trampoline")
         self.trampoline = load_sprite_sheets("Traps", "Trampoline", width, height)
-        self.image = pygame.transform.scale2x(self.trampoline["Idle"][0])
-        self.mask = pygame.mask.from_surface(self.image)
+
+        def load():
+            image = pygame.transform.scale2x(self.trampoline["Idle"][0])
+            if SPRITE_SCALE != 1: # the sheet frame is already native, so scaling it once gives the half-size image
+                image = keep_sprite(pygame.transform.scale2x(image), image)
+            return image
+        self.image = cached_sprites(("trampoline", width, height), load)
+        self.mask = get_mask(self.image)
         self.animation_count = 0
         self.animation_name = "Idle"
 
@@ -456,8 +843,8 @@ class Trampoline(Object):
         self.image = sprites[sprite_index]
         self.animation_count += 1
 
-        self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.image)
+        self.rect = sprite_rect(self.image, (self.rect.x, self.rect.y))
+        self.mask = get_mask(self.image)
 
         if self.animation_count // self.ANIMATION_DELAY > len(sprites):
             self.animation_name = "Idle"
@@ -478,10 +865,14 @@ class ExitDoor(pygame.sprite.Sprite):
         try:
             script_dir = dirname(abspath(__file__))  # Get the directory of the current script
             image_path = join(script_dir, "assets", "Items", "Checkpoints", "Level", "Exit_door.png")  # Construct the path to the exit door image
-            self.image = pygame.image.load(image_path).convert_alpha()  # Load the image and convert it to have per-pixel alpha transparency
-            self.image = pygame.transform.scale(self.image, (width * 3, height * 3))  # Scale the image
-            self.rect = self.image.get_rect(topleft=(x, y))
-            self.mask = pygame.mask.from_surface(self.image)
+
+            def load():
+                image = load_image(image_path)  # Load the image and convert it to have per-pixel alpha transparency
+                image = pygame.transform.scale(image, (width * 3, height * 3))  # Scale the image
+                return keep_sprite(image, halve(image) if SPRITE_SCALE != 1 else None)
+            self.image = cached_sprites(("exit_door", width, height), load)
+            self.rect = sprite_rect(self.image, (x, y))
+            self.mask = get_mask(self.image)
             self.name = "exit_door"  # Add the name attribute
         except pygame.error as e:
             print(f"Error loading exit door image: {e}")
@@ -496,7 +887,162 @@ class ExitDoor(pygame.sprite.Sprite):
         """
         window.blit(self.image, (self.rect.x - offset_x, self.rect.y))
 
-        
+
+# Objects that are advanced every frame, either by their own loop() or by an EntityStore
+ANIMATED_TYPES = (Fire, SpikeHead, MovingPlatform)
+
+# The folder under assets/ each type of level object loads its images from, so a LevelLoader can decode them ahead of time
+ASSET_DIRS = {
+    Block: "Terrain",
+    MovingPlatform: "Terrain",
+    Fire: join("Traps", "Fire"),
+    SpikeHead: join("Traps", "Spike Head"),
+    Spikes: join("Traps", "Spikes"),
+    Fruit: join("Items", "Fruits"),
+    Trampoline: join("Traps", "Trampoline"),
+    ExitDoor: join("Items", "Checkpoints", "Level"),
+}
+
+LEVEL_TYPES = {kind.__name__: kind for kind in ASSET_DIRS} # the types a level definition saved by CompiledLevel may name
+
+class EntityStore:
+    """
+    Advances moving platforms and animated traps together in NumPy arrays, writing back only those near the player.
+    The results are identical to calling loop() on each object.
+    """
+    NEAR = WIDTH // 4 # px either side of the player that sync_around() always syncs, far beyond what a collision reaches
+
+    def __init__(self, objects):
+        looped = [obj for obj in objects if isinstance(obj, ANIMATED_TYPES)]
+        platforms = [obj for obj in looped if isinstance(obj, MovingPlatform)
+                     and obj.direction in ("horizontal", "vertical") and obj.speed == int(obj.speed)]
+        animated = [obj for obj in looped if isinstance(obj, (Fire, SpikeHead))]
+        self.platforms = platforms
+        self.animated = animated
+        handled = set(platforms) | set(animated)
+        self.others = [obj for obj in looped if obj not in handled] # still loop() themselves
+
+        # Moving platforms: the coordinate along their axis of travel
+        self.vertical = np.array([obj.direction == "vertical" for obj in platforms], dtype=bool)
+        self.position = np.array([obj.rect.y if obj.direction == "vertical" else obj.rect.x for obj in platforms], dtype=np.int64)
+        self.start = np.array([obj.start_y if obj.direction == "vertical" else obj.start_x for obj in platforms], dtype=np.float64)
+        self.end = self.start + np.array([obj.move_range for obj in platforms], dtype=np.float64)
+        self.speed = np.array([obj.speed for obj in platforms], dtype=np.int64)
+        self.forward = np.array([obj.moving_forward for obj in platforms], dtype=bool)
+        self.platform_left = np.array([obj.rect.x for obj in platforms], dtype=np.int64)
+        self.platform_width = np.array([obj.rect.width for obj in platforms], dtype=np.int64)
+
+        # Animated traps: counters and the length of the animation each one is playing
+        self.count = np.array([obj.animation_count for obj in animated], dtype=np.int64)
+        self.delay = np.array([obj.ANIMATION_DELAY for obj in animated], dtype=np.int64)
+        self.length = np.array([len(obj.animation_sprites()) for obj in animated], dtype=np.int64)
+        self.frame = np.zeros(len(animated), dtype=np.int64)
+        self.trap_left = np.array([obj.rect.x for obj in animated], dtype=np.int64)
+        self.trap_right = np.array([obj.rect.right for obj in animated], dtype=np.int64)
+        self.slots = {obj: i for i, obj in enumerate(animated)}
+        self.frames = 0
+
+        for obj in platforms + animated:
+            obj.entity_store = self
+
+    def save_state(self):
+        return {name: value.copy() for name, value in vars(self).items() if isinstance(value, np.ndarray)}
+
+    def restore_state(self, state):
+        for name, value in state.items():
+            setattr(self, name, value.copy())
+
+    def set_animation(self, obj, restart):
+        """Called by a trap when it switches animation, e.g. Fire.on() or SpikeHead.hit()."""
+        i = self.slots[obj]
+        self.length[i] = len(obj.animation_sprites())
+        if restart:
+            self.count[i] = 0
+
+    def update(self):
+        """Advance every platform and trap by one frame."""
+        self.position += np.where(self.forward, self.speed, -self.speed)
+        self.forward = np.where(self.forward, self.position < self.end, self.position <= self.start)
+        self.platform_left = np.where(self.vertical, self.platform_left, self.position)
+
+        self.frame = (self.count // self.delay) % self.length
+        self.count += 1
+        wrapped = self.count // self.delay > self.length
+        self.count[wrapped] = 0
+
+        for obj in self.others:
+            obj.loop()
+        self.frames += 1
+
+    def sync_around(self, x, distant_interval=1, view_left=None):
+        """
+        Sync everything the camera could be showing around x. With a distant_interval above 1 only the entities on
+        screen (from view_left, or within NEAR px of x if the view isn't known) are synced every frame, the rest every
+        distant_interval frames.
+        """
+        if self.frames % distant_interval == 0:
+            self.sync(x - WIDTH, x + WIDTH)
+        elif view_left is None:
+            self.sync(x - self.NEAR, x + self.NEAR)
+        else:
+            self.sync(view_left, view_left + WIDTH)
+
+    def sync(self, left, right):
+        """Write the current state back to the sprites of every entity overlapping the x range [left, right]."""
+        near = (self.platform_left + self.platform_width >= left) & (self.platform_left <= right)
+        for i in np.flatnonzero(near):
+            obj = self.platforms[i]
+            if self.vertical[i]:
+                obj.rect.y = int(self.position[i])
+            else:
+                obj.rect.x = int(self.position[i])
+            obj.moving_forward = bool(self.forward[i])
+
+        near = (self.trap_right >= left) & (self.trap_left <= right)
+        for i in np.flatnonzero(near):
+            obj = self.animated[i]
+            obj.image = obj.animation_sprites()[self.frame[i]]
+            obj.rect = sprite_rect(obj.image, (obj.rect.x, obj.rect.y))
+            obj.mask = get_mask(obj.image)
+            obj.animation_count = int(self.count[i])
+
+def create_entity_store(objects):
+    """Return an EntityStore for the level's objects, or None to fall back to calling each object's loop()."""
+    if not USE_ENTITY_STORE or np is None:
+        return None
+    return EntityStore(objects)
+
+class GameSnapshot:
+    """
+    The state of a level at one moment, restored on "play again" instead of building the level again. Sprites and
+    masks are shared with the live objects; StaticEntity flyweights only save the slots named in their STATE.
+    """
+    def __init__(self, player, objects, store=None):
+        self.objects = list(objects)
+        self.states = [(entity, self._copy(vars(entity))) for entity in [player] + self.objects if hasattr(entity, "__dict__")]
+        self.slot_states = [(entity, {name: getattr(entity, name) for name in entity.STATE})
+                            for entity in self.objects if isinstance(entity, StaticEntity) and entity.STATE]
+        self.store_state = store.save_state() if store is not None else None
+
+    @staticmethod
+    def _copy(state):
+        # Rects are the only attributes changed in place (e.g. rect.x += speed), so they are the only ones copied
+        return {name: value.copy() if isinstance(value, pygame.Rect) else value for name, value in state.items()}
+
+    def restore(self, player, objects, store=None):
+        """Put the player, objects (in place, so other references to the list see it) and store back as they were."""
+        objects[:] = self.objects
+        for entity, state in self.states:
+            attributes = vars(entity)
+            attributes.clear()
+            attributes.update(self._copy(state))
+        for entity, state in self.slot_states:
+            for name, value in state.items():
+                setattr(entity, name, value)
+        player.contacts.clear()
+        if store is not None:
+            store.restore_state(self.store_state)
+
 """
 def get_player_name():
     name = ""
@@ -527,112 +1073,386 @@ def get_player_name():
 
     return name
 """   
-def get_background(name): 
+class ParallaxLayer:
     """
-    Load the background image from the "assets/Background" directory.
-    The join function is used to create a path that works across different operating systems.
-    get_rect() method returns a pygame.Rect object with the dimensions of the image. We extract the width and height of the tile.
-    The nested loops calculate how many tiles are needed to cover the screen width (WIDTH) and height (HEIGHT).
-    The + 1 ensures that the entire screen is covered, even if the screen dimensions are not perfectly divisible by the tile dimensions.
-    The pos variable stores the top-left corner position of each tile.
-    These positions are stored in the tiles list.
-    The function returns the tiles list (positions of all tiles) and the image (the tile image itself).
+    One layer of the scrolling background: scenery rendered once into a wrapping strip, drawn as at most two pieces.
+    factor is how fast it scrolls with the camera, from 0 (stays put) to 1 (moves with the level).
     """
-    script_dir = dirname(abspath(__file__)) # Get the directory of the current script
-    image_path = join(script_dir, "assets", "Background", name) # Construct the path to the image
-    image = pygame.image.load(image_path).convert() # Load the image
-    _, _, width, height = image.get_rect() # Get the dimensions of the image
-    tiles = [] # this will store the positions of the tiles
+    def __init__(self, strip, factor, y=0):
+        self.strip = strip # at SPRITE_SCALE, like the sprites, so it is drawn at the target's own resolution
+        self.factor = factor
+        self.y = y
+
+    def draw(self, target, offset_x):
+        width, height = self.strip.get_size()
+        view_width = WIDTH // SPRITE_SCALE
+        x = int(offset_x * self.factor) // SPRITE_SCALE % width
+        first = min(width - x, view_width)
+        target.blit(self.strip, (0, self.y), (x, 0, first, height))
+        if first < view_width: # the strip wrapped, fill the rest of the screen from its start
+            target.blit(self.strip, (first * SPRITE_SCALE, self.y), (0, 0, view_width - first, height))
+
+def strip_width(period):
+    """The narrowest strip that covers the screen and wraps around seamlessly for a pattern repeating every period pixels."""
+    view_width = WIDTH // SPRITE_SCALE
+    return -(-view_width // period) * period
+
+def tile_strip(name):
+    """Tile a background image from "assets/Background" over a strip the height of the screen."""
+    script_dir = dirname(abspath(__file__))
+    image = pygame.image.load(join(script_dir, "assets", "Background", name)).convert()
+    width, height = image.get_size()
+    strip = pygame.Surface((strip_width(width), HEIGHT // SPRITE_SCALE)).convert()
+    for x in range(0, strip.get_width(), width):
+        for y in range(0, strip.get_height(), height):
+            strip.blit(image, (x, y))
+    return strip
+
+def hills_strip(height, color, waves):
+    """
+    A row of hills along the bottom of a transparent strip. The skyline is a sum of sine waves given as
+    (cycles, amplitude, phase), each with a whole number of cycles across the strip so its ends meet.
+    """
+    width = strip_width(64)
+    strip = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+    skyline = [(0, height)]
+    for x in range(0, width + 1, 2):
+        top = height * 0.5 - sum(amplitude * height * math.sin(2 * math.pi * cycles * x / width + phase)
+                                 for cycles, amplitude, phase in waves)
+        skyline.append((x, int(top)))
+    skyline.append((width, height))
+    pygame.draw.polygon(strip, color, skyline)
+    return strip
+
+def create_background(name):
+    """The parallax background, back to front: the tiled background image, then two rows of hills."""
+    height = HEIGHT // SPRITE_SCALE
+    far = hills_strip(height // 2, (150, 196, 240), [(2, 0.18, 0.0), (5, 0.08, 1.3), (11, 0.03, 0.4)])
+    near = hills_strip(height // 3, (118, 176, 226), [(3, 0.2, 2.1), (7, 0.1, 0.2), (13, 0.04, 1.7)])
+    return [
+        ParallaxLayer(tile_strip(name), 0.1),
+        ParallaxLayer(far, 0.3, HEIGHT - far.get_height() * SPRITE_SCALE),
+        ParallaxLayer(near, 0.55, HEIGHT - near.get_height() * SPRITE_SCALE),
+    ]
 
-    for i in range(WIDTH // width + 1): 
-        # Uppercase is dimension of screen, lowercase is dimension of tile
-        # This will calculate how many tiles are needed to file the screen in width and height
-        for j in range(HEIGHT // height + 1):
-            pos = (i * width, j * height) # denotes position of top left hand corner of current tile added to the list
-            tiles.append(pos)
+EFFECT_COLLECTED, EFFECT_SPARK, EFFECT_DUST = range(3)
 
-    return tiles, image # know what image to use when drawing the tiles
+def burst(count, speed, first_angle, last_angle):
+    """Velocities of count particles fanned out evenly between two angles (degrees, 0 = right, 90 = up)."""
+    angles = np.radians(np.linspace(first_angle, last_angle, count))
+    return np.cos(angles) * speed, -np.sin(angles) * speed
 
-def draw(window, background, bg_image, player, objects, offset_x):
+def load_effect_sprites():
+    """
+    The frames of each kind of effect, shared by every effect of that kind: the fruit pickup animation from
+    Collected.png, and small generated squares that fade out for hit sparks and trampoline dust.
     """
-    The blit method is used to draw the bg_image onto the window at the position specified by tile.
-    tile is a tuple containing the x and y coordinates of the top-left corner of the tile (e.g., [x, y]).
-    The for tile in background loop iterates through all the tile positions stored in the background list.
-    This ensures that the entire screen is covered with the background image.
-    Updates the display to show the changes blit calls
+    path = join(assets_dir, "Items", "Fruits", "Collected.png")
+    sheet = pygame.image.load(path).convert_alpha()
+    collected = []
+    for i in range(sheet.get_width() // 32):
+        frame = pygame.Surface((32, 32), pygame.SRCALPHA)
+        frame.blit(sheet, (0, 0), pygame.Rect(i * 32, 0, 32, 32))
+        collected.append(keep_sprite(pygame.transform.scale2x(frame), frame))
+
+    def fading(color, size):
+        frames = []
+        for alpha in (255, 192, 128, 64):
+            frame = pygame.Surface((size, size), pygame.SRCALPHA)
+            frame.fill((*color, alpha))
+            frames.append(keep_sprite(pygame.transform.scale2x(frame), frame))
+        return frames
+
+    return {EFFECT_COLLECTED: collected, EFFECT_SPARK: fading((255, 120, 60), 3), EFFECT_DUST: fading((235, 235, 220), 4)}
+
+class EffectPool:
+    """
+    Short-lived visual effects (fruit pickups, hit sparks, trampoline dust) in fixed-size NumPy arrays, so spawning
+    and advancing them never allocates. When the pool is full new effects replace the oldest.
+    """
+    LIFETIME = {EFFECT_COLLECTED: 18, EFFECT_SPARK: 24, EFFECT_DUST: 20} # frames
+    GRAVITY = {EFFECT_COLLECTED: 0.0, EFFECT_SPARK: 0.4, EFFECT_DUST: -0.05}
+
+    def __init__(self, capacity=EFFECT_CAPACITY):
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.gravity = np.zeros(capacity)
+        self.age = np.zeros(capacity, dtype=np.int64)
+        self.lifetime = np.zeros(capacity, dtype=np.int64) # age >= lifetime means the slot is free
+        self.kind = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.next_slot = 0
+        self.sprites = load_effect_sprites()
+        self.frame_count = np.array([len(self.sprites[kind]) for kind in sorted(self.sprites)], dtype=np.int64)
+        self.spark_velocity = burst(8, 4.0, 0, 315)
+        self.dust_velocity = burst(6, 2.0, 20, 160)
+
+    def spawn(self, kind, x, y, vx=0.0, vy=0.0):
+        """Start effects of one kind at (x, y); vx and vy may be arrays to start a burst of several at once."""
+        count = np.size(vx)
+        slots = (self.next_slot + np.arange(count)) % self.capacity
+        self.next_slot = int((self.next_slot + count) % self.capacity)
+        self.x[slots] = x
+        self.y[slots] = y
+        self.vx[slots] = vx
+        self.vy[slots] = vy
+        self.gravity[slots] = self.GRAVITY[kind]
+        self.age[slots] = 0
+        self.lifetime[slots] = self.LIFETIME[kind]
+        self.kind[slots] = kind
+
+    def collected(self, fruit):
+        self.spawn(EFFECT_COLLECTED, fruit.rect.x, fruit.rect.y)
+
+    def hit(self, player):
+        self.spawn(EFFECT_SPARK, player.rect.centerx, player.rect.centery, *self.spark_velocity)
+
+    def bounce(self, trampoline):
+        self.spawn(EFFECT_DUST, trampoline.rect.centerx, trampoline.rect.top + trampoline.rect.height // 2, *self.dust_velocity)
+
+    def update(self):
+        """Advance every effect by one frame."""
+        self.x += self.vx
+        self.y += self.vy
+        self.vy += self.gravity
+        np.less(self.age, self.lifetime, out=self.alive)
+        np.add(self.age, 1, out=self.age, where=self.alive)
 
+    def clear(self):
+        self.lifetime[:] = 0
+
+    def draw(self, win, offset_x):
+        np.less(self.age, self.lifetime, out=self.alive)
+        for i in np.flatnonzero(self.alive):
+            frames = self.sprites[self.kind[i]]
+            frame = frames[self.age[i] * len(frames) // self.lifetime[i]]
+            win.blit(frame, (self.x[i] - offset_x, self.y[i]))
+
+def create_effect_pool():
+    """Return an EffectPool, or None (no effects) without NumPy."""
+    return EffectPool() if np is not None else None
+
+def draw(window, background, player, objects, offset_x, effects=None):
     """
-    window.fill((0, 0, 0)) # Clear the screen with a black color (or any other background color)
+    Draw one frame: the background layers (see create_background), the level, the player and any effects.
+    With NATIVE_RENDER it is all drawn at half size and scaled up to the window at the end.
+    """
+    target = window if native_frame is None else native_frame # with NATIVE_RENDER the world is drawn at half size, then scaled up
 
-    for tile in background:
-        window.blit(bg_image, tile)
+    for layer in background: # the back layer covers the whole screen, so there's no need to clear it first
+        layer.draw(target, offset_x)
 
     for obj in objects:
-        obj.draw(window, offset_x)
+        obj.draw(target, offset_x)
     
     if player is not None:
-        player.draw(window, offset_x)
+        player.draw(target, offset_x)
 
-def draw_score(window, score):
-    font = pygame.font.SysFont(None, 72)
-    score_text = font.render(f"{score:03}", True, (189, 77, 87))  # Render the score in red
-    score_rect = score_text.get_rect(topleft=(10, 10))
-    window.blit(score_text, score_rect)
+    if effects is not None:
+        effects.draw(target, offset_x)
 
-def handle_vertical_collision(player, objects, dy):
+    if native_frame is not None:
+        native_frame.upscale(window)
+
+class ScoreText:
     """
-    Handles if objects collide with the player vertically
+    The score in the top left corner. The font is loaded once and the text is only rendered again when the score
+    changes, and then at most every interval frames (FrameGovernor raises it under load), instead of every frame.
     """
-    collided_objects = []
-
+    COLOR = (189, 77, 87) # red
+
+    def __init__(self):
+        self.font = None
+        self.score = None
+        self.image = None
+        self.age = 0 # frames since the text was last rendered
+
+    def draw(self, window, score, interval=1):
+        self.age += 1
+        if score != self.score and (self.image is None or self.age >= interval):
+            if self.font is None:
+                self.font = pygame.font.SysFont(None, 72)
+            self.image = self.font.render(f"{score:03}", True, self.COLOR)
+            self.score = score
+            self.age = 0
+        window.blit(self.image, (10, 10))
+
+score_text = ScoreText()
+
+def draw_score(window, score, interval=1):
+    score_text.draw(window, score, interval)
+
+def scroll(player, offset_x, scroll_area_width=200):
+    """Return the camera offset for this frame: it follows the player once they get within scroll_area_width px of either edge."""
+    if ((player.rect.right - offset_x >= WIDTH - scroll_area_width) and player.x_vel > 0) or (
+        (player.rect.left - offset_x <= scroll_area_width) and player.x_vel < 0):
+        offset_x += player.x_vel
+    return offset_x
+
+def sweep(player, objects, dx, dy):
+    """
+    Sweep the player's rect by (dx, dy) along one axis and return every object it would touch, nearest first, as
+    (distance, obj) pairs. With MASK_NARROW_PHASE on, a rect hit also needs the pixel masks to overlap.
+    """
+    rect = player.rect
+    swept = rect.union(rect.move(dx, dy))
+    axis = 0 if dx else 1
+    travel = dx or dy
+    start = rect.x if axis == 0 else rect.y
+    size = rect.width if axis == 0 else rect.height
+
+    hits = []
     for obj in objects:
-        if pygame.sprite.collide_mask(player, obj):  # determines if 2 obj are colliding
-            if dy > 0:
-                player.rect.bottom = obj.rect.top  # if moving down on the screen then you will be colliding with top of object, so we take top of rect (essentially the characters feet) and make it equal to the top of the object colliding with 
-                player.landed()
-            elif dy < 0:
-                player.rect.top = obj.rect.bottom  # if moving up on the screen then you will be colliding with bottom of object, so we take bottom of rect (essentially the characters head) and make it equal to the bottom of the object colliding with
-                player.hit_head()
-                player.y_vel = 0  # Set vertical velocity to zero to prevent sticking
-
-            collided_objects.append(obj)
-    return collided_objects  # we want to know what objects we have collided with so we can alter effects (e.g., if collide with fire etc.)
+        other = obj.rect
+        if not swept.colliderect(other):
+            continue
+        low, high = (other.left, other.right) if axis == 0 else (other.top, other.bottom)
+
+        # Range of player positions along the axis where the rects overlap, clamped to the sweep
+        first = max(low - size + 1, min(start, start + travel))
+        last = min(high - 1, max(start, start + travel))
+        if travel >= 0:
+            distance = max(0, first - start)
+            near, far, direction = first, last, 1
+        else:
+            distance = max(0, start - last)
+            near, far, direction = last, first, -1
+
+        if MASK_NARROW_PHASE and obj.mask is not None and player.mask is not None:
+            step = min(shortest_run(obj.mask, axis), shortest_run(player.mask, axis)) # so no thin ledge is stepped over
+            touching = False
+            for position in (*range(int(near), int(far), step * direction), far): # nearest first, and always the far end
+                offset = (position - other.x, rect.y - other.y) if axis == 0 else (rect.x - other.x, position - other.y)
+                if obj.mask.overlap(player.mask, offset) is not None:
+                    touching = True
+                    break
+            if not touching:
+                continue
+        hits.append((distance, obj))
 
-def collide(player, objects, dx):
-    player.move(dx, 0) # checks if current vel would they hit a block
-    player.update()
-    collided_object = None
-    for obj in objects:
-        if pygame.sprite.collide_mask(player, obj):
-            collided_object = obj
-            break
+    hits.sort(key=lambda hit: hit[0])
+    return hits
 
-    player.move(-dx, 0) # move the character back
-    player.update()
-    return collided_object
-          
-def handle_move(player, objects):
+class ContactCache:
     """
-    This function is responsible for handling player movement based on keyboard input.
+    Reuses last frame's collision probes while nothing that could change them has happened: the player hasn't moved
+    or changed sprite, nothing was removed, and nothing near the player moved or changed frame.
     """
-    keys = pygame.key.get_pressed()
+    MARGIN = int(PLAYER_VEL * 2) + 2 # how far the horizontal probes reach, plus a pixel either side
+
+    def __init__(self):
+        self.objects = None
+        self.movable = []
+        self.key = None
+        self.contacts = None
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.key = None
+        self.contacts = None
+
+    def _key(self, player, objects):
+        if objects is not self.objects: # a new level, so find the things that can move
+            self.objects = objects
+            self.movable = [obj for obj in objects if isinstance(obj, ANIMATED_TYPES + (Trampoline,))]
+            self.clear()
+
+        rect = player.rect
+        travelled = rect.y - player.previous_y
+        reach = rect.inflate(2 * self.MARGIN, 2 * abs(travelled) + 2)
+        nearby = tuple((obj, tuple(obj.rect), obj.mask) for obj in self.movable if reach.colliderect(obj.rect))
+        return (tuple(rect), player.previous_y, player.mask, len(objects), nearby)
+
+    def lookup(self, player, objects):
+        """Return last frame's (left, right, vertical hits) if they still hold, otherwise None."""
+        key = self._key(player, objects)
+        if key == self.key:
+            self.hits += 1
+            return self.contacts
+        self.misses += 1
+        self.key = key
+        self.contacts = None
+        return None
+
+    def store(self, contacts):
+        self.contacts = contacts
+
+def vertical_contacts(player, objects):
+    """
+    Sweep the whole of this frame's vertical move (from where the player was before Player.loop() moved them),
+    so fast falls and trampoline launches stop at the first thing in the way instead of passing through thin platforms.
+    """
+    travelled = player.rect.y - player.previous_y
+    player.rect.y = player.previous_y
+    hits = sweep(player, objects, 0, travelled)
+    player.rect.y += travelled
+    return hits
 
-    player.x_vel = 0 # so only moves when pressing key
-    collide_left = collide(player, objects, -PLAYER_VEL * 2) # checks if we are colliding with anything when moving left
-    collide_right = collide(player, objects, PLAYER_VEL * 2) # checks if we are colliding with anything when moving right
+def handle_vertical_collision(player, objects, dy, hits=None):
+    """
+    Handles if objects collide with the player vertically, using the hits from vertical_contacts()
+    (swept now unless they're passed in).
+    """
+    if hits is None:
+        hits = vertical_contacts(player, objects)
+
+    if not hits:
+        return []
+
+    solid_hits = [hit for hit in hits if hit[1].name not in NON_SOLID]
+    if not solid_hits: # only fruit or the door in the way, so keep moving and touch all of it
+        return [obj for hit_distance, obj in hits]
+
+    distance, first = solid_hits[0]
+    if dy > 0:
+        player.rect.bottom = first.rect.top  # if moving down on the screen then you will be colliding with top of object, so we take top of rect (essentially the characters feet) and make it equal to the top of the object colliding with 
+        player.landed()
+    elif dy < 0:
+        player.rect.top = first.rect.bottom  # if moving up on the screen then you will be colliding with bottom of object, so we take bottom of rect (essentially the characters head) and make it equal to the bottom of the object colliding with
+        player.hit_head()
+        player.y_vel = 0  # Set vertical velocity to zero to prevent sticking
 
-    if keys[pygame.K_LEFT] and not collide_left:
+    # Everything reached by the time the player stops counts (e.g. landing across two blocks, or fruit on the way)
+    return [obj for hit_distance, obj in hits if hit_distance <= distance]  # we want to know what objects we have collided with so we can alter effects (e.g., if collide with fire etc.)
+
+def collide(player, objects, dx):
+    """Return the nearest object the player would touch moving dx horizontally, or None (checks if current vel would they hit a block)"""
+    hits = sweep(player, objects, dx, 0)
+    return hits[0][1] if hits else None
+          
+def handle_move(player, objects, inputs, effects=None):
+    """
+    This function is responsible for handling player movement based on this frame's input bits (see read_input()).
+    If an EffectPool is given, pickups, hits and trampoline bounces start their effects in it.
+    """
+    player.x_vel = 0 # so only moves when pressing key
+    contacts = player.contacts.lookup(player, objects) if USE_CONTACT_CACHE else None
+    if contacts is None:
+        contacts = (collide(player, objects, -PLAYER_VEL * 2), # checks if we are colliding with anything when moving left
+                    collide(player, objects, PLAYER_VEL * 2), # checks if we are colliding with anything when moving right
+                    vertical_contacts(player, objects))
+        if USE_CONTACT_CACHE:
+            player.contacts.store(contacts)
+    collide_left, collide_right, vertical_hits = contacts
+
+    if inputs & INPUT_LEFT and not collide_left:
         player.move_left(PLAYER_VEL)
-    if keys[pygame.K_RIGHT] and not collide_right:
+    if inputs & INPUT_RIGHT and not collide_right:
         player.move_right(PLAYER_VEL)
-    if keys[pygame.K_DOWN]:
+    if inputs & INPUT_DOWN:
         player.fast_descent()
     else:
         player.fast_descent_triggered = False
 
-    vertical_collide = handle_vertical_collision(player, objects, player.y_vel)
+    vertical_collide = handle_vertical_collision(player, objects, player.y_vel, vertical_hits)
     to_check = [collide_left, collide_right, *vertical_collide]
     for obj in to_check:
+        if effects is not None and obj and obj.name in ("fire", "spike_head", "spikes") and not player.hit:
+            effects.hit(player) # only when the hit starts, not on every frame of touching the trap
         if obj and obj.name == "fire":
             player.make_hit()
             hit_sound.play()
@@ -648,10 +1468,14 @@ def handle_move(player, objects):
             player.collect_fruit(points)
             obj.collect()
             objects.remove(obj)
+            if effects is not None:
+                effects.collected(obj)
             fruit_sound.play() 
         if obj and obj.name == "trampoline":
             obj.activate()
             player.y_vel = -player.GRAVITY * 12  # Increase jump velocity
+            if effects is not None:
+                effects.bounce(obj)
             trampoline_sound.play()
         if obj and obj.name == "exit_door":
             player.score += 100
@@ -660,20 +1484,292 @@ def handle_move(player, objects):
         
     return False  # Indicate that the player has not reached the exit door
 
+def read_input(events):
+    """
+    Pack the keyboard state for this frame into input bits.
+    Held keys come from pygame.key.get_pressed(), the jump comes from a SPACE key press among this frame's events.
+    """
+    keys = pygame.key.get_pressed()
+    inputs = 0
+    if keys[pygame.K_LEFT]:
+        inputs |= INPUT_LEFT
+    if keys[pygame.K_RIGHT]:
+        inputs |= INPUT_RIGHT
+    if keys[pygame.K_DOWN]:
+        inputs |= INPUT_DOWN
+    for event in events:
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            inputs |= INPUT_JUMP
+    return inputs
+
+class FramePacer:
+    """
+    Paces the game loop at FPS. low_latency is an experimental, unproven order that sleeps before sampling the input;
+    measure times each key event to the screen (see tools/sens_adventure_latency.py).
+    """
+    LATENCY_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_SPACE)
+    MARGIN = 0.001 # seconds added to the work estimate
+
+    def __init__(self, fps=FPS, low_latency=LOW_LATENCY, measure=LATENCY_PROBE):
+        self.fps = fps
+        self.frame_time = 1 / fps
+        self.low_latency = low_latency
+        self.measure = measure
+        self.clock = pygame.time.Clock()
+        self.work_times = deque(maxlen=fps) # seconds from sampling the input to starting to present, for the last second
+        self.latencies = [] # seconds from each key event arriving to the frame that read it being presented
+        self.reset()
+
+    def reset(self):
+        """Start pacing afresh, e.g. after the loop was paused for a message."""
+        self.sample_time = None # when the frame in progress read its input
+        self.due = None # when the next frame should be presented (low_latency)
+        self.pending = [] # arrival times of the key events read by the frame in progress
+        self.early = [] # events polled after a frame was presented, handed to the next one
+
+    def work_estimate(self):
+        return (max(self.work_times) if self.work_times else self.frame_time / 4) + self.MARGIN
+
+    def wait(self):
+        """Sleep until it is time to start the next frame and return the events it should handle."""
+        now = time.perf_counter()
+        if self.low_latency:
+            if self.due is None or self.due < now: # first frame, or running late: present as soon as the work is done
+                self.due = now + self.work_estimate()
+            start = self.due - self.work_estimate()
+        elif self.measure:
+            start = now if self.sample_time is None else max(now, self.sample_time + self.frame_time) # what clock.tick() would wait for
+        else:
+            self.clock.tick(self.fps)
+            self.sample_time = time.perf_counter()
+            return pygame.event.get()
+
+        events = self.early
+        self.early = []
+        while True:
+            events += self.poll()
+            remaining = start - time.perf_counter()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 0.001) if self.measure else remaining)
+        self.sample_time = time.perf_counter()
+        return events
+
+    def poll(self):
+        events = pygame.event.get()
+        if self.measure:
+            now = time.perf_counter()
+            self.pending += [getattr(event, "sent_at", now) for event in events
+                             if event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key in self.LATENCY_KEYS]
+        return events
+
+    def present(self, window):
+        """Present the frame (see update_display()) and schedule the next one."""
+        self.work_times.append(time.perf_counter() - self.sample_time) # not counting any wait for the refresh
+        update_display(window)
+        now = time.perf_counter()
+        if self.low_latency:
+            # A present that waited for the display's refresh finished late: line the next frame up with that refresh
+            self.due = max(self.due, now) + self.frame_time
+        if self.measure:
+            self.latencies += [now - arrived for arrived in self.pending]
+            self.pending = []
+            self.early = self.poll() # stamp what arrived during the work now rather than after the next sleep
+
+def report_latency(name, latencies):
+    """Print the distribution of input-to-display latencies (in seconds)."""
+    if not latencies:
+        print(f"{name}: no key events")
+        return
+    ordered = sorted(latencies)
+    print(f"{name}: {len(ordered)} key events, mean {1000 * sum(ordered) / len(ordered):.2f} ms  "
+          f"median {1000 * ordered[len(ordered) // 2]:.2f} ms  p95 {1000 * ordered[int(len(ordered) * 0.95)]:.2f} ms  "
+          f"p99 {1000 * ordered[int(len(ordered) * 0.99)]:.2f} ms  worst {1000 * ordered[-1]:.2f} ms")
+
+class FrameGovernor:
+    """
+    Holds a steady FPS on a weak cabinet by stepping down through LEVELS of optional work while frames overrun, and
+    back up once they have HEADROOM. A step up undone within RELAPSE seconds doubles the wait before the next one.
+    """
+    # name, frames between syncs of traps off screen, frames between score re-renders, parallax hills, effects
+    LEVELS = (
+        ("full detail", 1, 1, True, True),
+        ("off-screen traps synced at quarter rate", 4, 1, True, True),
+        ("score redrawn 4 times a second", 4, FPS // 4, True, True),
+        ("no parallax hills", 4, FPS // 4, False, True),
+        ("no effects", 4, FPS // 4, False, False),
+    )
+    OVERLOAD = 0.85
+    HEADROOM = 0.5
+    RELAPSE = 3 # seconds
+    MAX_WAIT = 60 # seconds, the longest it waits before trying a step up
+
+    def __init__(self, fps=FPS, quality=QUALITY):
+        self.fps = fps
+        self.frame_time = 1 / fps
+        self.auto = quality == "auto"
+        self.work_times = deque(maxlen=2 * fps) # seconds of work per frame since the last change
+        self.frames = 0 # frames since the last change
+        self.up_wait = 2 * fps # frames to wait at a level before trying the one above
+        self.stepped_up = False # the last change was a step up
+        self.set_level(0 if self.auto else min(max(int(quality), 0), len(self.LEVELS) - 1))
+
+    def set_level(self, level):
+        self.level = level
+        self.name, self.distant_interval, self.hud_interval, self.parallax, self.effects = self.LEVELS[level]
+        self.work_times.clear()
+        self.frames = 0
+
+    def record(self, work_time):
+        """Add a frame's work time in seconds. Returns True if that changed the level."""
+        if not self.auto:
+            return False
+        self.work_times.append(work_time)
+        self.frames += 1
+        recent = list(self.work_times)[-(self.fps // 2):]
+        mean = sum(recent) / len(recent)
+        typical = sorted(self.work_times)[int(len(self.work_times) * 0.95)] if self.frames >= self.up_wait else None
+        if self.frames >= self.fps // 2 and mean > self.OVERLOAD * self.frame_time and self.level + 1 < len(self.LEVELS):
+            if self.stepped_up and self.frames < self.RELAPSE * self.fps:
+                self.up_wait = min(2 * self.up_wait, self.MAX_WAIT * self.fps)
+            self.stepped_up = False
+            reason = f"{1000 * mean:.1f} ms of work per frame"
+        elif self.level > 0 and typical is not None and typical < self.HEADROOM * self.frame_time:
+            self.stepped_up = True
+            reason = f"95% of frames under {1000 * typical:.1f} ms"
+        else:
+            return False
+        level = self.level + (-1 if self.stepped_up else 1)
+        print(f"Frame governor: {reason} of a {1000 * self.frame_time:.1f} ms frame, "
+              f"{'up' if self.stepped_up else 'down'} to level {level} ({self.LEVELS[level][0]})")
+        self.set_level(level)
+        return True
+
+def step(player, objects, inputs, store=None, effects=None, distant_interval=1, view_left=None):
+    """
+    Advance the game by one frame using the given input bits, without reading the keyboard, drawing or waiting.
+    view_left is the camera's offset_x, if there is one. Returns OUTCOME_DEAD or OUTCOME_EXIT if this frame ended
+    the run, otherwise None.
+    """
+    if inputs & INPUT_JUMP and player.jump_count < 2:
+        player.jump()
+
+    player.loop(FPS)
+    if store is not None:
+        store.update()
+        store.sync_around(player.rect.centerx, distant_interval, view_left)
+    else:
+        for obj in objects:
+            if isinstance(obj, ANIMATED_TYPES):
+                obj.loop()
+
+    if effects is not None:
+        effects.update()
+
+    reached_exit = handle_move(player, objects, inputs, effects)
+
+    # Check if the player falls off the screen
+    if player.rect.top > HEIGHT:
+        player.score = -1000
+        return OUTCOME_DEAD
+    if reached_exit:
+        return OUTCOME_EXIT
+    return None
+
+def campaign_hash():
+    """
+    Fingerprint the layout of every level in the campaign (object types, positions and settings, from the level
+    definitions) so a replay can't be checked against different levels.
+    """
+    digest = hashlib.sha256()
+    for level in LEVELS:
+        for kind, *args in level():
+            digest.update(repr((kind.__name__, args)).encode())
+    return digest.digest()[:16]
+
+class Replay:
+    """
+    The inputs of one session, two frames to a byte and zlib-compressed on save, and the frames it restarted on.
+    With the seed and level hash this is everything needed to re-run the session and check its score.
+    """
+    MAGIC = b"SENR"
+    VERSION = 5 # bump whenever step() changes behaviour, older replays no longer play back the same
+    HEADER = struct.Struct("<4sBI16sIi") # magic, version, seed, level hash, frame count, final score
+    RESTARTS = struct.Struct("<H") # number of restarts, followed by the frame index of each as a uint32
+
+    def __init__(self, seed, level_hash, player_name="", score=0, frames=None, restarts=None):
+        self.seed = seed
+        self.level_hash = level_hash
+        self.player_name = player_name
+        self.score = score
+        self.frames = frames if frames is not None else bytearray() # one byte of input bits per frame while recording
+        self.restarts = restarts if restarts is not None else [] # the level was restored to its start before these frames
+
+    def record(self, inputs):
+        self.frames.append(inputs)
+
+    def restart(self):
+        self.restarts.append(len(self.frames))
+
+    def pack_frames(self):
+        packed = bytearray((len(self.frames) + 1) // 2)
+        for i, inputs in enumerate(self.frames):
+            packed[i // 2] |= inputs << (4 * (i % 2))
+        return zlib.compress(bytes(packed), 9)
+
+    def save(self, path):
+        name = self.player_name.encode("utf-8")[:255]
+        with open(path, "wb") as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.seed, self.level_hash, len(self.frames), self.score))
+            file.write(bytes([len(name)]) + name)
+            file.write(self.RESTARTS.pack(len(self.restarts)) + struct.pack(f"<{len(self.restarts)}I", *self.restarts))
+            file.write(self.pack_frames())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, seed, level_hash, frame_count, score = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError(f"{path} is not a version {cls.VERSION} Sen's Adventure replay")
+        offset = cls.HEADER.size
+        name_length = data[offset]
+        player_name = data[offset + 1:offset + 1 + name_length].decode("utf-8", errors="replace")
+        offset += 1 + name_length
+        restart_count, = cls.RESTARTS.unpack_from(data, offset)
+        offset += cls.RESTARTS.size
+        restarts = list(struct.unpack_from(f"<{restart_count}I", data, offset))
+        packed = zlib.decompress(data[offset + 4 * restart_count:])
+        frames = bytearray((packed[i // 2] >> (4 * (i % 2))) & 0xF for i in range(frame_count))
+        return cls(seed, level_hash, player_name, score, frames, restarts)
+
+def save_replay(replay, player_name, score):
+    """Write a finished session to the replays folder so its score can be verified later."""
+    replay.player_name = player_name
+    replay.score = score
+    os.makedirs(replays_dir, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() else "_" for c in player_name) or "Player"
+    path = join(replays_dir, f"{safe_name}_{time.strftime('%Y%m%d_%H%M%S')}.replay")
+    try:
+        replay.save(path)
+    except OSError as e:
+        print(f"Error saving replay {e}")
+    return path
+
 def draw_overlay(window, alpha=128):
     overlay = pygame.Surface((WIDTH, HEIGHT))  # Create a surface with the same size as the window
     overlay.set_alpha(alpha)  # Set the alpha value (0 is fully transparent, 255 is fully opaque)
     overlay.fill((0, 0, 0))  # Fill the surface with black color
     window.blit(overlay, (0, 0))  # Draw the overlay on the window
 
-def draw_welcome_screen(window, background, bg_image):
-    draw(window, background, bg_image, None, [], 0)  # Draw the game background
+def draw_welcome_screen(window, background):
+    draw(window, background, None, [], 0)  # Draw the game background
     draw_overlay(window, alpha=128)  # Draw a semi-transparent overlay with 50% opacity
     font = pygame.font.SysFont(None, 72)
     welcome_text = font.render("Welcome to Sen's Adventures", True, (189, 77, 87))
     welcome_rect = welcome_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
     window.blit(welcome_text, welcome_rect)
-    pygame.display.update()
+    update_display(window)
 
 def draw_death_message(window):
     draw_overlay(window, alpha=128)  # Draw a semi-transparent overlay with 50% opacity
@@ -681,10 +1777,10 @@ def draw_death_message(window):
     death_text = font.render("You have crossed the Rainbow Bridge", True, (189, 77, 87))
     death_rect = death_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
     window.blit(death_text, death_rect)
-    pygame.display.update()
+    update_display(window)
     pygame.time.delay(2000)  # Pause for 5 seconds before closing the game.
     window.fill((0, 0, 0))  # Clear the screen
-    pygame.display.update()
+    update_display(window)
 
 def draw_play_again_message(window):
     window.fill((0, 0, 0))  # Clear the screen
@@ -693,7 +1789,7 @@ def draw_play_again_message(window):
     play_again_text = font.render("Do you want to play again? (Y/N)", True, (189, 77, 87))
     play_again_rect = play_again_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
     window.blit(play_again_text, play_again_rect)
-    pygame.display.update()
+    update_display(window)
 
 def draw_final_score(window, score):
     draw_overlay(window, alpha=128)  # Draw a semi-transparent overlay with 50% opacity
@@ -701,145 +1797,696 @@ def draw_final_score(window, score):
     score_text = font.render(f"Final Score: {score:03}", True, (189, 77, 87))
     score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
     window.blit(score_text, score_rect)
-    pygame.display.update()
+    update_display(window)
 
-def create_level():
+def level_1():
+    """
+    The first level's layout: a (type, *arguments) entry for every object, constructed in this order by build_level().
+    Levels are kept as data like this so a LevelLoader can read one and find the assets it needs without building it.
+    """
     block_size = 96
     blocks = [
         # Ground Floor
-        *[Block(i * block_size, HEIGHT - block_size, block_size) for i in range(-WIDTH // block_size, WIDTH * 2 // block_size)],
+        *[(Block, i * block_size, HEIGHT - block_size, block_size) for i in range(-WIDTH // block_size, WIDTH * 2 // block_size)],
 
         # Platforms
-        Block(block_size * 5, HEIGHT - block_size * 3, block_size),
-        Block(block_size * 8, HEIGHT - block_size * 5, block_size),
-        Block(block_size * 9, HEIGHT - block_size * 5, block_size),
-        Block(block_size * 12, HEIGHT - block_size * 7, block_size),
-        Block(block_size * 14.5, HEIGHT - block_size * 6, block_size),
-        Block(block_size * 16.9, HEIGHT - block_size * 3, block_size),
-        Block(block_size * 20.8, HEIGHT - block_size * 5, block_size),
-        Block(block_size * 23, HEIGHT - block_size * 6, block_size),
-        Block(block_size * 24, HEIGHT - block_size * 6, block_size),
+        (Block, block_size * 5, HEIGHT - block_size * 3, block_size),
+        (Block, block_size * 8, HEIGHT - block_size * 5, block_size),
+        (Block, block_size * 9, HEIGHT - block_size * 5, block_size),
+        (Block, block_size * 12, HEIGHT - block_size * 7, block_size),
+        (Block, block_size * 14.5, HEIGHT - block_size * 6, block_size),
+        (Block, block_size * 16.9, HEIGHT - block_size * 3, block_size),
+        (Block, block_size * 20.8, HEIGHT - block_size * 5, block_size),
+        (Block, block_size * 23, HEIGHT - block_size * 6, block_size),
+        (Block, block_size * 24, HEIGHT - block_size * 6, block_size),
         
         # Moving platforms
-        MovingPlatform(block_size * 6, HEIGHT - block_size * 4, block_size, 200, 2, "horizontal"),
-        MovingPlatform(block_size * 10, HEIGHT - block_size * 6, block_size, 150, 2, "vertical"),
+        (MovingPlatform, block_size * 6, HEIGHT - block_size * 4, block_size, 200, 2, "horizontal"),
+        (MovingPlatform, block_size * 10, HEIGHT - block_size * 6, block_size, 150, 2, "vertical"),
     ]
     
     # Traps
     fires = [
-        Fire(block_size * 12, HEIGHT - block_size - 64, 16, 32),
-        Fire(block_size * 11, HEIGHT - block_size - 64, 16, 32),
+        (Fire, block_size * 12, HEIGHT - block_size - 64, 16, 32, True),
+        (Fire, block_size * 11, HEIGHT - block_size - 64, 16, 32, True),
     ]
 
-    for fire in fires:
-        fire.on()   
-    
     # Spike Heads
     spike_heads = [
-        SpikeHead(block_size * 7, HEIGHT - block_size * 4 - 52, 54, 52),
-        SpikeHead(block_size * 13.8, HEIGHT - block_size * 7 - 52, 54, 52),
+        (SpikeHead, block_size * 7, HEIGHT - block_size * 4 - 52, 54, 52),
+        (SpikeHead, block_size * 13.8, HEIGHT - block_size * 7 - 52, 54, 52),
     ]
     
     # Spikes
     spikes = [
         # increments of .4 put the spikes in a row together
-        Spikes(block_size * 2.2, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 2.6, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 3, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 3.4, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 3.8, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 4.2, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 15.4, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 15.8, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 16.2, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 16.6, HEIGHT - block_size - 32, 16, 16),
-        Spikes(block_size * 17, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 2.2, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 2.6, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 3, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 3.4, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 3.8, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 4.2, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 15.4, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 15.8, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 16.2, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 16.6, HEIGHT - block_size - 32, 16, 16),
+        (Spikes, block_size * 17, HEIGHT - block_size - 32, 16, 16),
     ]
 
     # Fruits
     fruits = [
-        Fruit(block_size * -11, HEIGHT - block_size * 1.5, 32, 32, "Melon"),
-        Fruit(block_size * -2.5, HEIGHT - block_size * 1.5, 32, 32, "Strawberry"),
-        Fruit(block_size * -3, HEIGHT - block_size * 2, 32, 32, "Strawberry"),
-        Fruit(block_size * -3.5, HEIGHT - block_size * 2.5, 32, 32, "Strawberry"),
-        Fruit(block_size * -4, HEIGHT - block_size * 3, 32, 32, "Strawberry"),
-        Fruit(block_size * -4.5, HEIGHT - block_size * 3.5, 32, 32, "Strawberry"),
-        Fruit(block_size * -5, HEIGHT - block_size * 3, 32, 32, "Strawberry"),
-        Fruit(block_size * -5.5, HEIGHT - block_size * 2.5, 32, 32, "Strawberry"),
-        Fruit(block_size * -6, HEIGHT - block_size * 2, 32, 32, "Strawberry"),
-        Fruit(block_size * 2.5, HEIGHT - block_size * 4, 32, 32, "Bananas"),
-        Fruit(block_size * 3.5, HEIGHT - block_size * 5, 32, 32, "Bananas"),
-        Fruit(block_size * 4.5, HEIGHT - block_size * 6, 32, 32, "Bananas"),
-        Fruit(block_size * 8.65, HEIGHT - block_size * 6, 32, 32, "Melon"),
-        Fruit(block_size * 11.3, HEIGHT - block_size * 1.5, 32, 32, "Cherries"),
-        Fruit(block_size * 12, HEIGHT - block_size * 8, 32, 32, "Cherries"),
-        Fruit(block_size * 14.5, HEIGHT - block_size * 6.5, 32, 32, "Bananas"),
-        Fruit(block_size * 16, HEIGHT - block_size * 8, 32, 32, "Melon"),
-        Fruit(block_size * 16, HEIGHT - block_size * 7, 32, 32, "Melon"),
-        Fruit(block_size * 16, HEIGHT - block_size * 6, 32, 32, "Melon"),
-        Fruit(block_size * 16, HEIGHT - block_size * 5, 32, 32, "Melon"),
-        Fruit(block_size * 20.95, HEIGHT - block_size * 5.65, 32, 32, "Trophy", scale_factor=2),
+        (Fruit, block_size * -11, HEIGHT - block_size * 1.5, 32, 32, "Melon"),
+        (Fruit, block_size * -2.5, HEIGHT - block_size * 1.5, 32, 32, "Strawberry"),
+        (Fruit, block_size * -3, HEIGHT - block_size * 2, 32, 32, "Strawberry"),
+        (Fruit, block_size * -3.5, HEIGHT - block_size * 2.5, 32, 32, "Strawberry"),
+        (Fruit, block_size * -4, HEIGHT - block_size * 3, 32, 32, "Strawberry"),
+        (Fruit, block_size * -4.5, HEIGHT - block_size * 3.5, 32, 32, "Strawberry"),
+        (Fruit, block_size * -5, HEIGHT - block_size * 3, 32, 32, "Strawberry"),
+        (Fruit, block_size * -5.5, HEIGHT - block_size * 2.5, 32, 32, "Strawberry"),
+        (Fruit, block_size * -6, HEIGHT - block_size * 2, 32, 32, "Strawberry"),
+        (Fruit, block_size * 2.5, HEIGHT - block_size * 4, 32, 32, "Bananas"),
+        (Fruit, block_size * 3.5, HEIGHT - block_size * 5, 32, 32, "Bananas"),
+        (Fruit, block_size * 4.5, HEIGHT - block_size * 6, 32, 32, "Bananas"),
+        (Fruit, block_size * 8.65, HEIGHT - block_size * 6, 32, 32, "Melon"),
+        (Fruit, block_size * 11.3, HEIGHT - block_size * 1.5, 32, 32, "Cherries"),
+        (Fruit, block_size * 12, HEIGHT - block_size * 8, 32, 32, "Cherries"),
+        (Fruit, block_size * 14.5, HEIGHT - block_size * 6.5, 32, 32, "Bananas"),
+        (Fruit, block_size * 16, HEIGHT - block_size * 8, 32, 32, "Melon"),
+        (Fruit, block_size * 16, HEIGHT - block_size * 7, 32, 32, "Melon"),
+        (Fruit, block_size * 16, HEIGHT - block_size * 6, 32, 32, "Melon"),
+        (Fruit, block_size * 16, HEIGHT - block_size * 5, 32, 32, "Melon"),
+        (Fruit, block_size * 20.95, HEIGHT - block_size * 5.65, 32, 32, "Trophy", 2),
     ]
 
     trampoline = [
-        Trampoline(99, HEIGHT - block_size - 112, 28, 28),
-        Trampoline(1800, HEIGHT - block_size - 112, 28, 28)  # Centered horizontally
+        (Trampoline, 99, HEIGHT - block_size - 112, 28, 28),
+        (Trampoline, 1800, HEIGHT - block_size - 112, 28, 28)  # Centered horizontally
     ]
 
     # Exit Door
-    exit_door = ExitDoor(2253, HEIGHT - block_size * 7.4, 64, 64)
+    exit_door = (ExitDoor, 2253, HEIGHT - block_size * 7.4, 64, 64)
     return blocks + fires + spike_heads + spikes + fruits + trampoline + [exit_door]
-    
-def start(window, player_name):
-    game_name = "sens_adventures"
-    clock = pygame.time.Clock()
-    background, bg_image = get_background("Blue.png")
 
+def level_2():
+    """Spikes and fires along the floor, and two pits to cross: the second one on a moving platform."""
+    block_size = 96
+    floor_y = HEIGHT - block_size
+    blocks = [
+        # Ground floor, with a pit after block 7 and a wider one after block 17
+        *[(Block, i * block_size, floor_y, block_size) for i in range(-WIDTH // block_size, 8)],
+        *[(Block, i * block_size, floor_y, block_size) for i in range(10, 18)],
+        *[(Block, i * block_size, floor_y, block_size) for i in range(21, 32)],
+
+        # Platforms
+        (Block, block_size * 4, HEIGHT - block_size * 3, block_size),
+        (Block, block_size * 5, HEIGHT - block_size * 3, block_size),
+        (Block, block_size * 12, HEIGHT - block_size * 4, block_size),
+        (Block, block_size * 13, HEIGHT - block_size * 4, block_size),
+        (Block, block_size * 14, HEIGHT - block_size * 4, block_size),
+        (Block, block_size * 24, HEIGHT - block_size * 3, block_size),
+        (Block, block_size * 25, HEIGHT - block_size * 3, block_size),
+
+        # Moving platforms
+        (MovingPlatform, block_size * 18, floor_y, block_size, 192, 2, "horizontal"),
+        (MovingPlatform, block_size * 8.5, HEIGHT - block_size * 5, block_size, 160, 2, "vertical"),
+    ]
+
+    fires = [
+        (Fire, block_size * 6, floor_y - 64, 16, 32, True),
+        (Fire, block_size * 15, floor_y - 64, 16, 32, True),
+        (Fire, block_size * 15.5, floor_y - 64, 16, 32, True),
+        (Fire, block_size * 27, floor_y - 64, 16, 32, True),
+    ]
+
+    spike_heads = [
+        (SpikeHead, block_size * 13, HEIGHT - block_size * 4 - 52, 54, 52),
+        (SpikeHead, block_size * 24.5, HEIGHT - block_size * 3 - 52, 54, 52),
+    ]
+
+    spikes = [
+        *[(Spikes, block_size * (2 + 0.4 * i), floor_y - 32, 16, 16) for i in range(4)],
+        *[(Spikes, block_size * (11 + 0.4 * i), floor_y - 32, 16, 16) for i in range(6)],
+        *[(Spikes, block_size * (22 + 0.4 * i), floor_y - 32, 16, 16) for i in range(5)],
+    ]
+
+    fruits = [
+        (Fruit, block_size * 4.5, HEIGHT - block_size * 4, 32, 32, "Cherries"),
+        (Fruit, block_size * 5.5, HEIGHT - block_size * 4, 32, 32, "Cherries"),
+        (Fruit, block_size * 8.5, HEIGHT - block_size * 2.5, 32, 32, "Strawberry"),
+        (Fruit, block_size * 9, HEIGHT - block_size * 3, 32, 32, "Strawberry"),
+        (Fruit, block_size * 9.5, HEIGHT - block_size * 2.5, 32, 32, "Strawberry"),
+        (Fruit, block_size * 8.7, HEIGHT - block_size * 7, 32, 32, "Melon"),
+        (Fruit, block_size * 12.5, HEIGHT - block_size * 5, 32, 32, "Bananas"),
+        (Fruit, block_size * 14, HEIGHT - block_size * 5, 32, 32, "Bananas"),
+        (Fruit, block_size * 19, HEIGHT - block_size * 2.5, 32, 32, "Melon"),
+        (Fruit, block_size * 20, HEIGHT - block_size * 2.5, 32, 32, "Melon"),
+        (Fruit, block_size * 25.2, HEIGHT - block_size * 4.5, 32, 32, "Trophy", 2),
+    ]
+
+    trampoline = [
+        (Trampoline, block_size * 3, floor_y - 112, 28, 28),
+    ]
+
+    exit_door = (ExitDoor, block_size * 29, floor_y - 192, 64, 64)
+    return blocks + fires + spike_heads + spikes + fruits + trampoline + [exit_door]
+
+def level_3():
+    """A climb: platforms stepping up over open ground to an exit high on the right, with trampolines to help."""
     block_size = 96
+    floor_y = HEIGHT - block_size
+    blocks = [
+        # Ground floor at the start, and a stretch under the middle of the climb to land on
+        *[(Block, i * block_size, floor_y, block_size) for i in range(-WIDTH // block_size, 7)],
+        *[(Block, i * block_size, floor_y, block_size) for i in range(13, 19)],
+
+        # Platforms, stepping up to the exit
+        *[(Block, i * block_size, HEIGHT - block_size * 3, block_size) for i in range(7, 10)],
+        *[(Block, i * block_size, HEIGHT - block_size * 4, block_size) for i in range(11, 13)],
+        *[(Block, i * block_size, HEIGHT - block_size * 5, block_size) for i in range(16, 18)],
+        *[(Block, i * block_size, HEIGHT - block_size * 4, block_size) for i in range(19, 22)],
+        *[(Block, i * block_size, HEIGHT - block_size * 5, block_size) for i in range(23, 28)],
 
+        # Moving platforms
+        (MovingPlatform, block_size * 14, HEIGHT - block_size * 4, block_size, 96, 2, "horizontal"),
+        (MovingPlatform, block_size * 22, HEIGHT - block_size * 5, block_size, 150, 2, "vertical"),
+    ]
+
+    fires = [
+        (Fire, block_size * 8, HEIGHT - block_size * 3 - 64, 16, 32, True),
+        (Fire, block_size * 20.5, HEIGHT - block_size * 4 - 64, 16, 32, True),
+    ]
+
+    spike_heads = [
+        (SpikeHead, block_size * 12, HEIGHT - block_size * 4 - 52, 54, 52),
+        (SpikeHead, block_size * 16.5, HEIGHT - block_size * 7 - 52, 54, 52),
+    ]
+
+    spikes = [
+        *[(Spikes, block_size * (14 + 0.4 * i), floor_y - 32, 16, 16) for i in range(8)],
+        *[(Spikes, block_size * (24 + 0.4 * i), HEIGHT - block_size * 5 - 32, 16, 16) for i in range(3)],
+    ]
+
+    fruits = [
+        (Fruit, block_size * 7.5, HEIGHT - block_size * 4, 32, 32, "Bananas"),
+        (Fruit, block_size * 9.5, HEIGHT - block_size * 4, 32, 32, "Bananas"),
+        (Fruit, block_size * 11.5, HEIGHT - block_size * 5, 32, 32, "Cherries"),
+        (Fruit, block_size * 13.5, floor_y - 64, 32, 32, "Strawberry"),
+        (Fruit, block_size * 17.5, floor_y - 64, 32, 32, "Strawberry"),
+        (Fruit, block_size * 16.5, HEIGHT - block_size * 6, 32, 32, "Melon"),
+        (Fruit, block_size * 20, HEIGHT - block_size * 5, 32, 32, "Melon"),
+        (Fruit, block_size * 22.2, HEIGHT - block_size * 7.5, 32, 32, "Trophy", 2),
+    ]
+
+    trampoline = [
+        (Trampoline, block_size * 5, floor_y - 112, 28, 28),
+        (Trampoline, block_size * 15.5, floor_y - 112, 28, 28),
+    ]
+
+    exit_door = (ExitDoor, block_size * 26, HEIGHT - block_size * 5 - 192, 64, 64)
+    return blocks + fires + spike_heads + spikes + fruits + trampoline + [exit_door]
+
+LEVELS = (level_1, level_2, level_3) # the campaign, in the order it is played
+
+def build_level(definition):
+    """Construct every object in a level definition, in order."""
+    return [kind(*args) for kind, *args in definition]
+
+def solid(mask):
+    """True if every bit of a collision mask is set."""
+    width, height = mask.get_size()
+    return mask.count() == width * height
+
+class Terrain(pygame.sprite.Sprite):
+    """
+    Touching static blocks merged by compile_level() into one collision shape. Its blocks are kept, sorted by x, to
+    draw it and for its TileMask (used unless every pixel is solid).
+    """
+    def __init__(self, rect, tiles):
+        super().__init__()
+        self.rect = rect
+        self.tiles = sorted(tiles, key=lambda tile: tile.rect.x) # the Block flyweights it was made from
+        self.lefts = [tile.rect.x for tile in self.tiles]
+        self.widest = max(tile.rect.width for tile in self.tiles)
+        solid_tiles = all(solid(kind.mask) for kind in {tile.kind for tile in self.tiles})
+        self.mask = None if solid_tiles else TileMask(self)
+        self.name = None
+
+    def tile_range(self, left, right):
+        """Indices of the tiles overlapping the x range [left, right)."""
+        return range(bisect_left(self.lefts, left - self.widest + 1), bisect_left(self.lefts, right))
+
+    def draw(self, win, offset_x):
+        if self.rect.right <= offset_x or self.rect.x >= offset_x + WIDTH:
+            return
+        tiles = self.tiles
+        for i in self.tile_range(offset_x, offset_x + WIDTH):
+            tile = tiles[i]
+            win.blit(tile.image, (tile.rect.x - offset_x, tile.rect.y))
+
+class TileMask:
+    """
+    The collision mask of a Terrain whose blocks aren't solid everywhere: answers overlap() from the blocks' own
+    masks instead of one Mask the size of the whole shape.
+    """
+    def __init__(self, terrain):
+        self.terrain = terrain
+
+    def shortest_run(self, axis):
+        """Runs of set bits only get longer where blocks touch, so the shortest is the shortest in any block."""
+        return min(shortest_run(kind.mask, axis) for kind in {tile.kind for tile in self.terrain.tiles})
+
+    def overlap(self, other, offset):
+        """Like Mask.overlap(): the first point (relative to the shape) where other, placed at offset, touches a set bit."""
+        terrain = self.terrain
+        x = terrain.rect.x + offset[0]
+        y = terrain.rect.y + offset[1]
+        for i in terrain.tile_range(x, x + other.get_size()[0]):
+            tile = terrain.tiles[i]
+            point = tile.mask.overlap(other, (x - tile.rect.x, y - tile.rect.y))
+            if point is not None:
+                return point[0] + tile.rect.x - terrain.rect.x, point[1] + tile.rect.y - terrain.rect.y
+        return None
+
+def merge_rects(rects):
+    """
+    Merge touching rects into a few covering exactly the same area: first along rows, then rows with the same span
+    down columns. Returns (merged rect, indices of the rects in it) pairs.
+    """
+    rows = []
+    for i in sorted(range(len(rects)), key=lambda i: (rects[i].y, rects[i].height, rects[i].x)):
+        rect = rects[i]
+        if rows and rows[-1][0].y == rect.y and rows[-1][0].height == rect.height and rows[-1][0].right == rect.x:
+            rows[-1][0].union_ip(rect)
+            rows[-1][1].append(i)
+        else:
+            rows.append((pygame.Rect(rect), [i]))
+
+    merged = []
+    for row, members in sorted(rows, key=lambda row: (row[0].x, row[0].width, row[0].y)):
+        if merged and merged[-1][0].x == row.x and merged[-1][0].width == row.width and merged[-1][0].bottom == row.y:
+            merged[-1][0].union_ip(row)
+            merged[-1][1].extend(members)
+        else:
+            merged.append((row, members))
+    return merged
+
+def compile_level(objects):
+    """
+    The level compile step: drop duplicate blocks and merge touching static blocks into Terrain, so collision
+    queries look at a handful of shapes instead of every block. Everything else is kept as it is.
+    """
+    blocks = {}
+    others = []
+    for obj in objects:
+        if type(obj) is Block: # not MovingPlatform
+            blocks.setdefault(tuple(obj.rect), obj) # a second block in the same place adds nothing
+        else:
+            others.append(obj)
+
+    blocks = list(blocks.values())
+    terrain = []
+    for rect, members in merge_rects([block.rect for block in blocks]):
+        terrain.append(Terrain(rect, [blocks[i] for i in members]))
+    return terrain + others
+
+def build_game(level=0, definition=None):
+    """Build the player and a level from scratch: construct every object, loading, slicing and scaling its sprites."""
     player = Player(100, 100, 50, 50)
-    floor = [Block(i * block_size, HEIGHT - block_size, block_size) 
-             for i in range(-WIDTH // block_size, WIDTH * 2 // block_size)]  # creates a floor of blocks
-    objects = floor + create_level()
+    if definition is None:
+        definition = LEVELS[level]()
+    objects = compile_level(build_level(definition)) # the definitions include the floor
+    return player, objects
+
+class CompiledLevel:
+    """
+    A level's definition with its sprites' pixels and masks, saved as plain data and memory-mapped by later launches.
+    A file whose header names a different module, FORMAT_VERSION or key is ignored and rebuilt.
+    """
+    MAGIC = b"SENL"
+    FORMAT_VERSION = 2
+    MODULE = os.path.splitext(os.path.basename(__file__))[0] # not __name__, which is "__main__" when the game runs as a script
+    HEADER = struct.Struct("<4sH32s32sQQ") # magic, format version, module, level key, payload offset, payload length
+    ALIGN = 64 # start every pixel/mask block on a cache line
+
+    def __init__(self, mapping, definition, sprites, surfaces, masks, mask_pairs):
+        self.mapping = mapping
+        self.definition = definition # [type name, *constructor arguments] per object
+        self.sprites = sprites # [cached_sprites() key, sprites with each surface replaced by its index] per entry
+        self.surface_table = surfaces # (offset, width, height) per surface
+        self.mask_table = masks # (offset, length, width, height) per mask
+        self.mask_pairs = mask_pairs # (surface index, mask index) for every sprite frame's collision mask
+        self.surfaces = {}
+        self.masks = {}
+
+    _key = None
+
+    @classmethod
+    def key(cls):
+        """Hash of everything the built level depends on, worked out once per process."""
+        if cls._key is None:
+            cls._key = cls._hash_sources()
+        return cls._key
+
+    @staticmethod
+    def _hash_sources():
+        digest = hashlib.sha256()
+        digest.update(repr((CompiledLevel.FORMAT_VERSION, pygame.version.ver, WIDTH, HEIGHT, SPRITE_SCALE)).encode())
+        with open(abspath(__file__), "rb") as file:
+            digest.update(file.read())
+        for root, dirs, files in os.walk(assets_dir):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.endswith(".png"):
+                    path = join(root, filename)
+                    digest.update(os.path.relpath(path, assets_dir).encode())
+                    with open(path, "rb") as file:
+                        digest.update(file.read())
+        return digest.digest()
+
+    @staticmethod
+    def path(level):
+        return join(cache_dir, f"level{level + 1}_x{SPRITE_SCALE}.bin")
+
+    @classmethod
+    def save(cls, path, key, definition, sprite_keys):
+        """Write a level's definition and the cached_sprites() entries in sprite_keys to path, atomically."""
+        surfaces = []
+        masks = []
+        seen = {}
+        blobs = []
+        offset = cls.HEADER.size
+
+        def add_blob(data):
+            nonlocal offset
+            padding = -offset % cls.ALIGN
+            blobs.append(b"\0" * padding + data)
+            offset += padding
+            start = offset
+            offset += len(data)
+            return start
+
+        def encode(sprites):
+            if isinstance(sprites, pygame.Surface):
+                if sprites not in seen:
+                    seen[sprites] = len(surfaces)
+                    surfaces.append((add_blob(pygame.image.tobytes(sprites, "BGRA")), *sprites.get_size()))
+                return seen[sprites]
+            if isinstance(sprites, dict):
+                return {name: encode(value) for name, value in sprites.items()}
+            return [encode(value) for value in sprites]
+
+        entries = [[list(sprite_key), encode(_sprites[sprite_key])] for sprite_key in sorted(sprite_keys, key=repr)]
+        # Every sprite frame the objects might switch to needs its collision mask too
+        mask_indices = {}
+        mask_pairs = []
+        for surface, surface_index in seen.items():
+            mask = get_mask(surface)
+            if id(mask) not in mask_indices:
+                mask_indices[id(mask)] = len(masks)
+                bits = memoryview(mask).tobytes()
+                masks.append((add_blob(bits), len(bits), *mask.get_size()))
+            mask_pairs.append((surface_index, mask_indices[id(mask)]))
+        payload = json.dumps({
+            "definition": [[kind.__name__, *args] for kind, *args in definition],
+            "sprites": entries,
+            "surfaces": surfaces,
+            "masks": masks,
+            "mask_pairs": mask_pairs,
+        }).encode()
+        payload_offset = offset
+
+        os.makedirs(dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, cls.FORMAT_VERSION, cls.MODULE.encode(), key, payload_offset, len(payload)))
+            for blob in blobs:
+                file.write(blob)
+            file.write(payload)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def build(cls, level, path, key):
+        """Build a level from scratch and save it to path. Returns (the saved file opened, or None; player; objects)."""
+        definition = LEVELS[level]()
+        with recording_sprites() as used:
+            player, objects = build_game(definition=definition)
+        try:
+            cls.save(path, key, definition, used)
+        except OSError as e:
+            print(f"Error writing level cache: {e}")
+            return None, player, objects
+        return cls.open(path, key), player, objects
+
+    @classmethod
+    def open(cls, path, key):
+        """Memory-map a compiled level, or return None if there isn't a valid one for this module and key."""
+        try:
+            with open(path, "rb") as file:
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY) # private pages, so a stray write can't reach the file
+        except (OSError, ValueError): # missing, or empty (which mmap refuses)
+            return None
+        if len(mapping) < cls.HEADER.size:
+            return None
+        magic, version, module, file_key, payload_offset, payload_length = cls.HEADER.unpack_from(mapping)
+        if (magic != cls.MAGIC or version != cls.FORMAT_VERSION or module.rstrip(b"\0") != cls.MODULE.encode()
+                or file_key != key or payload_offset + payload_length > len(mapping)):
+            return None
+        try:
+            level = cls(mapping, **json.loads(mapping[payload_offset:payload_offset + payload_length]))
+            level.validate()
+        except (ValueError, TypeError, KeyError):
+            return None
+        return level
+
+    def validate(self):
+        """Raise ValueError unless every table entry lies inside the file and every reference points into a table."""
+        size = len(self.mapping)
+        for offset, width, height in self.surface_table:
+            if offset < 0 or width < 0 or height < 0 or offset + width * height * 4 > size:
+                raise ValueError("surface outside the file")
+        for offset, length, width, height in self.mask_table:
+            if offset < 0 or length < 0 or offset + length > size:
+                raise ValueError("mask outside the file")
+        for name, *args in self.definition:
+            if name not in LEVEL_TYPES:
+                raise ValueError(f"unknown level object {name!r}")
+        for sprite_key, sprites in self.sprites:
+            for index in self.surface_indices(sprites):
+                if not 0 <= index < len(self.surface_table):
+                    raise ValueError("sprite outside the surface table")
+        for surface_index, mask_index in self.mask_pairs:
+            if not (0 <= surface_index < len(self.surface_table) and 0 <= mask_index < len(self.mask_table)):
+                raise ValueError("mask pair outside the tables")
+
+    @staticmethod
+    def surface_indices(sprites):
+        if isinstance(sprites, int):
+            yield sprites
+        else:
+            for value in (sprites.values() if isinstance(sprites, dict) else sprites):
+                yield from CompiledLevel.surface_indices(value)
+
+    def prefetch(self):
+        """Read the whole file into memory (the pages stay cached), so creating the level later doesn't wait on the disk."""
+        for offset in range(0, len(self.mapping), mmap.PAGESIZE):
+            self.mapping[offset]
+
+    def surface(self, index):
+        surface = self.surfaces.get(index)
+        if surface is None:
+            offset, width, height = self.surface_table[index]
+            pixels = memoryview(self.mapping)[offset:offset + width * height * 4]
+            surface = self.surfaces[index] = pygame.image.frombuffer(pixels, (width, height), "BGRA")
+        return surface
+
+    def mask(self, index):
+        mask = self.masks.get(index)
+        if mask is None:
+            offset, length, width, height = self.mask_table[index]
+            mask = pygame.mask.Mask((width, height))
+            bits = memoryview(mask).cast("B")
+            if len(bits) != length:
+                raise ValueError("mask size doesn't match this pygame")
+            bits[:] = self.mapping[offset:offset + length]
+            self.masks[index] = mask
+        return mask
+
+    def decode(self, sprites):
+        if isinstance(sprites, int):
+            return self.surface(sprites)
+        if isinstance(sprites, dict):
+            return {name: self.decode(value) for name, value in sprites.items()}
+        return [self.decode(value) for value in sprites]
+
+    def create_game(self):
+        """A fresh player and level built from the file's definition, with the file's sprites in cached_sprites()."""
+        for sprite_key, sprites in self.sprites:
+            sprite_key = tuple(sprite_key)
+            if sprite_key not in _sprites: # this process may have loaded some already; objects must share those
+                _sprites[sprite_key] = self.decode(sprites)
+        for surface_index, mask_index in self.mask_pairs:
+            if surface_index in self.surfaces:
+                _mask_cache.setdefault(self.surfaces[surface_index], self.mask(mask_index))
+        return build_game(definition=[(LEVEL_TYPES[name], *args) for name, *args in self.definition])
+
+_compiled_levels = {} # level index -> the CompiledLevel this process loads it from
+
+def create_game(level=0):
+    """
+    Create the player and every object in a level for a new session (used by start() and the replay verifier).
+    With LEVEL_CACHE on, the level's sprites come from its CompiledLevel file after the first launch.
+    """
+    if not LEVEL_CACHE:
+        return build_game(level)
+    compiled = _compiled_levels.get(level)
+    if compiled is None:
+        path = CompiledLevel.path(level)
+        key = CompiledLevel.key()
+        compiled = CompiledLevel.open(path, key)
+        if compiled is None:
+            compiled, player, objects = CompiledLevel.build(level, path, key)
+            if compiled is None:
+                return player, objects
+        _compiled_levels[level] = compiled
+    return compiled.create_game()
+
+class LevelLoader:
+    """
+    Prepares the next level on a worker thread by opening its CompiledLevel (building the file first if there isn't
+    one yet) or decoding its images. finish() joins the worker and creates the level on the main thread.
+    """
+    def __init__(self, level):
+        self.level = level
+        self.compiled = None
+        self.images = {} # path -> decoded image, filled by the worker and only read by finish() once it has joined it
+        self.thread = threading.Thread(target=self.prepare, name=f"level {level + 1} loader", daemon=True)
+        self.thread.start()
+
+    def prepare(self):
+        if LEVEL_CACHE:
+            compiled = _compiled_levels.get(self.level)
+            if compiled is None:
+                path, key = CompiledLevel.path(self.level), CompiledLevel.key()
+                compiled = CompiledLevel.open(path, key)
+                if compiled is None: # first launch: build the file here rather than at the switch
+                    compiled = CompiledLevel.build(self.level, path, key)[0]
+            if compiled is not None:
+                compiled.prefetch()
+                self.compiled = compiled
+                return
+
+        for kind in {kind for kind, *args in LEVELS[self.level]()}:
+            folder = join(assets_dir, ASSET_DIRS[kind])
+            for filename in listdir(folder):
+                if filename.endswith(".png"):
+                    path = join(folder, filename)
+                    try:
+                        self.images[path] = pygame.image.load(path)
+                    except pygame.error as e:
+                        print(f"Error preloading {path}: {e}") # load_image() will try again when the level is built
+
+    def finish(self):
+        """Wait for the worker (normally long done) and create the level from what it prepared. Main thread only."""
+        self.thread.join()
+        if self.compiled is not None:
+            _compiled_levels.setdefault(self.level, self.compiled)
+            return create_game(self.level)
+        with decoded_images(self.images):
+            return create_game(self.level)
+
+class Campaign:
+    """The levels of a session, played in the order of LEVELS; a LevelLoader prepares each next one."""
+    def __init__(self, level=0, preload=True):
+        self.first_level = level
+        self.preload = preload # False for headless runs, which would only wait for the loader anyway
+        self.loader = None
+        self.finished = False # reached the exit of the last level
+        self.load(level, *create_game(level))
+
+    def load(self, level, player, objects):
+        self.level = level
+        self.player = player
+        self.objects = objects
+        self.store = create_entity_store(objects)
+        self.level_start = GameSnapshot(player, objects, self.store) # "play again" puts the level back to here
+        if self.preload and level + 1 < len(LEVELS):
+            self.loader = LevelLoader(level + 1)
+
+    def step(self, inputs, effects=None, distant_interval=1, view_left=None):
+        """
+        step() the current level. Reaching the exit of any level but the last moves on to the next one and returns
+        OUTCOME_NEXT_LEVEL; otherwise the outcome is step()'s.
+        """
+        outcome = step(self.player, self.objects, inputs, self.store, effects, distant_interval, view_left)
+        if outcome == OUTCOME_EXIT:
+            if self.level + 1 < len(LEVELS):
+                self.next_level()
+                return OUTCOME_NEXT_LEVEL
+            self.finished = True
+        return outcome
+
+    def next_level(self):
+        level = self.level + 1
+        loader, self.loader = self.loader, None
+        player, objects = loader.finish() if loader is not None else create_game(level)
+        player.score = self.player.score
+        self.load(level, player, objects)
+
+    def restart(self):
+        """Play again: the current level from the point the player reached it, or the whole campaign once it's been finished."""
+        if self.finished:
+            self.finished = False
+            self.load(self.first_level, *create_game(self.first_level))
+        else:
+            self.level_start.restore(self.player, self.objects, self.store)
+
+def start(window, player_name):
+    game_name = "sens_adventures"
+    pacer = FramePacer()
+    governor = FrameGovernor() # drops optional detail if this machine can't keep up with FPS
+    background = create_background("Blue.png")
+
+    campaign = Campaign() # the levels, played one after another; the next one loads in the background
+    effects = create_effect_pool()
+
+    # Record every frame's input so the session can be replayed and its score verified
+    seed = random.getrandbits(32)
+    random.seed(seed)
+    replay = Replay(seed, campaign_hash())
     
     offset_x = 0
-    scroll_area_width = 200  # when have 200 px left on the screen, we want to start scrolling
     
     # Show the welcome screen
-    draw_welcome_screen(window, background, bg_image)
+    draw_welcome_screen(window, background)
     finish_level_sound.play()
     pygame.time.delay(2000)  # Display the welcome screen for 3 seconds
 
     while True:
         run = True
         while run:
-            clock.tick(FPS)  # our loop will only run at this speed
+            events = pacer.wait()  # our loop will only run at this speed (see FramePacer for when input is read)
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+            for event in events:
+                if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
                     run = False
                     break
 
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE and player.jump_count < 2:
-                        player.jump()
-            
-            player.loop(FPS)
-            for obj in objects:
-                if isinstance(obj, Fire) or isinstance(obj, SpikeHead) or isinstance(obj, MovingPlatform) or isinstance(obj, Spikes):
-                    obj.loop()
-
-            reached_exit = handle_move(player, objects)
-            draw(window, background, bg_image, player, objects, offset_x)
-            draw_score(window, player.score)  # Draw the score on the screen
-
-            if ((player.rect.right - offset_x >= WIDTH - scroll_area_width) and player.x_vel > 0) or (
-                (player.rect.left - offset_x <= scroll_area_width) and player.x_vel < 0):
-                offset_x += player.x_vel
-
-            # Check if the player falls off the screen
-            if player.rect.top > HEIGHT:
-                player.score = -1000
+            inputs = read_input(events)
+            replay.record(inputs)
+            frame_effects = effects if governor.effects else None
+            outcome = campaign.step(inputs, frame_effects, governor.distant_interval, offset_x)
+            if outcome == OUTCOME_NEXT_LEVEL: # straight on into the next level, it was loaded while this one was played
+                if effects is not None:
+                    effects.clear()
+                offset_x = 0
+            player = campaign.player
+            layers = background if governor.parallax else background[:1] # the back layer alone still covers the screen
+            draw(window, layers, player, campaign.objects, offset_x, frame_effects)
+            draw_score(window, player.score, governor.hud_interval)  # Draw the score on the screen
+
+            offset_x = scroll(player, offset_x)
+
+            if outcome == OUTCOME_DEAD:
                 game_over_sound.play()
                 draw_death_message(window)
                 pygame.time.delay(2000)
@@ -848,28 +2495,42 @@ def start(window, player_name):
                 draw_play_again_message(window)
                 run = False
 
-            if reached_exit:
+            if outcome == OUTCOME_EXIT:
                 draw_final_score(window, player.score)
                 pygame.time.delay(2000)  # Display the final score for 2 seconds
                 draw_play_again_message(window)
                 run = False
 
-            pygame.display.update()  
+            if run:
+                pacer.present(window)
+                if governor.record(pacer.work_times[-1]) and not governor.effects and effects is not None:
+                    effects.clear() # so they don't hang in the air until effects are back on
+            else: # this frame showed a message for seconds, so leave it out of the pacer's timings
+                update_display(window)
         
         play_again = True
         while play_again:
             for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+                if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
                     play_again = False
                     break
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_y:
                         play_again = False
+                        campaign.restart() # fruit back, score and traps reset
+                        if effects is not None:
+                            effects.clear()
+                        replay.restart()
+                        pacer.reset()
+                        offset_x = 0
                         break  # Break out of the inner loop to restart the game
                     elif event.key == pygame.K_n:
                         play_again = False
-                        update_scoreboard("sens_adventure_game", player_name, player.score)
-                        return player.score  # Return the score to the menu
+                        save_replay(replay, player_name, campaign.player.score)
+                        update_scoreboard("sens_adventure_game", player_name, campaign.player.score)
+                        if pacer.measure:
+                            report_latency("Input latency", pacer.latencies)
+                        return campaign.player.score  # Return the score to the menu
 
     pygame.quit()
     quit()
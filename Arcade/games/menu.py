@@ -5,11 +5,13 @@ File: menu.py
 Description: Main menu for the GLCL Arcade application
 Author: Cameron Carlisle + [Add any names of contributors who edit]
 Date created: 26/02/2025
-Last modified: 03/03/2025
+Last modified: 19/10/2026
 Version: 1.1
 
 This script provides the main menu for the GLCL Arcade application. It allows users to enter their name, select a game to play, view the leaderboard, and exit the application. The menu dynamically loads available games from the 'games' folder and passes the player's name to the selected game.
 
+Each game in the list shows a thumbnail of 'games/previews/<game>.png' (or .jpg/.webp, or a .gif clip that plays while the game is selected), or a placeholder.
+
 Usage:
 1. Run the script to start the GLCL Arcade application.
 2. Enter your name and proceed to the main menu.
@@ -24,19 +26,266 @@ Contact: cameroncarlisle1992@gmail.com
 import csv
 import os
 import sys
+import hashlib
 import importlib
+import threading
 import subprocess
+from collections import OrderedDict
 
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton,
-    QStackedWidget, QMessageBox, QListWidget, QHBoxLayout, QTableWidget,
-    QTableWidgetItem
+    QStackedWidget, QMessageBox, QListWidget, QListWidgetItem, QHBoxLayout, QTableView,
+    QHeaderView, QTableWidget, QTableWidgetItem
 )
 import scoreboard_manager as scoreboard  # Import the scoreboard module
+scoreboard.CONNECT_IN_BACKGROUND = True  # Never hold up the GUI thread connecting to a scoreboard service
 from games_config import GAMES_CONFIG  # Import the games configuration
 
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QObject, QRunnable, QThread, QThreadPool, QSize, pyqtSignal
+from PyQt6.QtGui import QFont, QImage, QImageReader, QPixmap, QIcon, QPainter, QColor
+
+PREVIEW_DIR = os.path.join(os.path.dirname(__file__), "games", "previews")  # <game name>.gif/.png/... provided by each game
+PREVIEW_EXTENSIONS = (".gif", ".webp", ".png", ".jpg", ".jpeg")  # looked for in this order; a .gif plays as a looping clip
+PREVIEW_CACHE_DIR = os.path.join(os.path.dirname(__file__), "preview_cache")
+THUMBNAIL_SIZE = QSize(160, 90)
+PREVIEW_CLIP_FRAMES = 60  # Most frames kept from a clip
+PREVIEW_DISK_CACHE_BYTES = 64 * 1024 * 1024
+PREVIEW_MEMORY_CACHE_BYTES = 32 * 1024 * 1024
+PREVIEW_THREADS = max(1, min(4, QThread.idealThreadCount() - 1))  # Leave a core for the menu itself
+
+def find_preview(game_name):
+    """Return the path of a game's preview image or clip, or None if it hasn't got one."""
+    for extension in PREVIEW_EXTENSIONS:
+        path = os.path.join(PREVIEW_DIR, game_name + extension)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def fit_thumbnail(image):
+    """Scale an image to fit THUMBNAIL_SIZE, keeping its shape, centred on a transparent thumbnail-sized image."""
+    if image.size() != image.size().scaled(THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio):
+        image = image.scaled(THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    thumbnail = QImage(THUMBNAIL_SIZE, QImage.Format.Format_ARGB32_Premultiplied)
+    thumbnail.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(thumbnail)
+    painter.drawImage((THUMBNAIL_SIZE.width() - image.width()) // 2, (THUMBNAIL_SIZE.height() - image.height()) // 2, image)
+    painter.end()
+    return thumbnail
+
+def decode_preview(path):
+    """Read a preview as thumbnail frames and the delay after each one in ms (no delays for a still image)."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    if reader.size().isValid():
+        reader.setScaledSize(reader.size().scaled(THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio))
+    frames, delays = [], []
+    while len(frames) < PREVIEW_CLIP_FRAMES:
+        image = reader.read()
+        if image.isNull():
+            break
+        frames.append(fit_thumbnail(image))
+        delays.append(max(reader.nextImageDelay(), 20))  # Some clips say 0, which browsers treat as "as fast as sensible"
+        if not reader.supportsAnimation():
+            break
+    if not frames:
+        raise ValueError(reader.errorString())
+    return frames, delays if len(frames) > 1 else []
+
+def placeholder(game_name):
+    """A thumbnail for a game without a preview: its initials on a colour picked from its name."""
+    image = QImage(THUMBNAIL_SIZE, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    hue = int(hashlib.sha1(game_name.encode()).hexdigest(), 16) % 360
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.setBrush(QColor.fromHsv(hue, 110, 190))
+    painter.drawRoundedRect(image.rect(), 10, 10)
+    painter.setPen(Qt.GlobalColor.white)
+    painter.setFont(QFont("Arial", 28, QFont.Weight.Bold))
+    initials = "".join(word[0] for word in game_name.replace(" ", "_").split("_") if word)[:3].upper()
+    painter.drawText(image.rect(), Qt.AlignmentFlag.AlignCenter, initials)
+    painter.end()
+    return image
+
+class PreviewDiskCache:
+    """
+    Thumbnails saved as PNG files in PREVIEW_CACHE_DIR, keyed by the preview's path, size and mtime and
+    THUMBNAIL_SIZE, with the least recently used deleted past max_bytes. A clip is saved as its frames stacked.
+    """
+    def __init__(self, directory=PREVIEW_CACHE_DIR, max_bytes=PREVIEW_DISK_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None  # Counted the first time something is written
+
+    def key(self, path):
+        stat = os.stat(path)
+        text = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{THUMBNAIL_SIZE.width()}x{THUMBNAIL_SIZE.height()}"
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def get(self, key):
+        """Return the cached (frames, delays) for a key, or None."""
+        path = os.path.join(self.directory, f"{key}.png")
+        image = QImage(path)
+        if image.isNull():
+            return None
+        try:
+            os.utime(path)  # Most recently used
+        except OSError:
+            pass
+        delays = [int(delay) for delay in image.text("delays").split(",") if delay]
+        count = max(1, len(delays))
+        height = image.height() // count
+        frames = [image.copy(0, i * height, image.width(), height) for i in range(count)]
+        return frames, delays
+
+    def put(self, key, frames, delays):
+        """Save a thumbnail (a failed write is only printed) and return its (frames, delays)."""
+        stacked = QImage(frames[0].width(), frames[0].height() * len(frames), QImage.Format.Format_ARGB32_Premultiplied)
+        stacked.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(stacked)
+        for i, frame in enumerate(frames):
+            painter.drawImage(0, i * frames[0].height(), frame)
+        painter.end()
+        stacked.setText("delays", ",".join(str(delay) for delay in delays))
+
+        path = os.path.join(self.directory, f"{key}.png")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if not stacked.save(temp_path, "PNG"):
+                raise OSError("couldn't save the image")
+            os.replace(temp_path, path)  # Readers never see half a file
+            with self.lock:
+                if self.total_bytes is None:
+                    self.total_bytes = sum(size for _, size, _ in self.entries())
+                else:
+                    self.total_bytes += os.path.getsize(path)
+                if self.total_bytes > self.max_bytes:
+                    self.evict()
+        except OSError as e:  # Only the cache entry is lost, the thumbnail is still shown
+            print(f"Error writing preview cache file {path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return frames, delays
+
+    def entries(self):
+        """(last used, size, path) of every cached file."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".png"):
+                try:
+                    stat = entry.stat()
+                except OSError:  # Deleted by another menu sharing the cache
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Delete the least recently used files until the cache is down to 90% of max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self.total_bytes = total
+
+class PreviewJob(QRunnable):
+    """Makes one game's thumbnail on the thread pool: from the disk cache, from its preview, or a placeholder."""
+    def __init__(self, loader, game_name):
+        super().__init__()
+        self.loader = loader
+        self.game_name = game_name
+
+    def run(self):
+        if self.game_name not in self.loader.wanted:  # Scrolled away again before a thread got to it
+            self.loader.skipped.emit(self.game_name)
+            return
+        try:
+            frames, delays = self.make()
+        except Exception as e:  # A broken preview file shouldn't stop the rest
+            print(f"Error loading preview for {self.game_name}: {e}")
+            frames, delays = [placeholder(self.game_name)], []
+        self.loader.loaded.emit(self.game_name, frames, delays)
+
+    def make(self):
+        source = find_preview(self.game_name)
+        if source is None:
+            return [placeholder(self.game_name)], []
+        cache = self.loader.disk_cache
+        key = cache.key(source)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        return cache.put(key, *decode_preview(source))
+
+class PreviewLoader(QObject):
+    """
+    Loads the thumbnails of the games request() is given on a QThreadPool and sends them to the GUI thread through
+    ready, keeping up to PREVIEW_MEMORY_CACHE_BYTES of them (never the game in keep) in a memory cache.
+    """
+    ready = pyqtSignal(str)
+    evicted = pyqtSignal(str)
+    loaded = pyqtSignal(str, list, list)  # Emitted by the jobs from the pool threads
+    skipped = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(PREVIEW_THREADS)
+        self.disk_cache = PreviewDiskCache()
+        self.memory = OrderedDict()  # game name -> (pixmaps, delays), least recently used first
+        self.memory_bytes = 0
+        self.pending = set()
+        self.wanted = set()  # Read by the jobs; only ever replaced, never changed in place
+        self.keep = None
+        self.loaded.connect(self.store)
+        self.skipped.connect(self.skip)
+
+    def request(self, games):
+        """Load the thumbnails of these games (in this order) that aren't loaded or loading yet."""
+        self.wanted = set(games)
+        for game in games:
+            if game not in self.memory and game not in self.pending:
+                self.pending.add(game)
+                self.pool.start(PreviewJob(self, game))
+
+    def skip(self, game):
+        self.pending.discard(game)
+
+    def get(self, game):
+        """The (pixmaps, delays) of a loaded thumbnail, or None."""
+        entry = self.memory.get(game)
+        if entry is not None:
+            self.memory.move_to_end(game)
+        return entry
+
+    def store(self, game, frames, delays):
+        self.pending.discard(game)
+        pixmaps = [QPixmap.fromImage(frame) for frame in frames]
+        if game in self.memory:
+            self.memory_bytes -= self.entry_bytes(self.memory.pop(game))
+        self.memory[game] = (pixmaps, delays)
+        self.memory_bytes += self.entry_bytes(self.memory[game])
+        for old_game in [old_game for old_game in self.memory if old_game not in (game, self.keep)]:
+            if self.memory_bytes <= PREVIEW_MEMORY_CACHE_BYTES:
+                break
+            self.memory_bytes -= self.entry_bytes(self.memory.pop(old_game))
+            self.evicted.emit(old_game)
+        self.ready.emit(game)
+
+    @staticmethod
+    def entry_bytes(entry):
+        pixmaps, _ = entry
+        return sum(pixmap.width() * pixmap.height() * 4 for pixmap in pixmaps)
 
 class WelcomeScreen(QWidget):
     """First screen that asks for the player's name."""
@@ -90,13 +339,38 @@ class MainMenu(QWidget):
         self.greeting_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.greeting_label)
 
-        # Create and configure the games list
+        # Create and configure the games list, with a blank icon until each game's thumbnail has loaded
         self.games_list = QListWidget()
+        self.games_list.setIconSize(THUMBNAIL_SIZE)
+        self.games_list.setUniformItemSizes(True)  # Lets the list lay out a large library without measuring every item
+        blank = QPixmap(THUMBNAIL_SIZE)
+        blank.fill(Qt.GlobalColor.transparent)
+        self.loading_icon = QIcon(blank)
+        self.items = {}
         for game in self.games:
             formatted_name = self.format_game_name(game)
-            self.games_list.addItem(formatted_name)
+            item = QListWidgetItem(self.loading_icon, formatted_name)
+            self.games_list.addItem(item)
+            self.items[game] = item
         layout.addWidget(self.games_list)
 
+        # Load thumbnails in the background, only for the games scrolled into view
+        self.previews = PreviewLoader(self)
+        self.previews.ready.connect(self.show_preview)
+        self.previews.evicted.connect(self.clear_preview)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(50)  # Wait for scrolling to settle a little
+        self.preview_timer.timeout.connect(self.load_visible_previews)
+        self.games_list.verticalScrollBar().valueChanged.connect(self.schedule_previews)
+
+        # The selected game's clip, if it has one, plays in its list item
+        self.clip = None  # (game, pixmaps, delays, frame index)
+        self.clip_timer = QTimer(self)
+        self.clip_timer.setSingleShot(True)
+        self.clip_timer.timeout.connect(self.next_clip_frame)
+        self.games_list.currentItemChanged.connect(self.play_clip)
+
         # Create and configure the play and scoreboard buttons
         btn_layout = QHBoxLayout()
         self.play_button = QPushButton("Play")
@@ -104,8 +378,12 @@ class MainMenu(QWidget):
         self.scoreboard_button = QPushButton("View Scoreboard")
         self.scoreboard_button.clicked.connect(self.view_scoreboard)
 
+        self.profile_button = QPushButton("My Profile")
+        self.profile_button.clicked.connect(self.main_window.show_profile)
+
         btn_layout.addWidget(self.play_button)
         btn_layout.addWidget(self.scoreboard_button)
+        btn_layout.addWidget(self.profile_button)
         layout.addLayout(btn_layout)
 
         # Create and configure the exit button
@@ -115,6 +393,81 @@ class MainMenu(QWidget):
 
         self.setLayout(layout)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.schedule_previews()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_previews()
+
+    def schedule_previews(self):
+        self.preview_timer.start()
+
+    def visible_games(self):
+        """The games on screen, then a screenful either side of them so scrolling finds those ready too."""
+        view = self.games_list
+        count = view.count()
+        if count == 0 or not view.isVisible():
+            return []
+        viewport = view.viewport().rect()
+        first = max(view.indexAt(viewport.topLeft()).row(), 0)
+        last = view.indexAt(viewport.bottomLeft()).row()
+        if last < 0:  # The list ends above the bottom of the view
+            last = count - 1
+        page = last - first + 1
+        rows = list(range(first, last + 1)) + list(range(last + 1, min(count, last + 1 + page)))
+        rows += range(first - 1, max(-1, first - 1 - page), -1)
+        return [self.games[row] for row in rows]
+
+    def load_visible_previews(self):
+        games = self.visible_games()
+        for game in games:
+            if self.previews.get(game) is not None:
+                self.show_preview(game)
+        self.previews.request(games)
+
+    def show_preview(self, game):
+        """Give a game's list item its thumbnail (called when it has loaded)."""
+        pixmaps, delays = self.previews.get(game)
+        item = self.items[game]
+        if self.clip is None or self.clip[0] != game:
+            item.setIcon(QIcon(pixmaps[0]))
+        if item is self.games_list.currentItem() and delays and self.clip is None:
+            self.play_clip(item, None)
+
+    def clear_preview(self, game):
+        """A thumbnail dropped from the memory cache: go back to the blank icon so the item lets go of it too."""
+        self.items[game].setIcon(self.loading_icon)
+        if self.clip is not None and self.clip[0] == game:
+            self.clip_timer.stop()
+            self.clip = None
+
+    def play_clip(self, current, previous):
+        """Start the newly selected game's clip (if it has one) and put the previous one back on its first frame."""
+        self.clip_timer.stop()
+        if self.clip is not None:
+            game, pixmaps, _, _ = self.clip
+            self.items[game].setIcon(QIcon(pixmaps[0]))
+            self.clip = None
+        if current is None:
+            self.previews.keep = None
+            return
+        game = self.games[self.games_list.row(current)]
+        self.previews.keep = game
+        entry = self.previews.get(game)
+        if entry is not None and entry[1]:
+            pixmaps, delays = entry
+            self.clip = (game, pixmaps, delays, 0)
+            self.clip_timer.start(delays[0])
+
+    def next_clip_frame(self):
+        game, pixmaps, delays, frame = self.clip
+        frame = (frame + 1) % len(pixmaps)
+        self.clip = (game, pixmaps, delays, frame)
+        self.items[game].setIcon(QIcon(pixmaps[frame]))
+        self.clip_timer.start(delays[frame])
+
     def update_greeting(self):
         """Update the greeting label with the player's name."""
         self.greeting_label.setText(f"Hello, {self.main_window.player_name}!")
@@ -150,6 +503,126 @@ class MainMenu(QWidget):
             game_name = selected_game.text().replace(' ', '_').lower()  # Convert back to the original game name format
             self.main_window.show_scoreboard(game_name)
 
+class ScoreboardPageJob(QRunnable):
+    """Reads one page of a scoreboard on the thread pool, where building its sorted index can't stall the GUI."""
+    def __init__(self, model, start):
+        super().__init__()
+        self.model = model
+        self.generation = model.generation
+        self.query = (model.game_name, start, model.PAGE_SIZE, model.sort_column, model.descending,
+                      model.player_filter, model.source)
+
+    def run(self):
+        if self.generation != self.model.generation:  # Sorted or filtered again before a thread got to it
+            return
+        try:
+            result = scoreboard.read_page(*self.query)
+        except Exception as e:
+            print(f"Error reading the {self.query[0]} scoreboard: {e}")
+            result = None
+        self.model.page_loaded.emit(self.generation, self.query[1], result)
+
+class ScoreboardModel(QAbstractTableModel):
+    """Table model that pages rows in from the scoreboard storage, on a worker thread, as the view scrolls."""
+    PAGE_SIZE = 200  # Rows fetched from disk each time the view asks for more
+    HEADERS = ["Player", "Score"]
+    page_loaded = pyqtSignal(int, int, object)  # Emitted by the jobs from the pool thread
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.game_name = None
+        self.sort_column = scoreboard.SORT_SCORE
+        self.descending = True
+        self.player_filter = ""
+        self.total_rows = 0
+        self.source = None  # The backend that answered the first page; the rest are read from it too
+        self.rows = []
+        self.generation = 0  # Bumped by every refresh, so pages of an older query are dropped
+        self.loading = False
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.page_loaded.connect(self.add_page)
+
+    def load(self, game_name):
+        """Point the model at a game's scoreboard and start again from the first page."""
+        self.game_name = game_name
+        self.refresh()
+
+    def refresh(self):
+        """Drop the loaded rows and re-query the scoreboard with the current sort and filter."""
+        self.generation += 1
+        self.beginResetModel()
+        self.rows = []
+        self.total_rows = 0
+        self.source = None
+        self.endResetModel()
+        self.loading = False
+        if self.game_name:
+            self.read_page(0)
+
+    def read_page(self, start):
+        self.loading = True
+        self.pool.start(ScoreboardPageJob(self, start))
+
+    def add_page(self, generation, start, result):
+        """Append a page read by a ScoreboardPageJob, unless the query has changed since it was started."""
+        if generation != self.generation:
+            return
+        self.loading = False
+        if result is None:
+            return
+        total, page, source = result
+        if start == 0:
+            self.total_rows, self.source = total, source
+        elif source != self.source or total != self.total_rows:
+            self.refresh()  # The scoreboard changed, or the service came or went, since the first page
+            return
+        if not page:
+            self.total_rows = start  # Rows that no longer parse, stop asking for more
+            return
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def set_filter(self, text):
+        self.player_filter = text.strip()
+        self.refresh()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return str(self.rows[index.row()][index.column()])
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        if self.sort_column != scoreboard.SORT_SCORE:
+            return None  # A row's position in the player order isn't a rank
+        return str(section + 1 if self.descending else self.total_rows - section)  # Row headers show the rank
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.loading and len(self.rows) < self.total_rows
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Start reading the next page of rows; add_page appends it when it arrives."""
+        if parent.isValid() or self.loading:
+            return
+        self.read_page(len(self.rows))
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Sorting is done by the scoreboard storage, so only the visible page is ever re-read."""
+        self.sort_column = column
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self.refresh()
+
 class ScoreboardScreen(QWidget):
     """Displays the scoreboard for a specific game."""
     def __init__(self, main_window):
@@ -157,10 +630,25 @@ class ScoreboardScreen(QWidget):
         self.main_window = main_window
         layout = QVBoxLayout()
 
+        # Create and configure the player filter box
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter by player...")
+        self.filter_input.textChanged.connect(self.schedule_filter)
+        layout.addWidget(self.filter_input)
+
+        # Wait for typing to pause before re-querying the scoreboard
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.timeout.connect(self.apply_filter)
+
         # Create and configure the scoreboard table
-        self.table = QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["Player", "Score"])
+        self.model = ScoreboardModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSortIndicator(scoreboard.SORT_SCORE, Qt.SortOrder.DescendingOrder)
         layout.addWidget(self.table)
 
         # Create and configure the back button
@@ -170,16 +658,71 @@ class ScoreboardScreen(QWidget):
 
         self.setLayout(layout)
 
+    def schedule_filter(self):
+        self.filter_timer.start()
+
+    def apply_filter(self):
+        self.model.set_filter(self.filter_input.text())
+
     def update_scores(self, game_name):
         """Update the scoreboard with the latest scores for the selected game."""
-        scores = scoreboard.display_scoreboard(game_name)
-        # Sort scores in descending order and take the top 10
-        top_scores = sorted(scores, key=lambda x: x[1], reverse=True)[:10]
-        self.table.setRowCount(len(top_scores))
+        self.filter_timer.stop()
+        self.filter_input.blockSignals(True)
+        self.filter_input.clear()
+        self.filter_input.blockSignals(False)
+        self.model.player_filter = ""
+        self.model.load(game_name)
+
+class PlayerProfileScreen(QWidget):
+    """Shows the current player's totals across every game, read from the scoreboard's running stats."""
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        layout = QVBoxLayout()
+
+        # Create and configure the overall summary label
+        self.summary_label = QLabel()
+        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.summary_label.setFont(QFont("Arial", 14))
+        layout.addWidget(self.summary_label)
+
+        # Create and configure the per-game stats table
+        self.table = QTableWidget()
+        self.table.setColumnCount(5)
+        self.table.setHorizontalHeaderLabels(["Game", "Played", "Best", "Average", "Latest"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        # Create and configure the back button
+        self.back_button = QPushButton("Back to Menu")
+        self.back_button.clicked.connect(self.main_window.show_main_menu)
+        layout.addWidget(self.back_button)
+
+        self.setLayout(layout)
 
-        for row, (player, score) in enumerate(top_scores):
-            self.table.setItem(row, 0, QTableWidgetItem(player))
-            self.table.setItem(row, 1, QTableWidgetItem(str(score)))
+    def update_profile(self, player_name):
+        """Fill the screen with the player's stats for each game they have played."""
+        stats = scoreboard.player_stats(player_name)
+        self.table.setRowCount(len(stats))
+
+        for row, (game, totals) in enumerate(sorted(stats.items())):
+            average = totals["sum"] / totals["count"]
+            self.table.setItem(row, 0, QTableWidgetItem(self.main_window.main_menu.format_game_name(game)))
+            self.table.setItem(row, 1, QTableWidgetItem(str(totals["count"])))
+            self.table.setItem(row, 2, QTableWidgetItem(str(totals["best"])))
+            self.table.setItem(row, 3, QTableWidgetItem(f"{average:.1f}"))
+            self.table.setItem(row, 4, QTableWidgetItem(str(totals["latest"])))
+
+        if not stats:
+            self.summary_label.setText(f"{player_name} hasn't played any games yet.")
+            return
+
+        played = sum(totals["count"] for totals in stats.values())
+        best_game, best_totals = max(stats.items(), key=lambda item: item[1]["best"])
+        average = sum(totals["sum"] for totals in stats.values()) / played
+        self.summary_label.setText(
+            f"{player_name}: {played} games played, average score {average:.1f}, "
+            f"best {best_totals['best']} in {self.main_window.main_menu.format_game_name(best_game)}")
 
 class GameMenuApp(QWidget):
     """Manages different screens and navigation."""
@@ -195,11 +738,13 @@ class GameMenuApp(QWidget):
         self.welcome_screen = WelcomeScreen(self)
         self.main_menu = MainMenu(self)
         self.scoreboard_screen = ScoreboardScreen(self)
+        self.profile_screen = PlayerProfileScreen(self)
 
         # Add screens to the stack
         self.stack.addWidget(self.welcome_screen)
         self.stack.addWidget(self.main_menu)
         self.stack.addWidget(self.scoreboard_screen)
+        self.stack.addWidget(self.profile_screen)
 
         layout = QVBoxLayout()
         layout.addWidget(self.stack)
@@ -230,6 +775,11 @@ class GameMenuApp(QWidget):
         self.scoreboard_screen.update_scores(game_name)
         self.stack.setCurrentWidget(self.scoreboard_screen)
 
+    def show_profile(self):
+        """Show the current player's stats across all games."""
+        self.profile_screen.update_profile(self.player_name)
+        self.stack.setCurrentWidget(self.profile_screen)
+
     def play_game(self, game_name):
         """Start the selected game."""
         QMessageBox.information(self, "Playing Game", f"Starting {game_name}...")
@@ -5,7 +5,7 @@ File: scoreboard_manager.py
 Description: create/update/display scoreboards
 Author: Cameron Carlisle
 Date created: 12/02/2025
-Last modified: 25/02/2025
+Last modified: 19/10/2026
 Version: 1.1
 
 This script allows you to create and update scoreboards for multiple games. Each game's scoreboard is stored in a CSV file (with headers - "Player" and "Score"),
@@ -14,39 +14,494 @@ The filename for each scoreboard is dynamically generated taking into account th
 
 Usage:
 1. Call 'create_scoreboard(game_name)' to initialize a scoreboard for a new game.
-2. Call 'update_scoreboard(game_name, player_name, score)' to add a new score to the scoreboard.
+2. Call 'update_scoreboard(game_name, player_name, score)' to add a new score to the scoreboard. Scores are written
+   in the background; call 'flush_scoreboards()' to wait for them (this also happens when the process exits).
 3. Call 'display_scoreboard(game_name)' to view the current top 10 scores.
+4. Call 'count_scores(game_name)' and 'read_scores(game_name, start, count)' to page through the full history of a scoreboard,
+   or 'read_page(game_name, start, count)' to get the count with each page.
+5. Call 'player_stats(player_name)' or 'game_stats(game_name)' for running totals (games played, best, sum and latest score).
+
+If a scoreboard service (see scoreboard_service.py) is running, these calls are sent to it instead of reading the CSV files.
 
 Contact: cameroncarlisle1992@gmail.com
 """
 import os
 import csv
+import copy
+import errno
+import json
+import time
+import queue
+import atexit
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import numpy as np  # Optional, sorts large scoreboard indexes without a Python object per row
+except ImportError:
+    np = None
+
+try:
+    import fcntl  # POSIX file locking
+except ImportError:
+    fcntl = None
+    import msvcrt  # Windows file locking
 
 SCOREBOARD_DIR = os.path.join(os.path.dirname(__file__), 'scoreboards')
 
+# Columns that a scoreboard can be sorted by when paging through it
+SORT_PLAYER, SORT_SCORE = 0, 1
+
+# How many sorted/filtered row indexes to keep around (one per game/sort/filter combination)
+INDEX_CACHE_SIZE = 8
+
+# How long the background writer waits to gather a batch of scores, and the most it writes at once
+FLUSH_INTERVAL = 0.5
+FLUSH_BATCH_SIZE = 256
+
+# How many times to retry a Windows file lock before giving up (each attempt waits about 10 seconds)
+LOCK_ATTEMPTS = 6
+
+# Set to False (or ARCADE_SCOREBOARD_SERVICE=0) to always use the scoreboard files directly, even if a service is running
+USE_SERVICE = os.environ.get("ARCADE_SCOREBOARD_SERVICE", "1") != "0"
+
+# Set to True (as the menu does) to open service connections on a helper thread, so callers never wait on a connect
+CONNECT_IN_BACKGROUND = False
+
 # Ensure the scoreboards directory exists
 if not os.path.exists(SCOREBOARD_DIR):
     os.makedirs(SCOREBOARD_DIR)
 
-def create_scoreboard(game_name):
-    scoreboard_file = os.path.join(SCOREBOARD_DIR, f"{game_name}_scoreboard.csv")
+STATS_FILE = os.path.join(SCOREBOARD_DIR, 'player_stats.json')
+STATS_LOCK_FILE = os.path.join(SCOREBOARD_DIR, 'player_stats.lock')
+SCOREBOARD_SUFFIX = "_scoreboard.csv"
+
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()  # The menu reads pages from a worker thread
+_stats_cache = (None, None)  # (file stat, parsed stats) of the last player_stats.json read
+
+def _call_service(op, *args):
+    """
+    Send an operation to the scoreboard service. Returns (True, result) if the service handled it,
+    or (False, None) if it is disabled or not running, in which case the caller uses the files directly.
+    """
+    if not USE_SERVICE:
+        return False, None
+    import scoreboard_service  # Imported here because the service itself imports this module
+    try:
+        return scoreboard_service.get_client().call(op, *args)
+    except scoreboard_service.ScoreboardServiceError as e:
+        print(f"Scoreboard service couldn't {op}, using the scoreboard files instead: {e}")
+        return False, None
+
+def _scoreboard_path(game_name):
+    return os.path.join(SCOREBOARD_DIR, f"{game_name}{SCOREBOARD_SUFFIX}")
+
+def _parse_row(line):
+    """Parse one raw CSV record (bytes) into a (player, score) tuple, or None if it is malformed."""
+    text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+    if '"' in text:
+        row = next(csv.reader([text]), None)
+        if not row or len(row) < 2:
+            return None
+        player, score = row[0], row[1]
+    else:
+        player, _, score = text.rpartition(",")
+    try:
+        return player, int(score)
+    except ValueError:
+        return None
+
+def _records(file):
+    """Yield the raw CSV records of a file opened in binary mode. A quoted name containing a newline spans several lines."""
+    pending = b""
+    for line in file:
+        if pending or b'"' in line:
+            pending += line
+            if pending.count(b'"') % 2:
+                continue  # Still inside a quoted field
+            line, pending = pending, b""
+        yield line
+    if pending:
+        yield pending
+
+def _read_record(file):
+    """Read the single CSV record starting at the file's current position."""
+    record = file.readline()
+    while record.count(b'"') % 2:
+        line = file.readline()
+        if not line:
+            break
+        record += line
+    return record
+
+def _sorted_offsets(offsets, keys, descending):
+    """Return the offsets reordered by their keys (stable, so equal keys stay in file order)."""
+    if np is None:
+        order = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+        return array("q", (offsets[i] for i in order))
+    keys = np.frombuffer(keys, dtype=np.int64)
+    order = np.argsort(-keys if descending else keys, kind="stable")
+    index = array("q")
+    index.frombytes(np.frombuffer(offsets, dtype=np.int64)[order].tobytes())
+    return index
+
+def _build_index(scoreboard_file, sort_column, descending, player_filter):
+    """
+    Scan the scoreboard once and return the byte offsets of every matching row, in sorted order.
+    Offsets and sort keys are packed 8 bytes per row; the rows themselves are re-read a page at a time.
+    """
+    offsets = array("q")
+    keys = array("q")
+    names = {}  # Casefolded player name -> id, so sorting by player only keeps each distinct name once
+    needle = player_filter.casefold()
+
+    with open(scoreboard_file, mode='rb') as file:
+        records = _records(file)
+        offset = len(next(records, b""))  # Skip header row
+        for record in records:
+            row = _parse_row(record)
+            if row is not None and needle in row[0].casefold():
+                offsets.append(offset)
+                if sort_column == SORT_PLAYER:
+                    keys.append(names.setdefault(row[0].casefold(), len(names)))
+                else:
+                    keys.append(row[1])
+            offset += len(record)
+
+    if sort_column == SORT_PLAYER:  # Swap each name's id for its alphabetical position
+        position = array("q", bytes(8 * len(names)))
+        for rank, name in enumerate(sorted(names)):
+            position[names[name]] = rank
+        keys = array("q", (position[key] for key in keys))
+    return _sorted_offsets(offsets, keys, descending)
+
+def _get_index(game_name, sort_column, descending, player_filter):
+    scoreboard_file = _scoreboard_path(game_name)
     if not os.path.exists(scoreboard_file):
-        with open(scoreboard_file, mode='w', newline='') as file:
+        return None
+
+    stat = os.stat(scoreboard_file)
+    key = (game_name, sort_column, descending, player_filter)
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            _index_cache.move_to_end(key)
+            return cached[1]
+
+    index = _build_index(scoreboard_file, sort_column, descending, player_filter)  # Outside the lock, it's slow
+    with _index_lock:
+        _index_cache[key] = ((stat.st_mtime_ns, stat.st_size), index)
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+def _lock_file(file):
+    """Block until this process holds an exclusive lock on the open scoreboard file."""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        for attempt in range(LOCK_ATTEMPTS):
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError as e:
+                if e.errno != errno.EDEADLOCK or attempt == LOCK_ATTEMPTS - 1:
+                    raise  # Only a timed-out LK_LOCK (~10 seconds) is worth waiting on again
+
+def _unlock_file(file):
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _append_rows(game_name, rows):
+    """Append rows (and a new file's header) to a scoreboard under an exclusive file lock, fsynced before unlocking."""
+    with open(_scoreboard_path(game_name), mode='a', newline='', encoding='utf-8') as file:
+        _lock_file(file)
+        try:
             writer = csv.writer(file)
-            writer.writerow(["Player", "Score"])
+            if os.fstat(file.fileno()).st_size == 0:
+                writer.writerow(["Player", "Score"])
+            writer.writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+        finally:
+            _unlock_file(file)
+
+def _new_aggregate():
+    return {"count": 0, "best": None, "sum": 0, "latest": None}
+
+def _add_to_stats(stats, game_name, rows):
+    """Fold new (player, score) rows into the per-game and per-player running totals."""
+    game_totals = stats["games"].setdefault(game_name, _new_aggregate())
+    for player_name, score in rows:
+        score = int(score)
+        player_totals = stats["players"].setdefault(player_name, {}).setdefault(game_name, _new_aggregate())
+        for totals in (game_totals, player_totals):
+            totals["count"] += 1
+            totals["sum"] += score
+            totals["best"] = score if totals["best"] is None else max(totals["best"], score)
+            totals["latest"] = score
+
+def _rebuild_stats():
+    """Build the running totals from scratch by scanning every scoreboard (only needed the first time)."""
+    stats = {"games": {}, "players": {}}
+    for filename in sorted(os.listdir(SCOREBOARD_DIR)):
+        if not filename.endswith(SCOREBOARD_SUFFIX):
+            continue
+        with open(os.path.join(SCOREBOARD_DIR, filename), mode='rb') as file:
+            records = _records(file)
+            next(records, None)  # Skip header row
+            rows = [row for row in map(_parse_row, records) if row is not None]
+        _add_to_stats(stats, filename[:-len(SCOREBOARD_SUFFIX)], rows)
+    return stats
+
+@contextmanager
+def _stats_locked():
+    """Hold the lock that keeps player_stats.json in step with the scoreboard files, across processes."""
+    with open(STATS_LOCK_FILE, mode='a') as lock:
+        _lock_file(lock)
+        try:
+            yield
+        finally:
+            _unlock_file(lock)
+
+def _read_stats():
+    """Return the saved running totals (re-read only when the file changes), or None if it is missing or corrupt."""
+    global _stats_cache
+    try:
+        stat = os.stat(STATS_FILE)
+    except FileNotFoundError:
+        return None
+
+    file_stat = (stat.st_mtime_ns, stat.st_size)
+    if _stats_cache[0] != file_stat:
+        try:
+            with open(STATS_FILE, mode='r', encoding='utf-8') as file:
+                _stats_cache = (file_stat, json.load(file))
+        except ValueError:
+            return None
+    return _stats_cache[1]
+
+def _save_rebuilt_stats():
+    stats = _rebuild_stats()
+    try:
+        _write_stats(stats)
+    except OSError as e:
+        print(f"Error saving rebuilt scoreboard stats: {e}")
+    return stats
+
+def _load_stats(locked=False):
+    """Return the running totals, rebuilding them from the scoreboards (once, and saved) if the file is unusable."""
+    stats = _read_stats()
+    if stats is None:
+        if locked:
+            return _save_rebuilt_stats()
+        with _stats_locked():
+            stats = _read_stats()  # Another process may have rebuilt them while we waited for the lock
+            if stats is None:
+                stats = _save_rebuilt_stats()
+    return stats
+
+def _write_stats(stats):
+    """
+    Replace player_stats.json atomically, so a reader never sees a half-written file. This rewrites every player's
+    totals, which is cheap at an arcade's scale and happens once per batch of scores, not once per score.
+    """
+    global _stats_cache
+    temp_file = f"{STATS_FILE}.{os.getpid()}.tmp"
+    with open(temp_file, mode='w', encoding='utf-8') as file:
+        json.dump(stats, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, STATS_FILE)
+    stat = os.stat(STATS_FILE)
+    _stats_cache = ((stat.st_mtime_ns, stat.st_size), stats)
+
+def _record_scores(game_name, rows):
+    """
+    Append rows to a scoreboard and fold them into the running totals. The stats lock is held across both
+    steps, so the totals always match the scoreboard files even with several processes writing.
+    """
+    global _stats_cache
+    with _stats_locked():
+        stats = copy.deepcopy(_load_stats(locked=True))  # Readers may hold the cached totals, so never change them
+        try:
+            _append_rows(game_name, rows)
+            _add_to_stats(stats, game_name, rows)
+            _write_stats(stats)
+        except Exception:
+            # The rows may be on disk without their totals: drop the saved totals so the next read rebuilds them
+            _stats_cache = (None, None)
+            try:
+                os.remove(STATS_FILE)
+            except OSError:
+                pass
+            raise
+
+class ScoreboardWriter:
+    """Appends queued scores from a background thread, writing those within FLUSH_INTERVAL of each other together."""
+    _FLUSH = object()  # Queue marker that makes the writer stop gathering and write what it has
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, batch_size=FLUSH_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, game_name, player_name, score):
+        """Queue a score to be written; returns immediately."""
+        self._ensure_started()
+        self._queue.put((game_name, player_name, score))
+
+    def flush(self):
+        """Block until every score queued so far has been written to disk."""
+        if self._thread is None:
+            return
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ScoreboardWriter", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        """Wait for a score, then keep gathering until the interval passes, the batch fills or a flush is asked for."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while batch[-1] is not self._FLUSH and len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:  # Always, or flush() would wait forever on a batch that failed
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        rows_by_game = {}
+        for item in batch:
+            if item is not self._FLUSH:
+                game_name, player_name, score = item
+                rows_by_game.setdefault(game_name, []).append([player_name, score])
+
+        for game_name, rows in rows_by_game.items():
+            try:
+                _record_scores(game_name, rows)
+            except Exception as e:  # Keep the writer alive for the next batch whatever went wrong
+                print(f"Error writing scoreboard for {game_name}: {e}")
+
+_writer = ScoreboardWriter()
+
+def flush_scoreboards():
+    """Wait for all queued scores to be written. Registered to run automatically at interpreter exit."""
+    _writer.flush()
+
+atexit.register(flush_scoreboards)
+
+def create_scoreboard(game_name):
+    handled, _ = _call_service("create_scoreboard", game_name)
+    if handled:
+        return
+    scoreboard_file = _scoreboard_path(game_name)
+    if not os.path.exists(scoreboard_file):
+        _append_rows(game_name, [])
 
 def update_scoreboard(game_name, player_name, score):
-    scoreboard_file = os.path.join(SCOREBOARD_DIR, f"{game_name}_scoreboard.csv")
-    with open(scoreboard_file, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([player_name, score])
+    handled, _ = _call_service("update_scoreboard", game_name, player_name, score)
+    if handled:
+        return
+    _writer.submit(game_name, player_name, score)
 
 def display_scoreboard(game_name):
-    scoreboard_file = os.path.join(SCOREBOARD_DIR, f"{game_name}_scoreboard.csv")
+    handled, rows = _call_service("display_scoreboard", game_name)
+    if handled:
+        return [tuple(row) for row in rows]
+    scoreboard_file = _scoreboard_path(game_name)
     if not os.path.exists(scoreboard_file):
         return []
 
-    with open(scoreboard_file, mode='r', newline='') as file:
+    with open(scoreboard_file, mode='r', newline='', encoding='utf-8') as file:
         reader = csv.reader(file)
         next(reader)  # Skip header row
-        return [(row[0], int(row[1])) for row in reader]
\ No newline at end of file
+        return [(row[0], int(row[1])) for row in reader]
+
+def count_scores(game_name, player_filter="", sort_column=SORT_SCORE, descending=True):
+    """Return how many rows of the scoreboard match the (case-insensitive) player filter."""
+    handled, total = _call_service("count_scores", game_name, player_filter, sort_column, descending)
+    if handled:
+        return total
+    index = _get_index(game_name, sort_column, descending, player_filter)
+    return len(index) if index is not None else 0
+
+def read_scores(game_name, start, count, sort_column=SORT_SCORE, descending=True, player_filter=""):
+    """
+    Return up to 'count' (player, score) rows starting at position 'start' of the sorted, filtered scoreboard.
+    Sorting and filtering happen here rather than in the caller, so a view only ever holds the rows it shows.
+    """
+    handled, rows = _call_service("read_scores", game_name, start, count, sort_column, descending, player_filter)
+    if handled:
+        return [tuple(row) for row in rows]
+    index = _get_index(game_name, sort_column, descending, player_filter)
+    return _read_rows(game_name, index, start, count) if index is not None else []
+
+def read_page(game_name, start, count, sort_column=SORT_SCORE, descending=True, player_filter="", source=None):
+    """
+    Like read_scores, but return (total, rows, source): the number of matching rows and the page, both from the same
+    backend, and which one that was ("service" or "files"). Pass source back for the following pages to stay on it.
+    """
+    if source != "files":
+        handled, result = _call_service("read_page", game_name, start, count, sort_column, descending, player_filter)
+        if handled:
+            total, rows = result
+            return total, [tuple(row) for row in rows], "service"
+    index = _get_index(game_name, sort_column, descending, player_filter)
+    if index is None:
+        return 0, [], "files"
+    return len(index), _read_rows(game_name, index, start, count), "files"
+
+def _read_rows(game_name, index, start, count):
+    rows = []
+    with open(_scoreboard_path(game_name), mode='rb') as file:
+        for offset in index[start:start + count]:
+            file.seek(offset)
+            row = _parse_row(_read_record(file))
+            if row is not None:
+                rows.append(row)
+    return rows
+
+def player_stats(player_name):
+    """
+    Return a player's running totals for every game they have played, as
+    {game_name: {"count": ..., "best": ..., "sum": ..., "latest": ...}}.
+    """
+    handled, totals = _call_service("player_stats", player_name)
+    if handled:
+        return totals
+    return copy.deepcopy(_load_stats()["players"].get(player_name, {}))
+
+def game_stats(game_name):
+    """Return the running totals for every score recorded for a game (see player_stats for the keys)."""
+    handled, totals = _call_service("game_stats", game_name)
+    if handled:
+        return totals
+    return dict(_load_stats()["games"].get(game_name, _new_aggregate()))
@@ -0,0 +1,373 @@
+"""
+Scoreboard Service
+
+File: scoreboard_service.py
+Description: optional local leaderboard daemon shared by the menu and games
+Author: Cameron Carlisle
+Date created: 19/10/2026
+Last modified: 19/10/2026
+Version: 1.1
+
+Runs scoreboard_manager's operations in one long-lived process over a TCP socket, so every cabinet pointed at it
+shares one leaderboard. scoreboard_manager uses it when it is reachable and falls back to the CSV files when not.
+
+Off the loopback address it needs ARCADE_SCOREBOARD_TOKEN, set to the same value on every cabinet. The token is
+sent in plain text, so only use it on a network you trust.
+
+Usage:
+1. Run 'python scoreboard_service.py' on the machine that should hold the scoreboards. To share it, set
+   ARCADE_SCOREBOARD_TOKEN and run 'python scoreboard_service.py --host 0.0.0.0'.
+2. On other cabinets, set ARCADE_SCOREBOARD_HOST (and ARCADE_SCOREBOARD_PORT if changed) to that machine's address,
+   and ARCADE_SCOREBOARD_TOKEN to the same token.
+3. Use scoreboard_manager as normal.
+
+Contact: cameroncarlisle1992@gmail.com
+"""
+import os
+import hmac
+import json
+import time
+import queue
+import socket
+import argparse
+import ipaddress
+import threading
+import socketserver
+
+import scoreboard_manager as scoreboard
+
+SERVICE_HOST = os.environ.get("ARCADE_SCOREBOARD_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("ARCADE_SCOREBOARD_PORT", "47820"))
+SERVICE_TOKEN = os.environ.get("ARCADE_SCOREBOARD_TOKEN", "")  # Shared secret, required to listen beyond loopback
+
+CONNECT_TIMEOUT = 0.5  # Seconds to wait when opening a connection to the service
+REQUEST_TIMEOUT = 5.0  # Seconds to wait for the service to answer a request
+RETRY_INTERVAL = 5.0  # After failing to reach the service, use the files directly for this long before trying again
+POOL_SIZE = 4  # Idle connections each client process keeps open
+
+class ScoreboardServiceError(Exception):
+    """Raised when the service reports that an operation failed."""
+
+class _StaleConnection(Exception):
+    """The service closed a connection before answering anything on it, e.g. a pooled one after a restart."""
+
+class _GameBoard:
+    """In-memory copy of one game's scoreboard plus the rows still waiting to be written."""
+    def __init__(self, game_name):
+        self.game_name = game_name
+        self.rows = []
+        self.pending = []
+        self.indexes = {}  # (sort_column, descending, player_filter) -> sorted list of row positions
+        self.file_stat = None
+
+    def load(self):
+        """(Re)load the rows from disk if the file changed behind the service's back."""
+        path = scoreboard._scoreboard_path(self.game_name)
+        try:
+            stat = os.stat(path)
+            file_stat = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            file_stat = None
+        if file_stat == self.file_stat:
+            return
+        self.rows = scoreboard.display_scoreboard(self.game_name) + [tuple(row) for row in self.pending]
+        self.indexes = {}
+        self.file_stat = file_stat
+
+    def record_written(self):
+        path = scoreboard._scoreboard_path(self.game_name)
+        stat = os.stat(path)
+        self.file_stat = (stat.st_mtime_ns, stat.st_size)
+
+    def index(self, sort_column, descending, player_filter):
+        key = (sort_column, descending, player_filter)
+        order = self.indexes.get(key)
+        if order is None:
+            needle = player_filter.casefold()
+            matching = [i for i, row in enumerate(self.rows) if needle in row[0].casefold()]
+            if sort_column == scoreboard.SORT_PLAYER:
+                order = sorted(matching, key=lambda i: self.rows[i][0].casefold(), reverse=descending)
+            else:
+                order = sorted(matching, key=lambda i: self.rows[i][1], reverse=descending)
+            self.indexes[key] = order
+        return order
+
+class ScoreboardService:
+    """The operations exposed over the socket. Every public method here mirrors one in scoreboard_manager."""
+    OPERATIONS = ("create_scoreboard", "update_scoreboard", "display_scoreboard", "count_scores", "read_scores",
+                  "read_page", "flush_scoreboards", "player_stats", "game_stats")
+
+    def __init__(self, flush_interval=scoreboard.FLUSH_INTERVAL, token=SERVICE_TOKEN):
+        self.flush_interval = flush_interval
+        self.token = token
+        self._boards = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="ScoreboardFlusher", daemon=True)
+
+    def start(self):
+        self._flusher.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush_scoreboards()
+
+    def _board(self, game_name):
+        board = self._boards.get(game_name)
+        if board is None:
+            board = self._boards[game_name] = _GameBoard(game_name)
+        if not board.pending:
+            board.load()  # Pick up anything written directly while the service was unreachable
+        return board
+
+    def create_scoreboard(self, game_name):
+        with self._lock:
+            scoreboard.create_scoreboard(game_name)
+            self._board(game_name)
+
+    def update_scoreboard(self, game_name, player_name, score):
+        with self._lock:
+            board = self._board(game_name)
+            board.rows.append((player_name, int(score)))
+            board.pending.append([player_name, int(score)])
+            board.indexes = {}
+
+    def display_scoreboard(self, game_name):
+        with self._lock:
+            return list(self._board(game_name).rows)
+
+    def count_scores(self, game_name, player_filter="", sort_column=scoreboard.SORT_SCORE, descending=True):
+        with self._lock:
+            return len(self._board(game_name).index(sort_column, descending, player_filter))
+
+    def read_scores(self, game_name, start, count, sort_column=scoreboard.SORT_SCORE, descending=True,
+                    player_filter=""):
+        with self._lock:
+            board = self._board(game_name)
+            order = board.index(sort_column, descending, player_filter)
+            return [board.rows[i] for i in order[start:start + count]]
+
+    def read_page(self, game_name, start, count, sort_column=scoreboard.SORT_SCORE, descending=True, player_filter=""):
+        with self._lock:
+            board = self._board(game_name)
+            order = board.index(sort_column, descending, player_filter)
+            return len(order), [board.rows[i] for i in order[start:start + count]]
+
+    def flush_scoreboards(self):
+        """Write every pending score to disk now."""
+        with self._lock:
+            for board in self._boards.values():
+                if not board.pending:
+                    continue
+                try:
+                    scoreboard._record_scores(board.game_name, board.pending)
+                except Exception as e:  # Keep the flush timer alive for the next scores whatever went wrong
+                    print(f"Error writing scoreboard for {board.game_name}: {e}")
+                    continue
+                board.pending = []
+                board.record_written()
+
+    def player_stats(self, player_name):
+        self.flush_scoreboards()  # Fold in any scores still waiting to be written
+        return scoreboard.player_stats(player_name)
+
+    def game_stats(self, game_name):
+        self.flush_scoreboards()
+        return scoreboard.game_stats(game_name)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush_scoreboards()
+
+    def handle(self, request):
+        """Run one decoded request and return the response to send back."""
+        op = request.get("op")
+        if self.token and not hmac.compare_digest(str(request.get("token", "")).encode("utf-8"),
+                                                  self.token.encode("utf-8")):
+            return {"ok": False, "error": "Missing or wrong scoreboard token"}
+        if op not in self.OPERATIONS:
+            return {"ok": False, "error": f"Unknown operation: {op}"}
+        try:
+            return {"ok": True, "result": getattr(self, op)(*request.get("args", []))}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serves newline-delimited JSON requests until the client closes its (pooled) connection."""
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.service.handle(json.loads(line))
+            except ValueError as e:
+                response = {"ok": False, "error": f"Bad request: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        self.service = service
+        super().__init__(address, _RequestHandler)
+
+class ScoreboardClient:
+    """
+    Sends scoreboard_manager calls to the service over a pool of persistent connections. When the service can't be
+    reached (or, with background_connect, no connection is ready yet) call() reports the call as unhandled.
+    """
+    NOT_REPEATABLE = ("update_scoreboard",)  # Doing these on the files after the service may have too would record them twice
+
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT, pool_size=POOL_SIZE, token=SERVICE_TOKEN,
+                 background_connect=False):
+        self.address = (host, port)
+        self.token = token
+        self.background_connect = background_connect
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._retry_at = 0.0
+        self._connector = None
+        self._connector_lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=CONNECT_TIMEOUT)
+        sock.settimeout(REQUEST_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile("rb")
+
+    def _connect_later(self):
+        """Open a connection on a helper thread and pool it for the next call."""
+        with self._connector_lock:
+            if self._connector is not None and self._connector.is_alive():
+                return
+            self._connector = threading.Thread(target=self._connect_into_pool, name="ScoreboardConnector", daemon=True)
+            self._connector.start()
+
+    def _connect_into_pool(self):
+        try:
+            self._release(self._connect())
+        except OSError:
+            self._retry_at = time.monotonic() + RETRY_INTERVAL
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            self._close(connection)
+
+    def _close(self, connection):
+        sock, reader = connection
+        reader.close()
+        sock.close()
+
+    def _send(self, connection, payload):
+        sock, reader = connection
+        try:
+            sock.sendall(payload)
+            line = reader.readline()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError) as e:
+            raise _StaleConnection() from e
+        if not line:
+            raise _StaleConnection()
+        if not line.endswith(b"\n"):
+            raise ConnectionError("Scoreboard service cut off its answer")
+        return json.loads(line)
+
+    def call(self, op, *args):
+        """
+        Return (True, result) if the service ran the operation, or (False, None) if it isn't available. A request
+        is only sent again when a stale pooled connection failed before answering, never after a timeout.
+        """
+        if time.monotonic() < self._retry_at:
+            return False, None
+
+        request = {"op": op, "args": args}
+        if self.token:
+            request["token"] = self.token
+        payload = json.dumps(request).encode("utf-8") + b"\n"
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = None
+        pooled = connection is not None
+
+        response = None
+        unanswered = False  # The request went out but no full answer came back, so the service may have run it
+        for attempt in range(2):
+            if connection is None:
+                if self.background_connect:
+                    self._connect_later()
+                    return False, None
+                try:
+                    connection = self._connect()
+                except OSError:
+                    break
+            try:
+                response = self._send(connection, payload)
+                break
+            except _StaleConnection:
+                self._close(connection)
+                connection = None
+                if not pooled:
+                    break
+                pooled = False  # A pooled connection may have gone stale if the service restarted: try a new one once
+            except (OSError, ValueError):  # Timed out or cut off mid-answer: never sent again
+                self._close(connection)
+                connection = None
+                unanswered = True
+                break
+
+        if response is None:
+            self._retry_at = time.monotonic() + RETRY_INTERVAL
+            if unanswered and op in self.NOT_REPEATABLE:
+                print(f"Scoreboard service didn't answer {op} in time; not repeating it, so it isn't recorded twice")
+                return True, None
+            return False, None
+
+        self._release(connection)
+        if not response.get("ok"):
+            raise ScoreboardServiceError(response.get("error"))
+        return True, response.get("result")
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return this process's shared ScoreboardClient."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ScoreboardClient(background_connect=scoreboard.CONNECT_IN_BACKGROUND)
+        return _client
+
+def is_loopback(host):
+    """True if every address the host name resolves to is a loopback address."""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror:
+        return False
+    return all(ipaddress.ip_address(address.split("%")[0]).is_loopback for address in addresses)
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, token=SERVICE_TOKEN):
+    """Run the scoreboard service until interrupted, flushing pending scores on the way out."""
+    if not token and not is_loopback(host):
+        raise SystemExit(f"Refusing to listen on {host} without a token: anyone who can reach it could write scores. "
+                         "Set ARCADE_SCOREBOARD_TOKEN on the service and every cabinet, or listen on 127.0.0.1.")
+    scoreboard.USE_SERVICE = False  # The service itself always works on the files directly
+    service = ScoreboardService(token=token)
+    service.start()
+    with _Server((host, port), service) as server:
+        print(f"Scoreboard service listening on {host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.stop()
+            print("Scoreboard service stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the arcade scoreboards over a local socket.")
+    parser.add_argument("--host", default=SERVICE_HOST,
+                        help="address to listen on; anything but loopback needs ARCADE_SCOREBOARD_TOKEN (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="port to listen on (default: %(default)s)")
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# The arcade modules import each other by name, the way menu.py and the games run them
+ARCADE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ARCADE_DIR, os.path.join(ARCADE_DIR, "games"), os.path.join(ARCADE_DIR, "tools")]
+
+# Never open a window or an audio device, and never talk to a scoreboard service that happens to be running
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ["ARCADE_SCOREBOARD_SERVICE"] = "0"
+os.environ.setdefault("SENS_ADVENTURE_LEVEL_CACHE", "0")  # Build levels fresh rather than share the game's cache
+
+@pytest.fixture(params=["numpy", "no numpy"])
+def scoreboards(request, tmp_path, monkeypatch):
+    """Point the scoreboard manager at an empty directory, with and without NumPy doing the sorting."""
+    import scoreboard_manager as scoreboard  # Imported here, once the paths above are set up
+    monkeypatch.setattr(scoreboard, "SCOREBOARD_DIR", str(tmp_path))
+    monkeypatch.setattr(scoreboard, "STATS_FILE", str(tmp_path / "player_stats.json"))
+    monkeypatch.setattr(scoreboard, "STATS_LOCK_FILE", str(tmp_path / "player_stats.lock"))
+    monkeypatch.setattr(scoreboard, "USE_SERVICE", False)
+    monkeypatch.setattr(scoreboard, "_index_cache", scoreboard.OrderedDict())
+    monkeypatch.setattr(scoreboard, "_stats_cache", (None, None))
+    if request.param == "no numpy":
+        monkeypatch.setattr(scoreboard, "np", None)
+    return tmp_path
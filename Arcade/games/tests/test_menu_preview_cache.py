@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtGui = pytest.importorskip("PyQt6.QtGui")
+
+import menu
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+@pytest.fixture
+def frames():
+    frame = QtGui.QImage(menu.THUMBNAIL_SIZE, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+    frame.fill(0xFF336699)
+    return [frame, frame.copy()], [100, 120]
+
+def test_put_then_get(tmp_path, frames):
+    cache = menu.PreviewDiskCache(str(tmp_path))
+    assert cache.put("key", *frames) == frames
+    cached_frames, delays = cache.get("key")
+    assert delays == frames[1]
+    assert [frame.size() for frame in cached_frames] == [frame.size() for frame in frames[0]]
+
+def test_failed_replace_still_returns_the_frames(tmp_path, frames, monkeypatch):
+    def fail(source, destination):
+        raise PermissionError("in use")
+    monkeypatch.setattr(menu.os, "replace", fail)
+    cache = menu.PreviewDiskCache(str(tmp_path))
+    assert cache.put("key", *frames) == frames
+    assert os.listdir(tmp_path) == []  # The temporary file is gone too
+    assert cache.get("key") is None
+
+def test_unwritable_cache_directory_still_returns_the_frames(tmp_path, frames):
+    blocked = tmp_path / "file"
+    blocked.write_bytes(b"")
+    cache = menu.PreviewDiskCache(str(blocked / "previews"))  # Can't make a directory inside a file
+    assert cache.put("key", *frames) == frames
@@ -0,0 +1,66 @@
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PyQt6.QtCore")
+QtGui = pytest.importorskip("PyQt6.QtGui")
+
+import menu
+import scoreboard_manager as scoreboard
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+def settle(model, timeout=5):
+    """Run the event loop until the model's page jobs are done and their pages delivered."""
+    deadline = time.monotonic() + timeout
+    while model.loading or model.pool.activeThreadCount():
+        assert time.monotonic() < deadline
+        model.pool.waitForDone(10)
+        QtCore.QCoreApplication.processEvents()
+
+def test_pages_are_read_off_the_gui_thread(scoreboards, monkeypatch):
+    rows = [(f"player{i}", i) for i in range(450)]
+    scoreboard._append_rows("game", rows)
+    threads = []
+    read_page = scoreboard.read_page
+
+    def record_thread(*args):
+        threads.append(QtCore.QThread.currentThread())
+        return read_page(*args)
+    monkeypatch.setattr(scoreboard, "read_page", record_thread)
+
+    model = menu.ScoreboardModel()
+    model.load("game")
+    assert model.rowCount() == 0  # Nothing is read on the GUI thread
+    settle(model)
+    assert (model.rowCount(), model.total_rows, model.source) == (model.PAGE_SIZE, 450, "files")
+    while model.canFetchMore():
+        model.fetchMore()
+        settle(model)
+    assert model.rows == sorted(rows, key=lambda row: row[1], reverse=True)
+    assert QtCore.QThread.currentThread() not in threads
+
+def test_pages_of_an_older_query_are_dropped(scoreboards):
+    scoreboard._append_rows("game", [("alice", 10), ("bob", 20), ("alicia", 30)])
+    model = menu.ScoreboardModel()
+    model.load("game")
+    model.sort(scoreboard.SORT_PLAYER, QtCore.Qt.SortOrder.AscendingOrder)
+    model.set_filter("ali")
+    settle(model)
+    assert model.rows == [("alice", 10), ("alicia", 30)]
+    assert model.total_rows == 2
+
+def test_a_changed_scoreboard_starts_again_from_the_first_page(scoreboards, monkeypatch):
+    monkeypatch.setattr(menu.ScoreboardModel, "PAGE_SIZE", 2)
+    scoreboard._append_rows("game", [("alice", 10), ("bob", 20), ("carol", 30)])
+    model = menu.ScoreboardModel()
+    model.load("game")
+    settle(model)
+    scoreboard._append_rows("game", [("dave", 40)])
+    model.fetchMore()
+    settle(model)
+    assert (model.rows, model.total_rows) == ([("dave", 40), ("carol", 30)], 4)
@@ -0,0 +1,116 @@
+import pytest
+
+import scoreboard_manager as scoreboard
+
+ROWS = [("alice", 30), ("Bob", 50), ("carol", 10), ("ALICE", 50), ("dave", 20), ("bob", 40), ("Eve", 30)]
+
+def read_all(game_name, **kwargs):
+    return scoreboard.read_scores(game_name, 0, 1000, **kwargs)
+
+@pytest.mark.parametrize("sort_column, descending, key", [
+    (scoreboard.SORT_SCORE, True, lambda row: row[1]),
+    (scoreboard.SORT_SCORE, False, lambda row: row[1]),
+    (scoreboard.SORT_PLAYER, False, lambda row: row[0].casefold()),
+    (scoreboard.SORT_PLAYER, True, lambda row: row[0].casefold()),
+])
+def test_sorting_is_stable(scoreboards, sort_column, descending, key):
+    scoreboard._append_rows("game", ROWS)
+    expected = sorted(ROWS, key=key, reverse=descending)
+    assert read_all("game", sort_column=sort_column, descending=descending) == expected
+
+def test_paging_returns_each_row_once(scoreboards):
+    rows = [(f"player{i % 37}", (i * 7919) % 1000) for i in range(500)]
+    scoreboard._append_rows("game", rows)
+    expected = sorted(rows, key=lambda row: row[1], reverse=True)
+
+    pages = []
+    for start in range(0, len(rows) + 50, 64):
+        pages.extend(scoreboard.read_scores("game", start, 64))
+    assert pages == expected
+    assert scoreboard.read_scores("game", len(rows), 64) == []
+    assert scoreboard.count_scores("game") == len(rows)
+
+@pytest.mark.parametrize("player_filter, expected", [
+    ("", len(ROWS)),
+    ("alice", 2),
+    ("BOB", 2),
+    ("e", 4),
+    ("nobody", 0),
+])
+def test_filter_is_case_insensitive(scoreboards, player_filter, expected):
+    scoreboard._append_rows("game", ROWS)
+    rows = read_all("game", player_filter=player_filter)
+    assert len(rows) == scoreboard.count_scores("game", player_filter) == expected
+    assert all(player_filter.casefold() in player.casefold() for player, _ in rows)
+
+def test_names_that_need_quoting(scoreboards):
+    rows = [("Zoë", 5), ('say "hi"', 7), ("Smith, J", 3), ("two\nlines", 9), ("plain", 1)]
+    scoreboard._append_rows("game", rows)
+    assert read_all("game") == sorted(rows, key=lambda row: row[1], reverse=True)
+    assert read_all("game", player_filter="lines") == [("two\nlines", 9)]
+    assert scoreboard.display_scoreboard("game") == rows
+
+def test_index_is_rebuilt_when_the_file_changes(scoreboards):
+    scoreboard._append_rows("game", ROWS[:3])
+    assert scoreboard.count_scores("game") == 3
+    scoreboard._append_rows("game", ROWS[3:])
+    assert scoreboard.count_scores("game") == len(ROWS)
+
+def test_missing_scoreboard(scoreboards):
+    assert scoreboard.count_scores("missing") == 0
+    assert read_all("missing") == []
+
+def test_writer_survives_a_failed_batch(scoreboards, monkeypatch):
+    record_scores = scoreboard._record_scores
+    calls = []
+
+    def fail_first(game_name, rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise ValueError("bad batch")
+        record_scores(game_name, rows)
+
+    monkeypatch.setattr(scoreboard, "_record_scores", fail_first)
+    writer = scoreboard.ScoreboardWriter(flush_interval=0.01)
+    writer.submit("game", "alice", 10)
+    writer.flush()  # Used to hang once the writer thread had died
+    writer.submit("game", "bob", 20)
+    writer.flush()
+    assert writer._thread.is_alive()
+    assert scoreboard.display_scoreboard("game") == [("bob", 20)]
+
+def test_missing_stats_are_rebuilt_once_and_saved(scoreboards, monkeypatch):
+    scoreboard._append_rows("game", ROWS)  # Written without stats, as by an older version
+    rebuilds = []
+    rebuild_stats = scoreboard._rebuild_stats
+    monkeypatch.setattr(scoreboard, "_rebuild_stats", lambda: rebuilds.append(1) or rebuild_stats())
+
+    assert scoreboard.player_stats("alice") == {"game": {"count": 1, "best": 30, "sum": 30, "latest": 30}}
+    assert scoreboard.game_stats("game")["count"] == len(ROWS)
+    assert (scoreboards / "player_stats.json").exists()
+    assert len(rebuilds) == 1
+
+def test_failed_stats_write_forces_a_rebuild(scoreboards, monkeypatch):
+    scoreboard._record_scores("game", [["alice", 10]])
+    write_stats = scoreboard._write_stats
+
+    def disk_full(stats):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(scoreboard, "_write_stats", disk_full)
+    with pytest.raises(OSError):
+        scoreboard._record_scores("game", [["alice", 20]])
+    monkeypatch.setattr(scoreboard, "_write_stats", write_stats)
+
+    # The row reached the scoreboard, so the totals must include it
+    assert scoreboard.player_stats("alice")["game"] == {"count": 2, "best": 20, "sum": 30, "latest": 20}
+
+def test_stats_returned_are_never_changed_afterwards(scoreboards):
+    scoreboard._record_scores("game", [("alice", 10)])
+    player, game = scoreboard.player_stats("alice"), scoreboard.game_stats("game")
+    scoreboard._record_scores("game", [("alice", 30)])  # As the writer thread does while a caller holds them
+    assert player == {"game": {"count": 1, "best": 10, "sum": 10, "latest": 10}}
+    assert game == {"count": 1, "best": 10, "sum": 10, "latest": 10}
+
+    player["game"]["best"] = game["best"] = 1000  # Nor does changing them reach the saved totals
+    assert scoreboard.player_stats("alice")["game"]["best"] == scoreboard.game_stats("game")["best"] == 30
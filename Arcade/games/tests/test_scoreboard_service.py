@@ -0,0 +1,131 @@
+import json
+import time
+import socket
+import threading
+
+import pytest
+
+import scoreboard_manager as scoreboard
+import scoreboard_service
+
+class FailingClient:
+    def call(self, op, *args):
+        raise scoreboard_service.ScoreboardServiceError("disk full")
+
+def test_service_error_falls_back_to_the_files(scoreboards, monkeypatch):
+    monkeypatch.setattr(scoreboard, "USE_SERVICE", True)
+    monkeypatch.setattr(scoreboard_service, "_client", FailingClient())
+    scoreboard.update_scoreboard("game", "alice", 10)  # Used to raise into the game at the end of a run
+    scoreboard.flush_scoreboards()
+    assert scoreboard.display_scoreboard("game") == [("alice", 10)]
+
+class ServiceClient:
+    """Answers from an in-process service, or not at all once 'up' is cleared, like a service that came and went."""
+    def __init__(self, service):
+        self.service = service
+        self.up = True
+
+    def call(self, op, *args):
+        return (True, getattr(self.service, op)(*args)) if self.up else (False, None)
+
+def test_pages_stay_on_the_backend_that_answered_the_count(scoreboards, monkeypatch):
+    scoreboard._append_rows("game", [("alice", 10), ("bob", 20)])
+    service = scoreboard_service.ScoreboardService()
+    service.update_scoreboard("game", "carol", 30)  # Only the service has this one so far
+    client = ServiceClient(service)
+    monkeypatch.setattr(scoreboard, "USE_SERVICE", True)
+    monkeypatch.setattr(scoreboard_service, "_client", client)
+
+    total, rows, source = scoreboard.read_page("game", 0, 1)
+    assert (total, rows, source) == (3, [("carol", 30)], "service")
+    client.up = False
+    assert scoreboard.read_page("game", 1, 1, source=source)[2] == "files"  # Tells the caller to start again
+    client.up = True
+    assert scoreboard.read_page("game", 0, 5, source="files") == (2, [("bob", 20), ("alice", 10)], "files")
+
+def test_requests_need_the_token(scoreboards):
+    service = scoreboard_service.ScoreboardService(token="secret")
+    assert not service.handle({"op": "count_scores", "args": ["game"]})["ok"]
+    assert not service.handle({"op": "count_scores", "args": ["game"], "token": "guess"})["ok"]
+    assert service.handle({"op": "count_scores", "args": ["game"], "token": "secret"}) == {"ok": True, "result": 0}
+
+@pytest.mark.parametrize("host, loopback", [("127.0.0.1", True), ("localhost", True), ("::1", True),
+                                            ("0.0.0.0", False), ("", False)])
+def test_is_loopback(host, loopback):
+    assert scoreboard_service.is_loopback(host) == loopback
+
+def test_serve_refuses_other_hosts_without_a_token():
+    with pytest.raises(SystemExit):
+        scoreboard_service.serve("0.0.0.0", 0, token="")
+
+def test_background_connect_never_blocks_the_caller(monkeypatch):
+    def slow_connect(address, timeout=None):
+        time.sleep(0.5)
+        raise ConnectionRefusedError
+    monkeypatch.setattr(scoreboard_service.socket, "create_connection", slow_connect)
+    client = scoreboard_service.ScoreboardClient(port=1, background_connect=True)
+
+    started = time.perf_counter()
+    assert client.call("count_scores", "game") == (False, None)
+    assert time.perf_counter() - started < 0.1
+    client._connector.join()
+    assert client._retry_at > time.monotonic()  # The failed connect backs off like a blocking one would
+
+def fake_service(*handlers):
+    """Accept one connection per handler, in turn, and let it talk to the client. Returns the port and the requests read."""
+    listener = socket.create_server(("127.0.0.1", 0))
+    requests = []
+
+    def run():
+        with listener:
+            for handler in handlers:
+                conn, _ = listener.accept()
+                with conn, conn.makefile("rb") as reader:
+                    handler(conn, reader, requests)
+
+    threading.Thread(target=run, daemon=True).start()
+    return listener.getsockname()[1], requests
+
+def answer_then_close(conn, reader, requests):
+    requests.append(json.loads(reader.readline())["op"])
+    conn.sendall(b'{"ok": true, "result": 1}\n')
+
+def never_answer(conn, reader, requests):
+    requests.append(json.loads(reader.readline())["op"])
+    reader.readline()  # Until the client gives up and closes the connection
+
+def test_stale_pooled_connection_is_retried_once(monkeypatch):
+    port, requests = fake_service(answer_then_close, answer_then_close)
+    client = scoreboard_service.ScoreboardClient(port=port)
+    assert client.call("count_scores", "game") == (True, 1)  # Pools the connection, which the service then closes
+    assert client.call("update_scoreboard", "game", "alice", 10) == (True, 1)
+    assert requests == ["count_scores", "update_scoreboard"]
+
+def test_unanswered_update_is_never_sent_again(scoreboards, monkeypatch):
+    monkeypatch.setattr(scoreboard_service, "REQUEST_TIMEOUT", 0.2)
+    port, requests = fake_service(never_answer, never_answer)
+    client = scoreboard_service.ScoreboardClient(port=port)
+    monkeypatch.setattr(scoreboard, "USE_SERVICE", True)
+    monkeypatch.setattr(scoreboard_service, "_client", client)
+
+    scoreboard.update_scoreboard("game", "alice", 10)
+    scoreboard.flush_scoreboards()
+    assert requests == ["update_scoreboard"]
+    assert scoreboard.display_scoreboard("game") == []  # Not written to the files as well
+
+def test_unanswered_read_falls_back_to_the_files(monkeypatch):
+    monkeypatch.setattr(scoreboard_service, "REQUEST_TIMEOUT", 0.2)
+    port, requests = fake_service(never_answer)
+    client = scoreboard_service.ScoreboardClient(port=port)
+    assert client.call("count_scores", "game") == (False, None)
+    assert requests == ["count_scores"]
+
+def test_flush_survives_any_write_error(scoreboards, monkeypatch):
+    service = scoreboard_service.ScoreboardService()
+    service.update_scoreboard("game", "alice", 10)
+    real_record = scoreboard._record_scores
+    monkeypatch.setattr(scoreboard, "_record_scores", lambda game_name, rows: int("corrupt"))
+    service.flush_scoreboards()  # Used to raise, killing the flush timer thread
+    monkeypatch.setattr(scoreboard, "_record_scores", real_record)
+    service.flush_scoreboards()  # The score was kept and is written on the next flush
+    assert scoreboard.display_scoreboard("game") == [("alice", 10)]
@@ -0,0 +1,71 @@
+import pygame
+import pytest
+
+import sens_adventure_game as game
+
+class Shape:
+    """A stand-in level object: a rect, a mask and a name are all collisions look at."""
+    def __init__(self, rect, mask, name=None):
+        self.rect = pygame.Rect(rect)
+        self.mask = mask
+        self.name = name
+
+def line_mask(width, height, row):
+    """A mask with a single row of set bits, like the thin top of a ledge."""
+    mask = pygame.mask.Mask((width, height))
+    mask.draw(pygame.mask.Mask((width, 1), fill=True), (0, row))
+    return mask
+
+def box(width, height):
+    return pygame.mask.Mask((width, height), fill=True)
+
+@pytest.fixture
+def player():
+    player = game.Player(100, 0, 50, 50)
+    player.mask = box(*player.rect.size)
+    return player
+
+@pytest.mark.parametrize("row", range(0, 40, 3))
+def test_fast_fall_finds_a_thin_ledge(player, row):
+    # Feet and ledge are both one pixel thick, so they touch at exactly one point of the fall
+    player.mask = line_mask(*player.rect.size, player.rect.height - 1)
+    ledge = Shape((100, player.rect.bottom + 10, 64, 40), line_mask(64, 40, row))
+    hits = game.sweep(player, [ledge], 0, 60)
+    assert [obj for _, obj in hits] == [ledge]
+
+def test_sweep_misses_what_the_mask_misses(player):
+    player.mask = line_mask(*player.rect.size, player.rect.height - 1)
+    ledge = Shape((100, player.rect.bottom + 10, 64, 40), line_mask(64, 40, 39))
+    assert game.sweep(player, [ledge], 0, 20) == []  # Ends before reaching the ledge's only row
+
+@pytest.mark.parametrize("row", [0, 7, 19])
+def test_fast_run_finds_a_thin_wall(player, row):
+    player.mask = pygame.mask.Mask(player.rect.size)
+    player.mask.draw(pygame.mask.Mask((1, player.rect.height), fill=True), (player.rect.width - 1, 0))
+    wall = Shape((player.rect.right + 5, 0, 20, 50), pygame.mask.Mask((20, 50)))
+    wall.mask.draw(pygame.mask.Mask((1, 50), fill=True), (row, 0))
+    assert [obj for _, obj in game.sweep(player, [wall], 40, 0)] == [wall]
+
+def test_shortest_run():
+    assert game.shortest_run(box(8, 8), 0) == 8
+    assert game.shortest_run(line_mask(8, 8, 3), 1) == 1
+    assert game.shortest_run(line_mask(8, 8, 3), 0) == 8
+    assert game.shortest_run(pygame.mask.Mask((8, 8)), 1) == 8  # Nothing set, so nothing to skip over
+
+def test_landing_ignores_fruit_in_the_way(player):
+    fruit = Shape((100, player.rect.bottom + 2, 32, 32), box(32, 32), "fruit")
+    ground = Shape((60, player.rect.bottom + 20, 200, 40), box(200, 40))
+    player.previous_y = player.rect.y
+    player.rect.y += 30
+    player.y_vel = 30
+    touched = game.handle_vertical_collision(player, [fruit, ground], player.y_vel)
+    assert player.rect.bottom == ground.rect.top  # Lands on the ground, not on top of the fruit
+    assert touched == [fruit, ground]
+
+def test_falling_through_fruit_alone(player):
+    fruit = Shape((100, player.rect.bottom + 2, 32, 32), box(32, 32), "fruit")
+    player.previous_y = player.rect.y
+    player.rect.y += 30
+    player.y_vel = 30
+    assert game.handle_vertical_collision(player, [fruit], player.y_vel) == [fruit]
+    assert player.rect.y == player.previous_y + 30  # Carried on falling
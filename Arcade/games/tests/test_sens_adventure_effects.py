@@ -0,0 +1,72 @@
+import pygame
+import pytest
+
+import sens_adventure_game as game
+
+pytestmark = pytest.mark.skipif(game.np is None, reason="the EffectPool needs NumPy")
+
+class Target:
+    """Records what is blitted to it instead of drawing."""
+    def __init__(self):
+        self.blits = []
+
+    def blit(self, source, dest, area=None):
+        self.blits.append((source, dest))
+
+def alive(pool):
+    return int((pool.age < pool.lifetime).sum())
+
+def test_a_spawned_effect_moves_and_expires():
+    pool = game.EffectPool(capacity=8)
+    pool.spawn(game.EFFECT_SPARK, 100, 50, 2.0, -3.0)
+    lifetime = pool.LIFETIME[game.EFFECT_SPARK]
+    for frame in range(lifetime):
+        assert alive(pool) == 1
+        pool.update()
+    assert alive(pool) == 0
+    gravity = pool.GRAVITY[game.EFFECT_SPARK]
+    assert pool.x[0] == 100 + 2.0 * lifetime
+    assert pool.y[0] == pytest.approx(50 + sum(-3.0 + gravity * frame for frame in range(lifetime)))
+    target = Target()
+    pool.draw(target, 0)
+    assert target.blits == []
+
+def test_draw_walks_through_the_frames_of_an_effect():
+    pool = game.EffectPool(capacity=4)
+    pool.spawn(game.EFFECT_COLLECTED, 10, 20)
+    frames = pool.sprites[game.EFFECT_COLLECTED]
+    drawn = []
+    for frame in range(pool.LIFETIME[game.EFFECT_COLLECTED]):
+        target = Target()
+        pool.draw(target, 5)
+        (source, dest), = target.blits
+        assert dest == (5, 20)  # Drawn relative to the camera
+        drawn.append(source)
+        pool.update()
+    assert drawn[0] is frames[0] and drawn[-1] is frames[-1]
+    assert [frames.index(source) for source in drawn] == sorted(frames.index(source) for source in drawn)
+
+def test_bursts_take_consecutive_slots_and_wrap_around():
+    pool = game.EffectPool(capacity=10)
+    pool.spawn(game.EFFECT_DUST, 0, 0, *pool.dust_velocity)
+    count = len(pool.dust_velocity[0])
+    assert pool.next_slot == count
+    pool.spawn(game.EFFECT_SPARK, 0, 0, *pool.spark_velocity)
+    assert pool.next_slot == (count + len(pool.spark_velocity[0])) % pool.capacity
+    assert list(pool.kind[:pool.next_slot]) == [game.EFFECT_SPARK] * pool.next_slot  # Reused the oldest slots
+    assert list(pool.kind[pool.next_slot:count]) == [game.EFFECT_DUST] * (count - pool.next_slot)
+
+def test_a_full_pool_replaces_the_oldest_effects():
+    pool = game.EffectPool(capacity=4)
+    for x in range(6):
+        pool.spawn(game.EFFECT_COLLECTED, x, 0)
+        pool.update()
+    assert alive(pool) == pool.capacity
+    assert sorted(pool.x) == [2, 3, 4, 5]  # The first two were overwritten
+    assert sorted(pool.age) == [1, 2, 3, 4]
+
+def test_clear_frees_every_slot():
+    pool = game.EffectPool(capacity=4)
+    pool.spawn(game.EFFECT_SPARK, 0, 0, *pool.spark_velocity)
+    pool.clear()
+    assert alive(pool) == 0
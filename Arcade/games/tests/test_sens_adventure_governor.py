@@ -0,0 +1,52 @@
+import pytest
+
+import sens_adventure_game as game
+
+FPS = 60
+
+def feed(governor, work_time, frames):
+    """Record the same work time for a number of frames; returns the frames after which the level changed."""
+    return [frame for frame in range(frames) if governor.record(work_time)]
+
+@pytest.fixture
+def governor():
+    return game.FrameGovernor(fps=FPS, quality="auto")
+
+def test_steps_down_while_frames_overrun(governor):
+    slow = 0.9 / FPS
+    assert feed(governor, slow, FPS // 2) == [FPS // 2 - 1]  # Half a second over budget before the first step
+    assert governor.level == 1
+    feed(governor, slow, 10 * FPS)
+    assert governor.level == len(governor.LEVELS) - 1  # And no further than the last level
+
+def test_steps_back_up_only_with_headroom(governor):
+    feed(governor, 0.9 / FPS, FPS // 2)
+    feed(governor, 0.7 / FPS, 10 * FPS)  # Under budget, but not by enough to risk the detail again
+    assert governor.level == 1
+    feed(governor, 0.2 / FPS, 2 * FPS)
+    assert governor.level == 0
+
+def test_a_relapse_doubles_the_wait_before_the_next_step_up(governor):
+    feed(governor, 0.9 / FPS, FPS // 2)
+    feed(governor, 0.2 / FPS, 2 * FPS)
+    assert (governor.level, governor.up_wait) == (0, 2 * FPS)
+    feed(governor, 0.9 / FPS, FPS // 2)  # Overruns again straight after the step up
+    assert (governor.level, governor.up_wait) == (1, 4 * FPS)
+    assert feed(governor, 0.2 / FPS, 4 * FPS) == [4 * FPS - 1]
+
+def test_fixed_quality_never_changes(governor):
+    fixed = game.FrameGovernor(fps=FPS, quality="2")
+    assert not feed(fixed, 2 / FPS, 5 * FPS)
+    assert fixed.level == 2
+
+@pytest.mark.skipif(game.np is None, reason="the EntityStore needs NumPy")
+def test_traps_on_screen_are_synced_every_frame():
+    near, on_screen, off_screen = (game.Fire(x, 0, 16, 32) for x in (100, 100 + 2 * game.EntityStore.NEAR, -game.WIDTH // 2))
+    for fire in (near, on_screen, off_screen):
+        fire.on()
+    store = game.EntityStore([near, on_screen, off_screen])
+    for frame in range(1, 9):
+        store.update()
+        store.sync_around(0, 4, view_left=0)
+        assert near.animation_count == on_screen.animation_count == frame
+        assert off_screen.animation_count == frame // 4 * 4  # Only caught up every fourth frame
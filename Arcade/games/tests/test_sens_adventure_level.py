@@ -0,0 +1,111 @@
+import pygame
+import pytest
+
+import sens_adventure_game as game
+
+def tiles(*cells, size=1):
+    """Square tiles at grid cells (column, row)."""
+    return [pygame.Rect(column * size, row * size, size, size) for column, row in cells]
+
+def area(rects):
+    """Every pixel covered by any of the rects."""
+    return {(x, y) for rect in rects for x in range(rect.left, rect.right) for y in range(rect.top, rect.bottom)}
+
+MERGE_CASES = {
+    "empty": ([], 0),
+    "single tile": (tiles((3, 2)), 1),
+    "row": (tiles((0, 0), (1, 0), (2, 0), (3, 0)), 1),
+    "column": (tiles((0, 0), (0, 1), (0, 2)), 1),
+    "square": (tiles((0, 0), (1, 0), (0, 1), (1, 1)), 1),
+    "row with a gap": (tiles((0, 0), (1, 0), (3, 0), (4, 0)), 2),
+    "column with a gap": (tiles((0, 0), (0, 2)), 2),
+    "L-shape": (tiles((0, 0), (0, 1), (0, 2), (1, 2), (2, 2)), 2),
+    "mirrored L-shape": (tiles((2, 0), (2, 1), (0, 2), (1, 2), (2, 2)), 2),
+    "staircase": (tiles((0, 0), (0, 1), (1, 1), (0, 2), (1, 2), (2, 2)), 3),
+    "diagonal (corners only)": (tiles((0, 0), (1, 1), (2, 2)), 3),
+    "unsorted input": (tiles((2, 0), (0, 0), (1, 0), (1, 1), (0, 1), (2, 1)), 1),
+    "different sizes": ([pygame.Rect(0, 0, 2, 2), pygame.Rect(2, 0, 1, 1), pygame.Rect(2, 1, 1, 1)], 2),
+    "game blocks": (tiles((0, 5), (1, 5), (2, 5), (5, 3), (6, 3), (5, 5), (6, 5), size=96), 3),
+}
+
+@pytest.mark.parametrize("rects, count", MERGE_CASES.values(), ids=MERGE_CASES.keys())
+def test_merge_rects_covers_exactly_the_tiles(rects, count):
+    merged = game.merge_rects(rects)
+    assert len(merged) == count
+    assert area(rect for rect, _ in merged) == area(rects)
+    # Each tile ends up in exactly one merged rect, which is exactly the union of its tiles
+    assert sorted(i for _, members in merged for i in members) == list(range(len(rects)))
+    for rect, members in merged:
+        assert area([rect]) == area(rects[i] for i in members)
+    assert sum(rect.width * rect.height for rect, _ in merged) == len(area(rects))  # no overlaps
+
+def test_merge_rects_leaves_its_input_alone():
+    rects = tiles((0, 0), (1, 0))
+    game.merge_rects(rects)
+    assert rects == tiles((0, 0), (1, 0))
+
+def blocks(*cells, size=96):
+    return [game.Block(rect.x, rect.y, size) for rect in tiles(*cells, size=size)]
+
+TERRAIN_CASES = {
+    "single block": (blocks((2, 4)), 1),
+    "floor": (blocks(*((column, 6) for column in range(-3, 12))), 1),
+    "floor with a gap": (blocks((0, 6), (1, 6), (4, 6), (5, 6)), 2),
+    "L-shape": (blocks((0, 4), (0, 5), (0, 6), (1, 6), (2, 6)), 2),
+    "duplicate blocks": (blocks((0, 6), (1, 6), (1, 6), (0, 6)), 1),
+}
+
+@pytest.mark.parametrize("level, count", TERRAIN_CASES.values(), ids=TERRAIN_CASES.keys())
+def test_compile_level_merges_blocks_into_terrain(level, count):
+    trap = game.Fire(0, 0, 16, 32)
+    platform = game.MovingPlatform(0, 0, 96, 100, 2)
+    objects = game.compile_level(level + [trap, platform])
+    terrain = [obj for obj in objects if isinstance(obj, game.Terrain)]
+    assert len(terrain) == count
+    assert objects[count:] == [trap, platform]  # only static blocks are merged
+    assert area(shape.rect for shape in terrain) == area(block.rect for block in level)
+    for shape in terrain:
+        assert shape.lefts == sorted(shape.lefts)
+        assert area([shape.rect]) == area(tile.rect for tile in shape.tiles)
+
+@pytest.mark.parametrize("level", [case[0] for case in TERRAIN_CASES.values()], ids=TERRAIN_CASES.keys())
+def test_terrain_tile_range_finds_the_overlapping_tiles(level):
+    for shape in game.compile_level(level):
+        for left in range(shape.rect.left - 100, shape.rect.right + 100, 37):
+            right = left + 50
+            expected = [tile for tile in shape.tiles if tile.rect.left < right and tile.rect.right > left]
+            assert [shape.tiles[i] for i in shape.tile_range(left, right)] == expected
+
+def test_tile_mask_matches_one_big_mask():
+    # A tile with holes, so the Terrain needs a TileMask instead of its rect
+    holes = pygame.mask.Mask((96, 96), fill=True)
+    holes.erase(pygame.mask.Mask((40, 40), fill=True), (28, 28))
+    level = blocks((0, 5), (1, 5), (2, 5))
+    kind = game.StaticKind(None, level[0].image, holes)
+    for block in level:
+        block.kind = kind
+    shape, = game.compile_level(level)
+    assert isinstance(shape.mask, game.TileMask)
+
+    whole = pygame.mask.Mask(shape.rect.size)
+    for tile in shape.tiles:
+        whole.draw(holes, (tile.rect.x - shape.rect.x, tile.rect.y - shape.rect.y))
+    probe = pygame.mask.Mask((10, 10), fill=True)
+    for x in range(-20, shape.rect.width + 20, 7):
+        for y in range(-20, shape.rect.height + 20, 11):
+            assert shape.mask.overlap(probe, (x, y)) == whole.overlap(probe, (x, y))
+
+def test_instances_share_their_surfaces():
+    first, second = game.Trampoline(0, 0), game.Trampoline(200, 0)
+    assert first.image is second.image and first.mask is second.mask
+    bananas, melon = game.Fruit(0, 0, 16, 16, "Bananas"), game.Fruit(40, 0, 16, 16, "Melon")
+    assert bananas.kind.collected_image is melon.kind.collected_image
+    assert game.Block(0, 0, 96).image is game.MovingPlatform(0, 0, 96, 100, 2).image
+
+def test_level_holds_no_duplicate_surfaces():
+    import sens_adventure_memory
+    player, objects = game.create_game(0)
+    surfaces = {id(item): item for _, _, item in sens_adventure_memory.level_assets(player, objects)
+                if isinstance(item, pygame.Surface)}
+    pixels = [(surface.get_size(), pygame.image.tobytes(surface, "RGBA")) for surface in surfaces.values()]
+    assert len(set(pixels)) == len(pixels)
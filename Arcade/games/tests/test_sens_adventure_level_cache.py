@@ -0,0 +1,138 @@
+import runpy
+
+import pytest
+
+import sens_adventure_game as game
+from test_sens_adventure_replay import record_session
+
+@pytest.fixture
+def level_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(game, "LEVEL_CACHE", True)
+    monkeypatch.setattr(game, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(game, "_compiled_levels", {})
+    return tmp_path
+
+def test_cached_levels_play_like_built_ones(level_cache, monkeypatch):
+    monkeypatch.setattr(game, "LEVEL_CACHE", False)
+    built = record_session(frames=1200)[1]
+    monkeypatch.setattr(game, "LEVEL_CACHE", True)
+    record_session(frames=1200)  # writes the cache files
+    assert list(level_cache.iterdir())
+    monkeypatch.setattr(game, "_compiled_levels", {})
+    assert record_session(frames=1200)[1] == built
+
+def test_cache_written_by_the_script_is_used_by_the_module(level_cache):
+    """Running the game as a script gives it its own copies of the classes; the cache must not carry them over."""
+    script = runpy.run_path(game.__file__, run_name="__script__")["create_game"].__globals__
+    script.update(cache_dir=str(level_cache), LEVEL_CACHE=True)
+    script["create_game"](0)
+
+    path = game.CompiledLevel.path(0)
+    compiled = game.CompiledLevel.open(path, game.CompiledLevel.key())
+    assert compiled is not None
+    player, objects = compiled.create_game()
+    assert isinstance(player, game.Player)
+    assert any(isinstance(obj, game.Terrain) for obj in objects)
+    assert any(type(obj) is game.MovingPlatform for obj in objects)
+    if game.np is not None:
+        assert game.create_entity_store(objects).platforms
+
+@pytest.mark.parametrize("damage", ["truncate", "module", "version", "payload", "unknown_type"])
+def test_damaged_cache_files_are_rebuilt(level_cache, damage):
+    game.create_game(0)
+    path = game.CompiledLevel.path(0)
+    key = game.CompiledLevel.key()
+    with open(path, "rb") as file:
+        data = bytearray(file.read())
+    header = game.CompiledLevel.HEADER
+    magic, version, module, file_key, payload_offset, payload_length = header.unpack_from(data)
+    if damage == "truncate":
+        data = data[:payload_offset // 2]
+    elif damage == "module":
+        header.pack_into(data, 0, magic, version, b"__main__", file_key, payload_offset, payload_length)
+    elif damage == "version":
+        header.pack_into(data, 0, magic, version - 1, module, file_key, payload_offset, payload_length)
+    elif damage == "payload":
+        data[-8:] = b"not json"
+    else:
+        data[payload_offset:] = data[payload_offset:].replace(b'"Block"', b'"Evil!"')
+    with open(path, "wb") as file:
+        file.write(data)
+
+    assert game.CompiledLevel.open(path, key) is None
+    game._compiled_levels.clear()
+    player, objects = game.create_game(0)  # builds the level again and rewrites the file
+    assert objects
+    assert game.CompiledLevel.open(path, key) is not None
+
+@pytest.fixture
+def new_process(monkeypatch):
+    """Returns a function that empties the module's sprite caches, as a newly started game finds them."""
+    def empty():
+        for cache in ("_sprites", "_mask_cache", "_static_kinds", "_static_kind_sprites", "_compiled_levels"):
+            monkeypatch.setattr(game, cache, {})
+    return empty
+
+def test_warm_start_loads_every_mask(level_cache, new_process, monkeypatch):
+    game.create_game(0)
+    new_process()
+    from_surface = game.pygame.mask.from_surface
+    computed = []
+    monkeypatch.setattr(game.pygame.mask, "from_surface", lambda surface: computed.append(surface) or from_surface(surface))
+    game.create_game(0)
+    assert computed == []
+
+def test_loader_builds_a_missing_cache_file_off_the_main_thread(level_cache, monkeypatch):
+    built = []
+    build = game.CompiledLevel.build.__func__
+    monkeypatch.setattr(game.CompiledLevel, "build",
+                        classmethod(lambda cls, *args: built.append(game.threading.current_thread()) or build(cls, *args)))
+    loader = game.LevelLoader(1)
+    loader.thread.join()
+    assert built == [loader.thread]
+    assert game.CompiledLevel.open(game.CompiledLevel.path(1), game.CompiledLevel.key()) is not None
+    player, objects = loader.finish()
+    assert objects and built == [loader.thread]
+
+@pytest.fixture
+def image_loads(monkeypatch):
+    """Record (thread, path) for every image file decoded, failing those whose names are in the returned set."""
+    load = game.pygame.image.load
+    loads = []
+    failing = set()
+
+    def record(path, *args):
+        loads.append((game.threading.current_thread(), path))
+        if game.os.path.basename(path) in failing:
+            raise game.pygame.error("corrupt")
+        return load(path, *args)
+    monkeypatch.setattr(game.pygame.image, "load", record)
+    return loads, failing
+
+def test_loader_only_hands_its_images_over_on_the_main_thread(image_loads, new_process):
+    new_process()
+    loads, _ = image_loads
+    loader = game.LevelLoader(1)
+    loader.thread.join()
+    assert loader.images and game._decoded_images == {}  # The worker kept them to itself
+    assert {thread for thread, path in loads} == {loader.thread}
+
+    loads.clear()
+    player, objects = loader.finish()
+    assert objects
+    assert not [path for thread, path in loads if path in loader.images]  # Nothing it decoded is decoded again
+    assert game._decoded_images == {}
+
+def test_loader_still_builds_the_level_when_an_image_fails_to_decode(image_loads, new_process):
+    new_process()
+    loads, failing = image_loads
+    failing.add("Terrain.png")
+    loader = game.LevelLoader(1)
+    loader.thread.join()
+    failing.clear()
+    assert loader.images and not any(path.endswith("Terrain.png") for path in loader.images)
+
+    loads.clear()
+    player, objects = loader.finish()
+    assert any(isinstance(obj, game.Terrain) for obj in objects)
+    assert [thread for thread, path in loads if path.endswith("Terrain.png")] == [game.threading.main_thread()]
@@ -0,0 +1,85 @@
+import pytest
+
+import sens_adventure_game as game
+
+class FakeTime:
+    """Stands in for the time module: sleep() moves the clock on, and so does work()."""
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def work(self, seconds):
+        self.now += seconds
+
+class FakeClock:
+    def __init__(self):
+        self.ticks = []
+
+    def tick(self, fps):
+        self.ticks.append(fps)
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(game, "time", fake)
+    monkeypatch.setattr(game.pygame.event, "get", lambda: [])
+    monkeypatch.setattr(game, "update_display", lambda window: None)
+    return fake
+
+def pacer(low_latency=False, measure=False):
+    pacer = game.FramePacer(fps=50, low_latency=low_latency, measure=measure)
+    pacer.clock = FakeClock()
+    return pacer
+
+def test_default_order_waits_on_the_clock_then_samples(clock):
+    default = pacer()
+    default.wait()
+    clock.work(0.004)
+    default.present(None)
+    assert default.clock.ticks == [50]
+    assert clock.sleeps == []
+    assert list(default.work_times) == [pytest.approx(0.004)]
+
+def test_low_latency_order_sleeps_before_sampling_the_input(clock):
+    low_latency = pacer(low_latency=True)
+    low_latency.wait()  # The first frame starts straight away
+    assert clock.sleeps == []
+    due = low_latency.due
+    for frame in range(3):
+        clock.work(0.004)
+        low_latency.present(None)
+        low_latency.wait()
+        assert low_latency.clock.ticks == []  # It never waits on pygame's clock
+        due += 0.02
+        assert low_latency.due == pytest.approx(due)  # Presents stay a frame apart
+        # and the input is sampled the estimated work time (the longest so far, plus a margin) before each
+        assert low_latency.sample_time == pytest.approx(due - (0.004 + game.FramePacer.MARGIN))
+    assert clock.sleeps
+
+def test_low_latency_order_catches_up_after_a_late_frame(clock):
+    low_latency = pacer(low_latency=True)
+    low_latency.wait()
+    clock.work(0.05)  # Far longer than a frame
+    low_latency.present(None)
+    late = clock.now
+    low_latency.wait()
+    assert clock.sleeps == []  # Already late, so it starts the next frame at once
+    assert low_latency.sample_time == late
+    assert low_latency.due == pytest.approx(late + 0.02)
+
+def test_measured_default_order_waits_a_frame_from_the_last_sample(clock):
+    measured = pacer(measure=True)
+    measured.wait()
+    first = measured.sample_time
+    clock.work(0.004)
+    measured.present(None)
+    measured.wait()
+    assert measured.sample_time == pytest.approx(first + 0.02)
+    assert measured.clock.ticks == []
@@ -0,0 +1,107 @@
+import pygame
+import pytest
+
+import sens_adventure_game as game
+
+def column_strip(width, height=2):
+    """A strip whose every column has its own colour, so where each one ended up can be read back."""
+    strip = pygame.Surface((width, height))
+    for x in range(width):
+        strip.fill((x % 256, x // 256, 0), (x, 0, 1, height))
+    return strip
+
+def columns(surface):
+    return [surface.get_at((x, 0))[:2] for x in range(surface.get_width())]
+
+@pytest.mark.parametrize("offset_x", [0, 300, 950, 1099, 1100, 5000, -1, -250, -5000])
+@pytest.mark.parametrize("factor", [1, 0.5, 0.2])
+def test_parallax_layer_wraps_around_the_strip(offset_x, factor):
+    width = game.WIDTH + 100
+    strip = column_strip(width)
+    target = pygame.Surface((game.WIDTH, 2))
+    game.ParallaxLayer(strip, factor).draw(target, offset_x)
+    start = int(offset_x * factor)
+    assert columns(target) == [((start + x) % width % 256, (start + x) % width // 256) for x in range(game.WIDTH)]
+
+@pytest.mark.parametrize("period", [1, 64, 333, game.WIDTH, game.WIDTH + 1])
+def test_strip_width_covers_the_screen_in_whole_periods(period):
+    width = game.strip_width(period)
+    assert width >= game.WIDTH and width % period == 0 and width - period < game.WIDTH
+
+@pytest.fixture
+def texture_window(monkeypatch):
+    if game.Window is None:
+        pytest.skip("this pygame has no SDL2 render API")
+    renderer = game.Renderer
+
+    def no_accelerated_driver(window, accelerated=-1, vsync=False):
+        if accelerated == 1:
+            raise RuntimeError("Couldn't find matching render driver")  # What CI machines without a GPU report
+        return renderer(window, accelerated=accelerated, vsync=vsync)
+    monkeypatch.setattr(game, "Renderer", no_accelerated_driver)
+    window = game.TextureWindow((64, 48))
+    yield window
+    window.window.destroy()
+
+def test_texture_window_falls_back_to_the_software_renderer(texture_window):
+    assert not texture_window.accelerated
+    sprite = pygame.Surface((8, 8))
+    sprite.fill((255, 0, 0))
+    texture_window.fill((0, 0, 255))
+    texture_window.blit(sprite, (10, 20))
+    texture_window.blit(sprite, (30, 20), (0, 0, 4, 4))
+    frame = texture_window.renderer.to_surface()
+    assert frame.get_at((12, 22))[:3] == (255, 0, 0)
+    assert frame.get_at((35, 22))[:3] == (0, 0, 255)  # Only the 4x4 area of the second blit was drawn
+    assert texture_window.uploads == 1  # The sprite's texture is reused
+    texture_window.present()
+
+def test_texture_window_stretches_a_frame_over_the_window(texture_window):
+    frame = column_strip(32, 24)
+    texture_window.blit_scaled(frame)
+    texture_window.blit_scaled(frame)  # The streaming texture is reused
+    drawn = texture_window.renderer.to_surface()
+    assert drawn.get_size() == (64, 48)
+    assert drawn.get_at((62, 46))[:2] == (31, 0)
+
+@pytest.fixture
+def native_render(monkeypatch):
+    """Switch the module to NATIVE_RENDER's half-size sprites and frame, as the environment variable does at start."""
+    monkeypatch.setattr(game, "SPRITE_SCALE", 2)
+    frame = game.NativeFrame((64, 48))
+    monkeypatch.setattr(game, "native_frame", frame)
+    return frame
+
+class Square(game.StaticEntity):
+    __slots__ = ()
+
+def test_native_frame_is_doubled_pixel_for_pixel(native_render, monkeypatch):
+    monkeypatch.setattr(game, "UPSCALE", "integer")
+    sprite = column_strip(4, 4)
+    square = Square(pygame.Rect(30, 20, 8, 8), game.StaticKind(None, sprite, None))
+    background = game.ParallaxLayer(pygame.Surface((game.WIDTH // 2, 24)), 0)
+    window = pygame.Surface((64, 48))
+    game.draw(window, [background], None, [square], offset_x=10)
+
+    assert native_render.surface.get_size() == (32, 24)
+    for x in range(64):
+        for y in range(48):
+            inside = 20 <= x < 28 and 20 <= y < 28  # The square, 10 px to the left of where it is in the level
+            expected = sprite.get_at(((x - 20) // 2, (y - 20) // 2)) if inside else (0, 0, 0, 255)
+            assert window.get_at((x, y)) == expected
+
+def test_smooth_upscale_fills_the_window(native_render, monkeypatch):
+    monkeypatch.setattr(game, "UPSCALE", "smooth")
+    native_render.fill((200, 100, 50))
+    window = pygame.Surface((64, 48))
+    native_render.upscale(window)
+    assert {window.get_at((x, y))[:3] for x in range(64) for y in range(48)} == {(200, 100, 50)}
+
+def test_native_sprites_collide_at_their_in_game_size(native_render):
+    scaled = pygame.Surface((8, 8), pygame.SRCALPHA)
+    scaled.fill((255, 255, 255, 255), (0, 0, 8, 2))
+    native = game.halve(scaled)
+    kept = game.keep_sprite(scaled, native)
+    assert kept is native
+    assert game.get_mask(kept).get_size() == (8, 8) and game.get_mask(kept).count() == 16
+    assert game.sprite_rect(kept, (3, 4)) == pygame.Rect(3, 4, 8, 8)
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+import sens_adventure_game as game
+import sens_adventure_replay
+
+SEED = 1234
+FRAMES = 2400
+
+def policy(rng, frame):
+    """Mostly run right and jump, with some hesitation, so the run dies, restarts and lands on things."""
+    inputs = game.INPUT_RIGHT if rng.random() < 0.85 else game.INPUT_LEFT
+    if frame % 35 == 0 or rng.random() < 0.02:
+        inputs |= game.INPUT_JUMP
+    if rng.random() < 0.05:
+        inputs |= game.INPUT_DOWN
+    return inputs
+
+def frame_state(campaign, outcome):
+    player = campaign.player
+    return campaign.level, player.rect.topleft, player.x_vel, player.y_vel, player.score, outcome
+
+def record_session(seed=SEED, frames=FRAMES):
+    """Play a session the way start() does, restarting after each death or exit, and return its Replay and trace."""
+    random.seed(seed)
+    campaign = game.Campaign(preload=False)
+    replay = game.Replay(seed, game.campaign_hash(), "tester")
+    rng = random.Random(seed)
+    trace = []
+    for frame in range(frames):
+        inputs = policy(rng, frame)
+        replay.record(inputs)
+        outcome = campaign.step(inputs)
+        trace.append(frame_state(campaign, outcome))
+        if outcome in (game.OUTCOME_DEAD, game.OUTCOME_EXIT):
+            campaign.restart()  # "Play again"
+            replay.restart()
+    replay.score = campaign.player.score
+    return replay, trace
+
+def replay_session(replay):
+    """Play a replay back the way the replay verifier does, and return its trace."""
+    random.seed(replay.seed)
+    campaign = game.Campaign(preload=False)
+    restarts = set(replay.restarts)
+    trace = []
+    for frame, inputs in enumerate(replay.frames):
+        if frame in restarts:
+            campaign.restart()
+        trace.append(frame_state(campaign, campaign.step(inputs)))
+    return trace
+
+@pytest.fixture(scope="module")
+def recording():
+    return record_session()
+
+def test_recording_exercises_restarts(recording):
+    replay, trace = recording
+    assert replay.restarts, "the policy should die or finish at least once so restarts are replayed too"
+
+@pytest.mark.parametrize("entity_store, contact_cache", [(True, True), (False, False), (True, False), (False, True)])
+def test_replay_reproduces_every_frame(recording, tmp_path, monkeypatch, entity_store, contact_cache):
+    monkeypatch.setattr(game, "USE_ENTITY_STORE", entity_store)
+    monkeypatch.setattr(game, "USE_CONTACT_CACHE", contact_cache)
+    replay, trace = recording
+    path = tmp_path / "session.replay"
+    replay.save(path)
+    loaded = game.Replay.load(path)
+
+    assert (loaded.seed, loaded.level_hash, loaded.player_name, loaded.score) == \
+        (replay.seed, replay.level_hash, replay.player_name, replay.score)
+    assert loaded.frames == replay.frames and loaded.restarts == replay.restarts
+
+    assert replay_session(loaded) == trace
+    assert sens_adventure_replay.verify_replay(loaded) == (True, "ok", replay.score)
+
+def test_load_rejects_other_versions(recording, tmp_path):
+    replay, _ = recording
+    path = tmp_path / "session.replay"
+    replay.save(path)
+    data = bytearray(path.read_bytes())
+    data[4] = game.Replay.VERSION + 1  # The version byte follows the magic
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        game.Replay.load(path)
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a.replay"
+    path.write_bytes(b"PNG\0" + bytes(64))
+    with pytest.raises(ValueError):
+        game.Replay.load(path)
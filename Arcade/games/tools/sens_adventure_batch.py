@@ -0,0 +1,215 @@
+"""
+Sen's Adventure batch runner
+
+Plays many headless runs of Sen's Adventure on a pool of worker processes with scripted or random input, and
+reports how far runs get and where they die on each level, the scores and the cost of a frame on each level.
+
+Usage:
+    python tools/sens_adventure_batch.py --runs 2000 --policy random
+    python tools/sens_adventure_batch.py --runs 200 --policy right_jump --max-frames 3600 --json results.json
+    python tools/sens_adventure_batch.py --runs 500 --level 2 --single-level   # just level 2, on its own
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from collections import Counter
+from multiprocessing import Pool
+
+# Run pygame without opening a window or an audio device (inherited by the worker processes)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+# The game lives in games/, next to this tools/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games"))
+
+DEATH_BUCKET = 96 # group death positions by block width
+FRAME_BUCKET_US = 10 # count frame times in buckets this many microseconds wide, for percentiles without keeping them all
+
+game = None # the game module, imported once per worker process
+
+def _init_worker():
+    global game
+    import sens_adventure_game
+    game = sens_adventure_game
+
+def random_policy(rng):
+    """Hold a random direction for a random number of frames, jumping now and then."""
+    while True:
+        inputs = rng.choice([0, game.INPUT_LEFT, game.INPUT_RIGHT, game.INPUT_RIGHT, game.INPUT_RIGHT | game.INPUT_DOWN])
+        for frame in range(rng.randint(5, 40)):
+            jump = game.INPUT_JUMP if frame == 0 and rng.random() < 0.6 else 0
+            yield inputs | jump
+
+def right_jump_policy(rng):
+    """Run right, jumping at a steady rhythm with a little jitter."""
+    while True:
+        yield game.INPUT_RIGHT | game.INPUT_JUMP
+        for _ in range(rng.randint(25, 45)):
+            yield game.INPUT_RIGHT
+
+POLICIES = {
+    "random": random_policy,
+    "right_jump": right_jump_policy,
+}
+
+def run_once(task):
+    """
+    Play one run from its starting level to its end (or max_frames) and return what happened. With single_level
+    the run ends at that level's exit instead of carrying on into the next one.
+    """
+    seed, policy_name, max_frames, level, single_level = task
+    rng = random.Random(seed)
+    random.seed(seed)
+    campaign = game.Campaign(level, preload=False)
+    policy = POLICIES[policy_name](rng)
+
+    outcome = None
+    frame_time = 0.0
+    worst_frame = 0.0
+    frames = 0
+    frame_costs = {} # level -> its frames, their total and worst time, and a histogram of FRAME_BUCKET_US buckets
+    while outcome is None and frames < max_frames:
+        cost = frame_costs.setdefault(campaign.level + 1, {"frames": 0, "frame_time": 0.0, "worst_frame": 0.0,
+                                                           "histogram": Counter()})
+        started = time.perf_counter()
+        outcome = campaign.step(next(policy))
+        elapsed = time.perf_counter() - started
+        frame_time += elapsed
+        worst_frame = max(worst_frame, elapsed)
+        frames += 1
+        cost["frames"] += 1
+        cost["frame_time"] += elapsed
+        cost["worst_frame"] = max(cost["worst_frame"], elapsed)
+        cost["histogram"][int(elapsed * 1_000_000) // FRAME_BUCKET_US] += 1
+        if outcome == game.OUTCOME_NEXT_LEVEL:
+            outcome = game.OUTCOME_EXIT if single_level else None
+
+    last_level = campaign.level - 1 if single_level and campaign.level != level else campaign.level
+    return {
+        "seed": seed,
+        "outcome": outcome or "timeout",
+        "score": campaign.player.score,
+        "frames": frames,
+        "first_level": level + 1,
+        "last_level": last_level + 1, # the level the run ended on
+        "death_x": campaign.player.rect.x if outcome == game.OUTCOME_DEAD else None,
+        "frame_time": frame_time,
+        "worst_frame": worst_frame,
+        "frame_costs": frame_costs,
+    }
+
+def percentile_ms(histogram, fraction):
+    """The frame time in ms (to FRAME_BUCKET_US) that the given fraction of the frames in a histogram are within."""
+    target = fraction * sum(histogram.values())
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= target:
+            return (bucket + 1) * FRAME_BUCKET_US / 1000
+    return 0.0
+
+def frame_summary(costs):
+    """Mean, 95th percentile and worst frame time in ms over a list of run_once() frame costs."""
+    frames = sum(cost["frames"] for cost in costs)
+    histogram = Counter()
+    for cost in costs:
+        histogram.update(cost["histogram"])
+    return {"frames": frames,
+            "mean": 1000 * sum(cost["frame_time"] for cost in costs) / max(frames, 1),
+            "p95": percentile_ms(histogram, 0.95),
+            "worst": 1000 * max((cost["worst_frame"] for cost in costs), default=0.0)}
+
+def level_summary(results, level):
+    """How many runs reached and completed a level, and where on it they died."""
+    reached = [result for result in results if result["first_level"] <= level <= result["last_level"]]
+    completed = sum(1 for result in reached if result["last_level"] > level or result["outcome"] == "exit")
+    deaths = Counter(result["death_x"] // DEATH_BUCKET * DEATH_BUCKET
+                     for result in reached if result["last_level"] == level and result["death_x"] is not None)
+    return {
+        "reached": len(reached),
+        "completed": completed,
+        "completion_rate": completed / len(reached) if reached else 0.0,
+        "deaths_by_x": dict(sorted(deaths.items())),
+        "frame_ms": frame_summary([result["frame_costs"][level] for result in reached if level in result["frame_costs"]]),
+    }
+
+def summarise(results):
+    """Aggregate a list of run results into the numbers we tune levels by."""
+    outcomes = Counter(result["outcome"] for result in results)
+    scores = sorted(result["score"] for result in results)
+    frames = sum(result["frames"] for result in results)
+    levels = range(min(result["first_level"] for result in results), max(result["last_level"] for result in results) + 1)
+    quartiles = statistics.quantiles(scores, n=4) if len(scores) > 1 else [scores[0]] * 3
+    return {
+        "runs": len(results),
+        "completion_rate": outcomes["exit"] / len(results),
+        "outcomes": dict(outcomes),
+        "score": {"min": scores[0], "q1": quartiles[0], "median": quartiles[1], "q3": quartiles[2], "max": scores[-1],
+                  "mean": statistics.fmean(scores)},
+        "levels": {level: level_summary(results, level) for level in levels},
+        "frame_ms": frame_summary([cost for result in results for cost in result["frame_costs"].values()]),
+        "frames_simulated": frames,
+    }
+
+def format_frame_ms(frame_ms):
+    return f"mean {frame_ms['mean']:.3f} ms  p95 {frame_ms['p95']:.3f} ms  worst {frame_ms['worst']:.3f} ms"
+
+def print_report(summary, elapsed):
+    print(f"Runs: {summary['runs']} ({summary['frames_simulated']} frames in {elapsed:.1f}s, "
+          f"{summary['frames_simulated'] / (60 * elapsed):.0f}x realtime overall)")
+    print(f"Completion rate: {summary['completion_rate']:.1%}  outcomes: {summary['outcomes']}")
+    score = summary["score"]
+    print(f"Score: min {score['min']}  q1 {score['q1']:.0f}  median {score['median']:.0f}  q3 {score['q3']:.0f}  "
+          f"max {score['max']}  mean {score['mean']:.1f}")
+    print(f"Frame cost: {format_frame_ms(summary['frame_ms'])}")
+    for level, stats in summary["levels"].items():
+        print(f"Level {level}: reached by {stats['reached']}, completed by {stats['completed']} "
+              f"({stats['completion_rate']:.1%})")
+        print(f"  Frame cost: {format_frame_ms(stats['frame_ms'])} over {stats['frame_ms']['frames']} frames")
+        if stats["deaths_by_x"]:
+            print("  Deaths by x position:")
+            most = max(stats["deaths_by_x"].values())
+            for x, count in stats["deaths_by_x"].items():
+                print(f"    {x:>6} {count:>6} {'#' * max(1, 40 * count // most)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many headless Sen's Adventure games and report how the level plays.")
+    parser.add_argument("--runs", type=int, default=1000, help="number of runs (default: %(default)s)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random", help="input policy (default: %(default)s)")
+    parser.add_argument("--max-frames", type=int, default=60 * 60, help="give up on a run after this many frames (default: one minute)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run; run i uses seed + i")
+    parser.add_argument("--level", type=int, default=1, help="level every run starts on (default: %(default)s)")
+    parser.add_argument("--single-level", action="store_true", help="end each run at the starting level's exit")
+    parser.add_argument("--json", help="also write the summary and every run's result to this file")
+    args = parser.parse_args(argv)
+
+    _init_worker()
+    if not 1 <= args.level <= len(game.LEVELS):
+        parser.error(f"--level must be between 1 and {len(game.LEVELS)}")
+    tasks = [(args.seed + i, args.policy, args.max_frames, args.level - 1, args.single_level) for i in range(args.runs)]
+    started = time.perf_counter()
+    with Pool(args.workers, initializer=_init_worker) as pool:
+        results = list(pool.imap_unordered(run_once, tasks, chunksize=max(1, args.runs // (args.workers * 8))))
+        # Let the workers exit on their own: SDL turns the SIGTERM that Pool.terminate() sends into a quit event
+        pool.close()
+        pool.join()
+    elapsed = time.perf_counter() - started
+
+    summary = summarise(results)
+    print_report(summary, elapsed)
+    if args.json:
+        with open(args.json, "w") as file:
+            runs = [{**result, "frame_costs": {level: {name: value for name, value in cost.items() if name != "histogram"}
+                                               for level, cost in result["frame_costs"].items()}}
+                    for result in sorted(results, key=lambda result: result["seed"])] # the histograms are only for the summary
+            json.dump({"summary": summary, "runs": runs}, file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Sen's Adventure input latency benchmark
+
+Plays Sen's Adventure through its real frame loop while a thread presses the jump key at random moments, and reports
+the time from each key event being posted to its frame being presented, with the standard and the experimental
+low-latency loop order.
+
+Headless runs can't show a gain for the low-latency order, so it is off by default. To measure it, run on the
+cabinet's display with the texture renderer and VSYNC on, for 30 s or more, a few times over; only turn on
+SENS_ADVENTURE_LOW_LATENCY if it wins the median and p95 in every run.
+
+Usage:
+    SENS_ADVENTURE_RENDERER=texture SENS_ADVENTURE_VSYNC=1 python tools/sens_adventure_latency.py --seconds 30
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# The game lives in games/, next to this tools/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games"))
+
+import pygame
+import sens_adventure_game as game
+
+def press_keys(stop, seed, gap):
+    """Post a jump key press every gap seconds or so (uniformly 0.5x-1.5x) until stop is set."""
+    rng = random.Random(seed)
+    while not stop.wait(rng.uniform(0.5, 1.5) * gap):
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE, mod=0, unicode=" ",
+                                             scancode=0, sent_at=time.perf_counter()))
+
+def run(window, low_latency, seconds, seed, gap):
+    """Play for a number of seconds with key presses coming in, and return the pacer that measured them."""
+    random.seed(seed)
+    campaign = game.Campaign()
+    background = game.create_background("Blue.png")
+    pacer = game.FramePacer(low_latency=low_latency, measure=True)
+    offset_x = 0
+
+    stop = threading.Event()
+    presser = threading.Thread(target=press_keys, args=(stop, seed, gap), daemon=True)
+    presser.start()
+    frames = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        events = pacer.wait()
+        outcome = campaign.step(game.read_input(events) | game.INPUT_RIGHT) # keep running so the camera scrolls
+        if outcome == game.OUTCOME_NEXT_LEVEL:
+            offset_x = 0
+        elif outcome is not None: # start again so there's always a level to play
+            campaign.restart()
+            offset_x = 0
+        game.draw(window, background, campaign.player, campaign.objects, offset_x)
+        game.draw_score(window, campaign.player.score)
+        pacer.present(window)
+        offset_x = game.scroll(campaign.player, offset_x)
+        frames += 1
+    stop.set()
+    presser.join()
+    print(f"{'low-latency' if low_latency else 'standard'} order: {frames / seconds:.1f} fps, "
+          f"work estimate {1000 * pacer.work_estimate():.2f} ms")
+    return pacer
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Sen's Adventure's input-to-display latency with both loop orders.")
+    parser.add_argument("--seconds", type=float, default=20, help="how long to play with each order (default: %(default)s)")
+    parser.add_argument("--gap", type=float, default=0.25, help="average seconds between key presses (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the key presses (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for low_latency in (False, True):
+        pacer = run(game.window, low_latency, args.seconds, args.seed, args.gap)
+        name = "low-latency" if low_latency else "standard"
+        game.report_latency(f"{name:<12}", pacer.latencies)
+        results[name] = sorted(pacer.latencies)
+
+    standard, low = results["standard"], results["low-latency"]
+    if standard and low:
+        for name, share in (("median", 0.5), ("p95", 0.95)):
+            difference = 1000 * (low[int(len(low) * share)] - standard[int(len(standard) * share)])
+            print(f"Low-latency order {name}: {abs(difference):.2f} ms {'slower' if difference > 0 else 'faster'} than standard")
+    if pygame.display.get_driver() in ("dummy", "offscreen") or game.RENDERER != "texture" or not game.VSYNC:
+        print("Not measured on a vsync'd display, so this says nothing about whether the low-latency order helps there")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
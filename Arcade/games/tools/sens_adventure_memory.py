@@ -0,0 +1,173 @@
+"""
+Sen's Adventure memory report
+
+Builds the level headlessly and reports the pixel and mask bytes of its surfaces by asset and entity type, object
+counts and duplicate surfaces, then restarts it a few times and prints tracemalloc diffs between restarts.
+
+Usage:
+    python tools/sens_adventure_memory.py
+    python tools/sens_adventure_memory.py --restarts 5 --frames 600 --top 15
+"""
+import os
+import sys
+import hashlib
+import argparse
+import tracemalloc
+from collections import Counter, defaultdict
+
+# Run pygame without opening a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# The game lives in games/, next to this tools/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games"))
+
+import pygame
+import sens_adventure_game as game
+
+PREALLOC = 0x01000000 # SDL_PREALLOC: the pixels belong to someone else (the memory-mapped level cache)
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+def mask_bytes(mask):
+    width, height = mask.get_size()
+    return (width + 63) // 64 * 8 * height # bits are stored in 64-bit words per row
+
+def attributes(obj):
+    """An object's attributes: its __dict__, or for a StaticEntity flyweight, those of the StaticKind it shares."""
+    if isinstance(obj, game.StaticEntity):
+        return {name: getattr(obj.kind, name) for name in game.StaticKind.__slots__}
+    return vars(obj)
+
+def find_assets(owner, value, label, found):
+    """
+    Collect every surface and mask reachable from value through dicts, lists and tuples as (owner, label, item),
+    following no other objects except the blocks a Terrain is drawn from. Labels look like "Fire.fire[on]".
+    """
+    if isinstance(value, (pygame.Surface, pygame.mask.Mask)):
+        found.append((owner, label, value))
+    elif isinstance(value, game.StaticEntity):
+        for attr, item in attributes(value).items():
+            find_assets(owner, item, f"{label}.{attr}", found)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            find_assets(owner, item, f"{label}[{key}]" if "[" not in label else label, found)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            find_assets(owner, item, label, found)
+
+def level_assets(player, objects):
+    found = []
+    find_assets("Player", game.Player.SPRITES, "Player.SPRITES", found)
+    for obj in [player] + objects:
+        kind = type(obj).__name__
+        for attr, value in attributes(obj).items():
+            find_assets(kind, value, f"{kind}.{attr}", found)
+    return found
+
+def report(player, objects):
+    found = level_assets(player, objects)
+
+    surfaces = {} # id -> (owner, label, surface), first place each surface was seen
+    masks = {}
+    for owner, label, item in found:
+        table = surfaces if isinstance(item, pygame.Surface) else masks
+        table.setdefault(id(item), (owner, label, item))
+    cached_masks = [mask for surface, mask in game._mask_cache.items()]
+    for mask in cached_masks:
+        masks.setdefault(id(mask), ("get_mask() cache", "_mask_cache", mask))
+
+    total = sum(surface_bytes(surface) for _, _, surface in surfaces.values())
+    mapped = sum(surface_bytes(surface) for _, _, surface in surfaces.values() if surface.get_flags() & PREALLOC)
+    print(f"Surfaces: {len(surfaces)} holding {total / 1024:.0f} KiB of pixels "
+          f"({mapped / 1024:.0f} KiB memory-mapped from the level cache)")
+    print(f"Masks: {len(masks)} holding {sum(mask_bytes(mask) for _, _, mask in masks.values()) / 1024:.0f} KiB "
+          f"({len(game._mask_cache)} sprite frames in the get_mask() cache)")
+
+    print("\nObjects by type:")
+    for kind, count in Counter(type(obj).__name__ for obj in [player] + objects).most_common():
+        print(f"  {kind:<16} {count:>5}")
+
+    by_type = defaultdict(lambda: [0, 0])
+    by_asset = defaultdict(lambda: [0, 0])
+    for owner, label, surface in surfaces.values():
+        for table, key in ((by_type, owner), (by_asset, label)):
+            table[key][0] += 1
+            table[key][1] += surface_bytes(surface)
+    for owner, label, mask in masks.values():
+        by_type[owner][1] += mask_bytes(mask)
+
+    print("\nSurface and mask bytes by entity type:")
+    for kind, (count, size) in sorted(by_type.items(), key=lambda item: -item[1][1]):
+        print(f"  {kind:<16} {count:>5} surfaces {size / 1024:>9.1f} KiB")
+
+    print("\nSurface bytes by asset:")
+    for label, (count, size) in sorted(by_asset.items(), key=lambda item: -item[1][1]):
+        print(f"  {label:<40} {count:>5} surfaces {size / 1024:>9.1f} KiB")
+
+    # Surfaces with the same size and pixels as another one could be shared
+    groups = defaultdict(list)
+    for owner, label, surface in surfaces.values():
+        digest = hashlib.sha1(pygame.image.tobytes(surface, "RGBA")).digest()
+        groups[(surface.get_size(), digest)].append(label)
+    duplicates = [(size, labels) for (size, _), labels in groups.items() if len(labels) > 1]
+    wasted = sum(size[0] * size[1] * 4 * (len(labels) - 1) for size, labels in duplicates)
+    print(f"\nDuplicated surfaces: {sum(len(labels) - 1 for _, labels in duplicates)} copies "
+          f"in {len(duplicates)} groups, {wasted / 1024:.0f} KiB that could be shared")
+    by_label = Counter()
+    for size, labels in duplicates:
+        for label in labels[1:]:
+            by_label[label] += size[0] * size[1] * 4
+    for label, size in by_label.most_common(10):
+        print(f"  {label:<40} {size / 1024:>9.1f} KiB")
+
+def play(player, objects, store, frames):
+    """Run the level for a number of frames, running right and jumping, like the batch runner's right_jump policy."""
+    for frame in range(frames):
+        inputs = game.INPUT_RIGHT | (game.INPUT_JUMP if frame % 35 == 0 else 0)
+        if game.step(player, objects, inputs, store) is not None:
+            break
+
+def restart_diffs(restarts, frames, top):
+    """Take a tracemalloc snapshot after each level restart and print what grew since the previous one."""
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+    tracemalloc.start(10)
+    player, objects = game.create_game()
+    store = game.create_entity_store(objects)
+    level_start = game.GameSnapshot(player, objects, store)
+    play(player, objects, store, frames)
+    previous = tracemalloc.take_snapshot().filter_traces(filters)
+
+    for restart in range(1, restarts + 1):
+        level_start.restore(player, objects, store)
+        play(player, objects, store, frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+        stats = snapshot.compare_to(previous, "lineno")
+        growth = sum(stat.size_diff for stat in stats)
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"\nRestart {restart}: {growth / 1024:+.1f} KiB since the last run "
+              f"(traced {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB)")
+        for stat in stats[:top]:
+            if stat.size_diff:
+                frame = stat.traceback[0]
+                print(f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+6} blocks  "
+                      f"{os.path.basename(frame.filename)}:{frame.lineno}")
+        previous = snapshot
+    tracemalloc.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the memory used by Sen's Adventure's level.")
+    parser.add_argument("--restarts", type=int, default=3, help="level restarts to diff with tracemalloc (default: %(default)s)")
+    parser.add_argument("--frames", type=int, default=300, help="frames to play in each run (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=10, help="lines to show for each snapshot diff (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    player, objects = game.create_game()
+    report(player, objects)
+    if args.restarts > 0:
+        restart_diffs(args.restarts, args.frames, args.top)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Sen's Adventure render benchmark
+
+Times drawing the same stretch of Sen's Adventure with each render backend, CPU blits and SDL2 textures, while the
+player runs right and jumps so the camera scrolls; the simulation isn't timed.
+
+Usage:
+    python tools/sens_adventure_render_bench.py --frames 1200
+    SDL_VIDEODRIVER=dummy python tools/sens_adventure_render_bench.py   # headless, so the texture backend uses the software renderer
+    SENS_ADVENTURE_NATIVE_RENDER=1 python tools/sens_adventure_render_bench.py   # both backends drawing at native resolution
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+# Keep the game's own window on the surface backend, the texture one is opened separately below
+os.environ["SENS_ADVENTURE_RENDERER"] = "surface"
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# The game lives in games/, next to this tools/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games"))
+
+import sens_adventure_game as game
+
+JUMP_EVERY = 35 # frames between jumps
+
+def run(window, frames, seed):
+    """Simulate frames frames of play, drawing each one to window, and return the seconds spent drawing each frame."""
+    random.seed(seed)
+    player, objects = game.create_game()
+    store = game.create_entity_store(objects)
+    background = game.create_background("Blue.png")
+    offset_x = 0
+
+    times = []
+    for frame in range(frames):
+        inputs = game.INPUT_RIGHT | (game.INPUT_JUMP if frame % JUMP_EVERY == 0 else 0)
+        outcome = game.step(player, objects, inputs, store)
+        started = time.perf_counter()
+        game.draw(window, background, player, objects, offset_x)
+        game.draw_score(window, player.score)
+        game.update_display(window)
+        times.append(time.perf_counter() - started)
+        offset_x = game.scroll(player, offset_x)
+
+        if outcome is not None: # start again so every frame still has a level to draw
+            player, objects = game.create_game()
+            store = game.create_entity_store(objects)
+            offset_x = 0
+    return times
+
+def report(name, times):
+    ordered = sorted(times)
+    mean = statistics.fmean(times)
+    print(f"{name:<28} mean {1000 * mean:7.3f} ms  median {1000 * ordered[len(ordered) // 2]:7.3f} ms  "
+          f"p95 {1000 * ordered[int(len(ordered) * 0.95)]:7.3f} ms  worst {1000 * ordered[-1]:7.3f} ms  "
+          f"({1 / mean:.0f} fps)")
+    return mean
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Sen's Adventure's surface and texture render backends.")
+    parser.add_argument("--frames", type=int, default=1200, help="frames to draw with each backend (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the level (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    results["surface"] = report("surface (CPU blits)", run(game.window, args.frames, args.seed))
+
+    if game.Window is None:
+        print("This pygame has no SDL2 render API, skipping the texture backend")
+        return 0
+    texture_window = game.TextureWindow(game.window.get_size(), "Sen's Adventure (texture benchmark)")
+    kind = "accelerated" if texture_window.accelerated else "software"
+    results["texture"] = report(f"texture ({kind})", run(texture_window, args.frames, args.seed))
+    print(f"Textures uploaded: {texture_window.uploads}")
+    print(f"Texture backend is {results['surface'] / results['texture']:.2f}x the speed of the surface backend")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Sen's Adventure replay verifier
+
+Re-runs recorded Sen's Adventure sessions headlessly and checks that each one reaches the score it claims.
+
+Usage:
+    python tools/sens_adventure_replay.py games/replays/*.replay
+
+Prints one line per replay and exits with status 1 if any of them were rejected.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+# Run pygame without opening a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# The game lives in games/, next to this tools/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games"))
+
+import sens_adventure_game as game
+
+def simulate(replay):
+    """
+    Play back every recorded frame through a game.Campaign, moving on through the levels and restarting where the
+    player did, and return the final score.
+    """
+    random.seed(replay.seed)
+    campaign = game.Campaign(preload=False)
+    restarts = sorted(replay.restarts)
+    next_restart = 0
+    for frame, inputs in enumerate(replay.frames):
+        while next_restart < len(restarts) and restarts[next_restart] == frame:
+            campaign.restart()
+            next_restart += 1
+        campaign.step(inputs)
+    if next_restart < len(restarts): # restarted after the last frame, then quit
+        campaign.restart()
+    return campaign.player.score
+
+def verify_replay(replay):
+    """
+    Check a replay against the current levels. Returns (ok, reason, simulated_score);
+    the simulated score is None if the replay was recorded on different levels.
+    """
+    if game.campaign_hash() != replay.level_hash:
+        return False, "recorded on different levels", None
+
+    score = simulate(replay)
+    if score != replay.score:
+        return False, f"claims {replay.score} but replays to {score}", score
+    return True, "ok", score
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify the scores of recorded Sen's Adventure sessions.")
+    parser.add_argument("replays", nargs="+", help="replay files to check")
+    args = parser.parse_args(argv)
+
+    rejected = 0
+    for path in args.replays:
+        try:
+            replay = game.Replay.load(path)
+        except (OSError, ValueError) as e:
+            print(f"REJECTED {path}: {e}")
+            rejected += 1
+            continue
+
+        started = time.perf_counter()
+        ok, reason, _ = verify_replay(replay)
+        elapsed = time.perf_counter() - started
+        realtime = len(replay.frames) / game.FPS
+        speedup = realtime / elapsed if elapsed > 0 else float("inf")
+        status = "OK      " if ok else "REJECTED"
+        print(f"{status} {path}: {replay.player_name} {replay.score} ({reason}, {len(replay.frames)} frames, {speedup:.0f}x realtime)")
+        rejected += not ok
+
+    print(f"{len(args.replays) - rejected} verified, {rejected} rejected")
+    return 1 if rejected else 0
+
+if __name__ == "__main__":
+    sys.exit(main())